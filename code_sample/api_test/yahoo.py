@@ -1,10 +1,15 @@
 import os
+import sys
 import json
 import pandas as pd
 import yfinance as yf
 from datetime import datetime, timedelta
 import pytz
 
+# Fensterplanung (Handelskalender + Yahoo-Limits) aus der API wiederverwenden
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "..", "neuronal_network", "api"))
+from chunk_planner import plan_chunks
+
 # ----------------------------
 # --- Einstellungen aus JSON ---
 # ----------------------------
@@ -22,7 +27,7 @@ def get_csv_path(symbol):
     return os.path.join(folder, f"{symbol}-{settings['interval']}-{settings['period']}.csv")
 
 def fetch_yahoo_chunks(symbol, start, end, interval):
-    """Daten in 7-Tage-Chunks abrufen, Zeitzonen berücksichtigen"""
+    """Daten in Chunks abrufen (Aktien nur zu Handelszeiten, max. 7 Tage pro Request), Zeitzonen berücksichtigen"""
     ticker = yf.Ticker(symbol)
     chunks = []
 
@@ -35,11 +40,9 @@ def fetch_yahoo_chunks(symbol, start, end, interval):
     if end.tzinfo is None:
         end = tz.localize(end)
 
-    while start < end:
-        chunk_end = min(start + timedelta(days=7), end)
-        chunk_data = ticker.history(start=start, end=chunk_end, interval=interval, actions=True)
+    for chunk_start, chunk_end in plan_chunks("yahoo", interval, pd.Timestamp(start), pd.Timestamp(end), symbol):
+        chunk_data = ticker.history(start=chunk_start, end=chunk_end, interval=interval, actions=True)
         if chunk_data.empty:
-            start = chunk_end
             continue
         if chunk_data.index.tz is None:
             chunk_data.index = chunk_data.index.tz_localize(tz)
@@ -47,7 +50,6 @@ def fetch_yahoo_chunks(symbol, start, end, interval):
             chunk_data.index = chunk_data.index.tz_convert(tz)
         chunk_data["timestamp"] = chunk_data.index
         chunks.append(chunk_data)
-        start = chunk_end
 
     if chunks:
         df = pd.concat(chunks)
@@ -0,0 +1,274 @@
+# api_common.py
+# Gemeinsamer Teil von flask_api.py und async_api.py: Konfiguration aus .env, Hintergrund-Dienste
+# (Cache, Store, Webhook, Terminal-Logger, Live-Stream) und die reinen Schritte der Candle-Pipeline.
+# Die Server enthalten nur noch den Upstream-Zugriff (Threads bzw. aiohttp) und ihre Routen.
+import os
+import json
+import pandas as pd
+import yfinance as yf
+from colorama import init
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Lokale Module erst nach load_dotenv (lesen .env-Werte)
+import metrics
+from metrics import span, upstream_call
+from chunk_planner import BINANCE_PAGE_LIMIT, parse_period
+from candles import Candle, CandleBatch, build_candle, to_ohlcv
+from candle_cache import CandleCache
+from candle_store import CandleStore
+from live_stream import BinanceKlineStream, BINANCE_WS_URL
+from replay_upstream import ReplayTicker
+from quote_cache import BarCache
+from webhook_publisher import WebhookPublisher
+from terminal_logger import TerminalLogger
+
+# --- Setup ---
+# Optional: lokaler Replay-Upstream statt Binance/Yahoo (python replay_upstream.py)
+REPLAY_URL = os.getenv("REPLAY_URL")
+
+CSV_FOLDER = "csv"
+os.makedirs(CSV_FOLDER, exist_ok=True)
+
+WEBHOOK_URL = os.getenv("WEBHOOK_URL")  # optional
+webhook_publisher = None
+if WEBHOOK_URL:
+    webhook_publisher = WebhookPublisher(
+        WEBHOOK_URL,
+        max_queue=int(os.getenv("WEBHOOK_MAX_QUEUE", 1000)),
+        flush_interval=float(os.getenv("WEBHOOK_FLUSH_INTERVAL", 1.0)),
+        max_batch=int(os.getenv("WEBHOOK_MAX_BATCH", 500)),
+        policy=os.getenv("WEBHOOK_POLICY", "drop_oldest"),
+    ).start()
+
+# Parallele Chunk-Fenster für historische Daten (Flask: gemeinsamer Worker-Pool, async: pro Request)
+CHUNK_WORKERS = int(os.getenv("CHUNK_WORKERS", 4))
+STREAM_BATCH_SIZE = int(os.getenv("STREAM_BATCH_SIZE", 5000))  # Candles pro Batch im NDJSON-Modus
+REQUEST_DEADLINE = float(os.getenv("REQUEST_DEADLINE", 30))    # Sekunden
+
+# Lokaler Candle-Cache für historische Daten (CANDLE_CACHE=0 deaktiviert)
+CACHE_FOLDER = os.getenv("CANDLE_CACHE_FOLDER", os.path.join(CSV_FOLDER, "cache"))
+CACHE_SERIES = int(os.getenv("CANDLE_CACHE_SERIES", 32))  # Reihen im Speicher (LRU)
+candle_cache = (
+    CandleCache(CACHE_FOLDER, csv_folder=CSV_FOLDER, max_series=CACHE_SERIES)
+    if os.getenv("CANDLE_CACHE", "1") != "0" else None
+)
+
+# Spaltenweiser Candle-Store für /api/csv (CANDLE_STORE=0 deaktiviert), CSV_SNAPSHOTS=0: keine CSV-Exporte mehr
+STORE_FOLDER = os.getenv("CANDLE_STORE_FOLDER", os.path.join(CSV_FOLDER, "store"))
+STORE_FORMAT = os.getenv("CANDLE_STORE_FORMAT", "npy")  # gcs = komprimiert (candle_codec.py)
+candle_store = CandleStore(STORE_FOLDER, fmt=STORE_FORMAT) if os.getenv("CANDLE_STORE", "1") != "0" else None
+CSV_SNAPSHOTS = os.getenv("CSV_SNAPSHOTS", "1") != "0"
+
+# Optional: Binance Kline-WebSocket statt REST-Polling für Live-Candles (LIVE_STREAM=1)
+live_stream = None
+if os.getenv("LIVE_STREAM", "0") == "1":
+    live_stream = BinanceKlineStream(
+        symbols=os.getenv("LIVE_STREAM_SYMBOLS", "BTCUSDT,ETHUSDT,SOLUSDT").split(","),
+        size=int(os.getenv("LIVE_STREAM_SIZE", 500)),
+        url=os.getenv("BINANCE_WS_URL", BINANCE_WS_URL),
+    ).start()
+
+# Single-Flight: identische gleichzeitige Upstream-Fetches teilen sich einen Call
+SINGLE_FLIGHT_WINDOW = float(os.getenv("SINGLE_FLIGHT_WINDOW", 0))
+
+# Gemeinsamer TTL-Cache für Yahoo Live-Candles (TTL = Intervall, YF_CACHE_TTL überschreibt)
+yf_bar_cache = BarCache(
+    lambda symbol, interval, start=None: fetch_yf_bars(symbol, interval, start),
+    ttl=float(os.environ["YF_CACHE_TTL"]) if os.getenv("YF_CACHE_TTL") else None,
+)
+
+# Pub/Sub für Live-Candles (/api/live_sse, /api/live_ws): ein Poller pro (source, symbol, interval)
+LIVE_HUB_POLL_INTERVAL = float(os.getenv("LIVE_HUB_POLL_INTERVAL", 1.0))
+LIVE_HUB_QUEUE = int(os.getenv("LIVE_HUB_QUEUE", 100))
+SSE_HEARTBEAT = float(os.getenv("SSE_HEARTBEAT", 15))  # Sekunden ohne Candle -> Ping
+
+# Terminal-Ausgabe der Candles in eigenem Thread (LOG_FORMAT: tty, plain, jsonl)
+terminal_logger = TerminalLogger(
+    fmt=os.getenv("LOG_FORMAT") or None,
+    max_queue=int(os.getenv("LOG_QUEUE_SIZE", 10000)),
+    rate_per_symbol=float(os.getenv("LOG_RATE_PER_SYMBOL", 5)),
+).start()
+
+init(autoreset=True)  # colorama init
+
+# ---------------------------
+# --- Helper Functions ---
+# ---------------------------
+
+def to_json(o):
+    """Candle/CandleBatch erst bei der Ausgabe in die bisherige JSON-Form bringen"""
+    if isinstance(o, Candle):
+        return o.to_dict()
+    if isinstance(o, CandleBatch):
+        return o.to_dicts()
+    raise TypeError(f"Nicht serialisierbar: {type(o).__name__}")
+
+def ndjson_line(symbol_fmt, **item):
+    """Eine NDJSON-Zeile für /api/train_mode?format=ndjson: {"symbol":..., "history"|"live"|"error": ...}"""
+    return json.dumps({"symbol": symbol_fmt, **item}, default=to_json) + "\n"
+
+def print_candle(candle, mode="LIVE", prefix=None):
+    """Candle im Terminal ausgeben (nur einreihen, Ausgabe im Logger-Thread)"""
+    label = prefix if prefix else mode
+    with span("print"):
+        terminal_logger.log_candle(candle, label)
+
+def publish_to_webhook(symbol, candle):
+    """Optional: Candle an Webhook senden (nur einreihen, Versand im Hintergrund)"""
+    if webhook_publisher is not None:
+        with span("webhook"):
+            webhook_publisher.publish(symbol, candle)
+
+def set_request_labels(endpoint, args):
+    """Metrik-Labels endpoint/source für den laufenden Request (args: Query-Parameter)"""
+    metrics.current_endpoint.set(endpoint)
+    has_symbols = "symbol" in args or "symbols" in args
+    metrics.current_source.set(args.get("source", "yahoo").lower() if has_symbols else "-")
+
+# ---------------------------
+# --- Upstream-Antworten ---
+# ---------------------------
+
+BINANCE_KLINE_COLUMNS = [
+    "open_time","open","high","low","close","volume","close_time",
+    "quote_asset_volume","trades","taker_buy_base","taker_buy_quote","ignore"
+]
+
+# --- Binance ---
+def stream_candle(symbol):
+    """Live-Candle aus dem Ring-Buffer des Kline-Streams (None ohne Stream/Daten -> REST)"""
+    if live_stream is None:
+        return None
+    klines = live_stream.last(symbol, 2)
+    if klines is None:
+        return None
+    return build_candle(
+        open_=klines["open"][1],
+        high=klines["high"][1],
+        low=klines["low"][1],
+        close=klines["close"][1],
+        volume=klines["volume"][1],
+        symbol=symbol,
+        prev_close=klines["close"][0]
+    )
+
+def kline_candle(symbol, klines):
+    """Live-Candle aus den letzten zwei REST-Klines"""
+    return build_candle(
+        open_=klines[1][1],
+        high=klines[1][2],
+        low=klines[1][3],
+        close=klines[1][4],
+        volume=klines[1][5],
+        symbol=symbol,
+        prev_close=klines[0][4]
+    )
+
+def binance_page_params(symbol, interval, start, end):
+    """Parameter für GET /api/v3/klines eines geplanten Fensters [start, end)"""
+    return dict(
+        symbol=symbol,
+        interval=interval,
+        startTime=int(start.timestamp() * 1000),
+        endTime=int(end.timestamp() * 1000) - 1,
+        limit=BINANCE_PAGE_LIMIT
+    )
+
+def klines_frame(klines):
+    """Klines-Antwort -> DataFrame (Index open_time) oder None wenn leer"""
+    if not klines:
+        return None
+    df = pd.DataFrame(klines, columns=BINANCE_KLINE_COLUMNS)
+    df.index = pd.to_datetime(df["open_time"], unit='ms')
+    return df
+
+# --- Yahoo Finance ---
+def yf_ticker(symbol):
+    """yfinance.Ticker oder Replay-Ersatz (REPLAY_URL)"""
+    return ReplayTicker(symbol, REPLAY_URL) if REPLAY_URL else yf.Ticker(symbol)
+
+def fetch_yf_bars(symbol, interval="1m", start=None):
+    """Yahoo-Bars: Erstabruf 1 Tag, danach nur ab start (inkrementell)"""
+    ticker = yf_ticker(symbol)
+    with upstream_call("yahoo", "live"):
+        if start is None:
+            return ticker.history(period="1d", interval=interval)
+        return ticker.history(start=start, interval=interval)
+
+def bars_candle(symbol, hist):
+    """Live-Candle aus den letzten zwei Yahoo-Bars"""
+    if hist.empty or len(hist)<2:
+        raise ValueError(f"Keine Daten für {symbol}")
+    return build_candle(
+        open_=hist["Open"].iloc[-1],
+        high=hist["High"].iloc[-1],
+        low=hist["Low"].iloc[-1],
+        close=hist["Close"].iloc[-1],
+        volume=hist["Volume"].iloc[-1] if "Volume" in hist else 0,
+        symbol=symbol,
+        prev_close=hist["Close"].iloc[-2]
+    )
+
+def fetch_yf_chunk(symbol, interval, start, end):
+    """Ein geplantes Yahoo-Fenster (synchron) -> OHLCV-Frame oder None wenn leer"""
+    ticker = yf_ticker(symbol)
+    with upstream_call("yahoo", "history"):
+        hist = ticker.history(start=start, end=end, interval=interval)
+    if hist.empty:
+        return None
+    return hist.rename(columns=str.lower)
+
+# ---------------------------
+# --- Pipeline ---
+# ---------------------------
+
+def history_window(period, utc):
+    """(start, now) für period; der Cache rechnet in UTC, der direkte Abruf ohne Zeitzone"""
+    now = pd.Timestamp.now(tz="UTC") if utc else pd.Timestamp.now()
+    return now - pd.Timedelta(days=parse_period(period)), now
+
+def gap_frames(frames):
+    """Roh-Chunks einer Cache-Lücke -> OHLCV-Frames für candle_cache.iter_range (lazy)"""
+    return (to_ohlcv(f) for f in frames if f is not None)
+
+def cache_batch(ohlcv, symbol, prev=None):
+    """
+    Ein Frame aus candle_cache.iter_range -> CandleBatch (schon sortiert).
+    prev: vorheriger Frame, seine letzte Zeile liefert prev_close der ersten Candle (sonst fällt sie weg)
+    """
+    with span("build"):
+        if prev is not None:
+            ohlcv = pd.concat([prev.iloc[-1:], ohlcv])
+        return CandleBatch.from_ohlcv(ohlcv, symbol)
+
+def chunk_batch(frame, symbol, prev=None):
+    """
+    Ein Roh-Chunk ohne Cache -> sortierter CandleBatch.
+    prev: vorheriger Chunk, seine letzte Zeile liefert prev_close der ersten Candle (sonst fällt sie weg)
+    """
+    with span("build"):
+        ohlcv = to_ohlcv(frame)
+        if prev is not None:
+            ohlcv = pd.concat([to_ohlcv(prev.iloc[-1:]), ohlcv])
+        batch = CandleBatch.from_ohlcv(ohlcv, symbol)
+    with span("sort"):
+        return batch.sorted()
+
+def fan_out_results(tasks, done, deadline):
+    """
+    Ergebnisse eines Fan-outs einsammeln: tasks {symbol_fmt: Future/Task}, done = fertige.
+    Nicht fertige werden abgebrochen; Fehler/Timeouts bleiben pro Symbol isoliert: {"error": ...}
+    """
+    result = {}
+    for symbol_fmt, task in tasks.items():
+        if task not in done:
+            task.cancel()
+            result[symbol_fmt] = {"error": f"Timeout nach {deadline}s"}
+            continue
+        try:
+            result[symbol_fmt] = task.result()
+        except Exception as e:
+            result[symbol_fmt] = {"error": str(e)}
+    return result
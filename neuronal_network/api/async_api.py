@@ -0,0 +1,487 @@
+# async_api.py
+# Async-Variante von flask_api.py (aiohttp): gleiche Routen, ein Prozess, ein Event-Loop.
+# Binance REST läuft über einen gemeinsamen aiohttp-Client (Keep-Alive, kein Thread pro Request),
+# yfinance ist synchron und läuft in einem kleinen, begrenzten Thread-Pool.
+# Konfiguration, Hintergrund-Dienste und Pipeline-Schritte: api_common.py
+import json
+import os
+import time
+import asyncio
+import contextvars
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+import aiohttp
+from aiohttp import web
+
+# Lokale Module: api_common lädt .env vor dem Lesen der Konfiguration
+from api_common import (
+    REPLAY_URL, CSV_FOLDER, CHUNK_WORKERS, STREAM_BATCH_SIZE, REQUEST_DEADLINE, CSV_SNAPSHOTS,
+    SINGLE_FLIGHT_WINDOW, LIVE_HUB_POLL_INTERVAL, LIVE_HUB_QUEUE, SSE_HEARTBEAT,
+    webhook_publisher, candle_cache, candle_store, yf_bar_cache, terminal_logger,
+    to_json, ndjson_line, print_candle, publish_to_webhook, set_request_labels,
+    stream_candle, kline_candle, binance_page_params, klines_frame, bars_candle, fetch_yf_chunk,
+    history_window, gap_frames, cache_batch, chunk_batch, fan_out_results,
+)
+import rate_limit
+import metrics
+from metrics import span, upstream_call
+from chunk_planner import plan_chunks
+from candles import CandleBatch, format_symbol
+from candle_cache import yahoo_tz
+from candle_store import parse_time, save_batches
+from live_hub import LiveHub
+from single_flight import AsyncSingleFlight
+
+# --- Setup ---
+BINANCE_REST_URL = REPLAY_URL or os.getenv("BINANCE_REST_URL", "https://api.binance.com")
+UPSTREAM_CONNECTIONS = int(os.getenv("UPSTREAM_CONNECTIONS", 100))  # offene Verbindungen zu Binance
+UPSTREAM_TIMEOUT = float(os.getenv("UPSTREAM_TIMEOUT", 10))         # Sekunden pro Upstream-Request
+
+# yfinance (synchron) + Datei-I/O in begrenzten Thread-Pools statt im Event-Loop
+YAHOO_THREADS = int(os.getenv("YAHOO_THREADS", 8))
+yahoo_executor = ThreadPoolExecutor(max_workers=YAHOO_THREADS, thread_name_prefix="yahoo")
+io_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="io")
+cache_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="cache")
+
+# Single-Flight: identische gleichzeitige Upstream-Fetches teilen sich einen Task
+upstream_flight = AsyncSingleFlight(reuse_window=SINGLE_FLIGHT_WINDOW)
+
+# ---------------------------
+# --- Helper Functions ---
+# ---------------------------
+
+def dumps(obj):
+    return json.dumps(obj, default=to_json)
+
+def json_response(obj, status=200):
+    with span("serialize"):
+        return web.json_response(obj, status=status, dumps=dumps)
+
+async def run_blocking(executor, fn, *args):
+    """Synchrone Funktion im Thread-Pool ausführen, ohne den Event-Loop zu blockieren"""
+    # Kontext mitgeben -> Metrik-Labels des Requests auch im Worker-Thread
+    return await asyncio.get_running_loop().run_in_executor(executor, contextvars.copy_context().run, fn, *args)
+
+def iter_blocking(agen, loop):
+    """Async-Generator aus einem Worker-Thread heraus synchron durchlaufen"""
+    while True:
+        try:
+            yield asyncio.run_coroutine_threadsafe(agen.__anext__(), loop).result()
+        except StopAsyncIteration:
+            return
+
+# ---------------------------
+# --- Candle Fetch ---
+# ---------------------------
+
+# --- Binance ---
+async def binance_get_klines(session, kind, **params):
+    """GET /api/v3/klines (gleiche Antwort wie Client.get_klines), kind = live/history für Metriken"""
+    with upstream_call("binance", kind):
+        async with session.get(f"{BINANCE_REST_URL}/api/v3/klines", params=params) as resp:
+            data = await resp.json(content_type=None)
+            if resp.status != 200:
+                msg = data.get("msg") if isinstance(data, dict) else data
+                raise ValueError(f"Binance API Fehler {resp.status}: {msg}")
+            return data
+
+@upstream_flight.wrap
+async def fetch_binance_candle(session, symbol):
+    # Streaming-Modus: aus dem Ring-Buffer bedienen (Fallback REST)
+    candle = stream_candle(symbol)
+    if candle is not None:
+        return candle
+    klines = await binance_get_klines(session, "live", symbol=symbol, interval="1m", limit=2)
+    return kline_candle(symbol, klines)
+
+# --- Yahoo Finance ---
+@upstream_flight.wrap
+async def fetch_yf_candle(symbol, interval="1m"):
+    hist = await run_blocking(yahoo_executor, yf_bar_cache.get, symbol, interval)
+    return bars_candle(symbol, hist)
+
+async def fetch_live_candle(session, symbol, source, interval="1m"):
+    """Aktuelle Candle je nach Quelle"""
+    if source == "binance":
+        return await fetch_binance_candle(session, symbol)
+    return await fetch_yf_candle(symbol, interval)
+
+# --- Chunked Fetch ---
+async def fetch_raw_chunk(session, symbol, source, interval, start, end):
+    """Ein geplantes Fenster holen -> OHLCV-Frame (oder None wenn leer)"""
+    with span("rate_limit"):
+        await rate_limit.acquire_async(source)
+    if source == "yahoo":
+        return await run_blocking(yahoo_executor, fetch_yf_chunk, symbol, interval, start, end)
+    klines = await binance_get_klines(session, "history", **binance_page_params(symbol, interval, start, end))
+    return klines_frame(klines)
+
+async def iter_ordered(fn, items, max_in_flight):
+    """Wie flask_api.iter_ordered: max. max_in_flight Tasks offen, Ergebnisse in Reihenfolge"""
+    pending = deque()
+    try:
+        for item in items:
+            pending.append(asyncio.ensure_future(fn(item)))
+            if len(pending) >= max_in_flight:
+                yield await pending.popleft()
+        while pending:
+            yield await pending.popleft()
+    finally:
+        for task in pending:
+            task.cancel()
+
+def iter_raw_chunks(session, symbol, source, interval, start, end):
+    """Alle Fenster in [start, end) nebenläufig holen, in Reihenfolge liefern"""
+    windows = plan_chunks(source, interval, start, end, symbol)
+    return iter_ordered(
+        lambda w: fetch_raw_chunk(session, symbol, source, interval, *w), windows, CHUNK_WORKERS * 2
+    )
+
+async def iter_candle_batches(session, symbol, source="yahoo", interval="1m", period="6mo", batch_size=None):
+    """
+    Async-Pipeline: CandleBatches in Zeitreihenfolge.
+    batch_size: max. Zeilen pro Batch aus dem Cache (None = alles auf einmal)
+    """
+    if candle_cache is not None:
+        loop = asyncio.get_running_loop()
+        start, now = history_window(period, utc=True)
+        # Cache ist synchron (Locks, Disk) -> jeder Schritt im Worker-Thread, Lücken werden im Event-Loop geholt.
+        # Gecachte Abschnitte gehen sofort raus, Lücken werden erst beim Erreichen geholt
+        frames = candle_cache.iter_range(
+            source, symbol, interval, start, now,
+            lambda gap_start, gap_end: gap_frames(
+                iter_blocking(iter_raw_chunks(session, symbol, source, interval, gap_start, gap_end), loop)
+            ),
+            batch_size,
+        )
+        elapsed = 0.0  # inkl. Nachladen fehlender Lücken (upstream), als eine Stage-Messung
+        prev = None
+        try:
+            while True:
+                started = time.perf_counter()
+                f = await run_blocking(cache_executor, next, frames, None)
+                elapsed += time.perf_counter() - started
+                if f is None:
+                    break
+                yield cache_batch(f, symbol, prev)
+                prev = f
+        finally:
+            metrics.observe_stage("cache", elapsed)
+        return
+
+    start, now = history_window(period, utc=False)
+    prev = None
+    async for f in iter_raw_chunks(session, symbol, source, interval, start, now):
+        if f is not None:
+            yield chunk_batch(f, symbol, prev)
+            prev = f
+
+@upstream_flight.wrap
+async def fetch_candles_chunked(session, symbol, source="yahoo", interval="1m", period="6mo"):
+    """Historische Candles als CandleBatch (aufsteigend, älteste zuerst)"""
+    batches = [b async for b in iter_candle_batches(session, symbol, source, interval, period)]
+    with span("sort"):
+        return CandleBatch.concat(batches, symbol).sorted()
+
+# ---------------------------
+# --- Multi-Symbol Fan-out ---
+# ---------------------------
+
+def request_deadline(request):
+    """Deadline pro Request (Parameter deadline in Sekunden, sonst REQUEST_DEADLINE)"""
+    try:
+        return float(request.query.get("deadline", REQUEST_DEADLINE))
+    except ValueError:
+        return REQUEST_DEADLINE
+
+async def fan_out(symbols, source, fetch_fn, deadline=None):
+    """
+    fetch_fn(symbol_fmt) für alle Symbole nebenläufig ausführen.
+    Fehler/Timeouts bleiben pro Symbol isoliert: {"error": ...}
+    """
+    tasks = {}
+    for symbol in symbols:
+        symbol_fmt = format_symbol(symbol, source)
+        tasks[symbol_fmt] = asyncio.ensure_future(fetch_fn(symbol_fmt))
+
+    done, _ = await asyncio.wait(tasks.values(), timeout=deadline)
+    return fan_out_results(tasks, done, deadline)
+
+# ---------------------------
+# --- API Endpoints ---
+# ---------------------------
+
+routes = web.RouteTableDef()
+
+def request_params(request):
+    return (
+        request.query.get("source", "yahoo").lower(),
+        request.query.get("interval", "1m"),
+    )
+
+@routes.get("/api/live")
+async def api_live(request):
+    symbols = request.query.get("symbols")
+    source, interval = request_params(request)
+    if not symbols:
+        return json_response({"error":"Bitte Parameter symbols angeben"}, 400)
+    symbols = symbols.split(",")
+    session = request.app["session"]
+
+    async def live_symbol(symbol_fmt):
+        candle = await fetch_live_candle(session, symbol_fmt, source, interval)
+        print_candle(candle, prefix="[LIVE]")
+        publish_to_webhook(symbol_fmt, candle)
+        return candle
+
+    return json_response(await fan_out(symbols, source, live_symbol, request_deadline(request)))
+
+@routes.get("/api/train_mode")
+async def api_train_mode(request):
+    symbols = request.query.get("symbols")
+    source, interval = request_params(request)
+    if not symbols:
+        return json_response({"error":"Bitte Parameter symbols angeben"}, 400)
+    symbols = symbols.split(",")
+    session = request.app["session"]
+
+    if request.query.get("format") == "ndjson":
+        return await stream_train_mode(request, session, symbols, source, interval)
+
+    async def train_symbol(symbol_fmt):
+        candles = await fetch_candles_chunked(session, symbol_fmt, source, interval, period="7d")
+        live_candle = await fetch_live_candle(session, symbol_fmt, source, interval)
+        for c in candles[-5:]:
+            print_candle(c, prefix="[HIST]")
+        print_candle(live_candle, prefix="[LIVE]")
+        publish_to_webhook(symbol_fmt, live_candle)
+        return {"history": candles, "live": live_candle}
+
+    return json_response(await fan_out(symbols, source, train_symbol, request_deadline(request)))
+
+async def stream_train_mode(request, session, symbols, source, interval):
+    """
+    NDJSON: eine Zeile pro Candle (Format wie flask_api.stream_train_mode),
+    pro CandleBatch ein write() -> Backpressure über den Socket.
+    """
+    resp = web.StreamResponse(headers={"Content-Type": "application/x-ndjson"})
+    await resp.prepare(request)
+    for symbol in symbols:
+        symbol_fmt = format_symbol(symbol, source)
+        try:
+            last = deque(maxlen=5)
+            async for batch in iter_candle_batches(session, symbol_fmt, source, interval, "7d", STREAM_BATCH_SIZE):
+                candles = batch.to_dicts()
+                last.extend(candles)
+                await resp.write("".join(ndjson_line(symbol_fmt, history=candle) for candle in candles).encode())
+            live_candle = await fetch_live_candle(session, symbol_fmt, source, interval)
+            for c in last:
+                print_candle(c, prefix="[HIST]")
+            print_candle(live_candle, prefix="[LIVE]")
+            publish_to_webhook(symbol_fmt, live_candle)
+            await resp.write(ndjson_line(symbol_fmt, live=live_candle).encode())
+        except ConnectionResetError:
+            raise
+        except Exception as e:
+            await resp.write(ndjson_line(symbol_fmt, error=str(e)).encode())
+    await resp.write_eof()
+    return resp
+
+async def iter_live(hub, keys):
+    """Hub-Abo als Async-Generator: Items (symbol, candle), None = Heartbeat fällig"""
+    loop = asyncio.get_running_loop()
+    ready = asyncio.Event()
+    sub = hub.subscribe(keys, notify=lambda: loop.call_soon_threadsafe(ready.set))
+    try:
+        while True:
+            try:
+                await asyncio.wait_for(ready.wait(), SSE_HEARTBEAT)
+            except asyncio.TimeoutError:
+                yield None
+                continue
+            ready.clear()
+            for item in sub.drain():
+                yield item
+    finally:
+        hub.unsubscribe(sub)
+
+def live_keys(request):
+    symbols = request.query.get("symbols")
+    source, interval = request_params(request)
+    if not symbols:
+        return None
+    return [(source, format_symbol(symbol, source), interval) for symbol in symbols.split(",")]
+
+@routes.get("/api/live_sse")
+async def api_live_sse(request):
+    """Server-Sent Events: jede neue Candle als data: {symbol: candle}"""
+    keys = live_keys(request)
+    if not keys:
+        return json_response({"error":"Bitte Parameter symbols angeben"}, 400)
+    resp = web.StreamResponse(headers={"Content-Type": "text/event-stream", "Cache-Control": "no-cache"})
+    await resp.prepare(request)
+    live = iter_live(request.app["live_hub"], keys)
+    try:
+        async for item in live:
+            if item is None:
+                await resp.write(b": ping\n\n")
+                continue
+            symbol, candle = item
+            await resp.write(f"data: {dumps({symbol: candle})}\n\n".encode())
+    except ConnectionResetError:
+        pass
+    finally:
+        await live.aclose()
+    return resp
+
+@routes.get("/api/live_ws")
+async def api_live_ws(request):
+    """WebSocket: jede neue Candle als Textnachricht {symbol: candle}"""
+    keys = live_keys(request)
+    if not keys:
+        return json_response({"error":"Bitte Parameter symbols angeben"}, 400)
+    ws = web.WebSocketResponse(heartbeat=SSE_HEARTBEAT)
+    await ws.prepare(request)
+
+    async def send_candles():
+        live = iter_live(request.app["live_hub"], keys)
+        try:
+            async for item in live:
+                if item is not None:
+                    symbol, candle = item
+                    await ws.send_str(dumps({symbol: candle}))
+        finally:
+            await live.aclose()
+
+    sender = asyncio.ensure_future(send_candles())
+    try:
+        async for _ in ws:  # Client-Nachrichten ignorieren, nur auf Close warten
+            pass
+    finally:
+        sender.cancel()
+    return ws
+
+@routes.get("/api/fetch_candle")
+async def api_fetch_candle(request):
+    symbol = request.query.get("symbol")
+    source, interval = request_params(request)
+    if not symbol:
+        return json_response({"error":"Bitte Parameter symbol angeben"}, 400)
+    symbol_fmt = format_symbol(symbol, source)
+    try:
+        candle = await fetch_live_candle(request.app["session"], symbol_fmt, source, interval)
+        print_candle(candle)
+        publish_to_webhook(symbol_fmt, candle)
+        return json_response(candle)
+    except Exception as e:
+        return json_response({"error":str(e)})
+
+@routes.get("/api/csv")
+async def api_csv(request):
+    symbol = request.query.get("symbol")
+    source, interval = request_params(request)
+    period = request.query.get("period","7d")
+    if not symbol:
+        return json_response({"error":"Bitte Parameter symbol angeben"}, 400)
+    symbol_fmt = format_symbol(symbol, source)
+    loop = asyncio.get_running_loop()
+    try:
+        # Batches direkt in Store/Datei streamen: Download im Event-Loop, Schreiben im I/O-Thread
+        batches = iter_candle_batches(request.app["session"], symbol_fmt, source, interval, period, STREAM_BATCH_SIZE)
+        file_path, rows = await run_blocking(
+            io_executor, lambda: save_batches(
+                iter_blocking(batches, loop), candle_store, symbol_fmt, source, interval, period, CSV_FOLDER,
+                snapshot=CSV_SNAPSHOTS,
+            )
+        )
+        return json_response({"status":"CSV erstellt","rows":rows,"file":file_path})
+    except Exception as e:
+        return json_response({"error":str(e)})
+
+@routes.get("/api/range")
+async def api_range(request):
+    """Candles mit start <= timestamp < end aus dem Candle-Store (Binärsuche, kein Upstream)"""
+    symbol = request.query.get("symbol")
+    source, interval = request_params(request)
+    if not symbol:
+        return json_response({"error":"Bitte Parameter symbol angeben"}, 400)
+    if candle_store is None:
+        return json_response({"error":"Candle-Store deaktiviert (CANDLE_STORE=0)"}, 404)
+    symbol_fmt = format_symbol(symbol, source)
+    try:
+        tz = yahoo_tz(symbol_fmt) if source == "yahoo" else "UTC"
+        start = parse_time(request.query.get("start"), tz)
+        end = parse_time(request.query.get("end"), tz)
+        limit = int(request.query["limit"]) if "limit" in request.query else None
+    except ValueError as e:
+        return json_response({"error":f"Ungültige Zeitangabe: {e}"}, 400)
+    with span("index"):  # Laden/Neuladen einer Reihe liest Dateien -> I/O-Thread
+        index = await run_blocking(io_executor, candle_store.index, source, symbol_fmt, interval)
+    if index is None:
+        return json_response({"error":f"Keine gespeicherten Candles für {symbol_fmt} {interval} ({source})"}, 404)
+    return json_response(index.range(start, end, limit))
+
+@routes.get("/api/metrics")
+async def api_metrics(request):
+    """Prometheus-Textformat (Histogramme pro Endpoint/Source/Stage, Upstream-Zähler)"""
+    return web.Response(body=metrics.render().encode(), headers={"Content-Type": "text/plain; version=0.0.4"})
+
+@routes.get("/api/stats")
+async def api_stats(request):
+    return json_response({
+        "single_flight": upstream_flight.stats(),
+        "webhook": webhook_publisher.stats() if webhook_publisher is not None else None,
+        "terminal_logger": terminal_logger.stats(),
+        "live_hub": request.app["live_hub"].stats(),
+    })
+
+# ---------------------------
+# --- App ---
+# ---------------------------
+
+@web.middleware
+async def request_metrics(request, handler):
+    """Labels endpoint/source setzen, Request-Dauer messen"""
+    started = time.perf_counter()
+    resource = request.match_info.route.resource
+    set_request_labels(resource.canonical if resource is not None else "unknown", request.query)
+    status = 500
+    try:
+        response = await handler(request)
+        status = response.status
+        return response
+    except web.HTTPException as e:
+        status = e.status
+        raise
+    finally:
+        metrics.REQUEST_SECONDS.observe(
+            time.perf_counter() - started,
+            endpoint=metrics.current_endpoint.get(), source=metrics.current_source.get(), status=status,
+        )
+
+async def upstream_session(app):
+    """Ein gemeinsamer HTTP-Client (Connection-Pool) für alle Requests + Live-Hub"""
+    app["session"] = aiohttp.ClientSession(
+        connector=aiohttp.TCPConnector(limit=UPSTREAM_CONNECTIONS),
+        timeout=aiohttp.ClientTimeout(total=UPSTREAM_TIMEOUT),
+    )
+    # Hub-Poller laufen in Threads und holen über den Event-Loop
+    loop = asyncio.get_running_loop()
+    app["live_hub"] = LiveHub(
+        lambda source, symbol, interval: asyncio.run_coroutine_threadsafe(
+            fetch_live_candle(app["session"], symbol, source, interval), loop
+        ).result(),
+        poll_interval=LIVE_HUB_POLL_INTERVAL,
+        max_queue=LIVE_HUB_QUEUE,
+    )
+    yield
+    await app["session"].close()
+
+def create_app():
+    app = web.Application(middlewares=[request_metrics])
+    app.add_routes(routes)
+    app.cleanup_ctx.append(upstream_session)
+    return app
+
+if __name__=="__main__":
+    web.run_app(create_app(), port=int(os.getenv("ASYNC_API_PORT", 5000)))
@@ -0,0 +1,274 @@
+# benchmark.py
+# Lasttest der Candle-API gegen den lokalen Replay-Upstream (replay_upstream.py).
+# Startet Replay-Server + API (flask oder async) als eigene Prozesse, feuert Requests mit
+# fester Parallelität und speichert p50/p95/p99, Requests/s und Peak-RSS als JSON.
+#
+#   python neuronal_network/api/benchmark.py --server flask --concurrency 16 --duration 10
+#   python neuronal_network/api/benchmark.py --server async --compare benchmarks/<alt>.json
+import os
+import sys
+import json
+import time
+import glob
+import socket
+import argparse
+import datetime
+import tempfile
+import threading
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import requests
+
+API_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.abspath(os.path.join(API_DIR, "..", ".."))
+
+SCENARIOS = ("live", "fetch_candle", "train_mode", "csv")
+
+SERVER_COMMANDS = {
+    "flask": "import flask_api; flask_api.app.run(port={port}, threaded=True)",
+    "async": "import async_api; from aiohttp import web; web.run_app(async_api.create_app(), port={port}, print=None)",
+}
+
+
+# ---------------------------
+# --- Prozesse ---
+# ---------------------------
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def wait_for_port(port, timeout=60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=0.5):
+                return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError(f"Port {port} nach {timeout}s nicht erreichbar")
+
+
+def start_process(code, env, cwd, log_path):
+    log = open(log_path, "w")
+    return subprocess.Popen(
+        [sys.executable, "-c", code], env=env, cwd=cwd, stdout=log, stderr=subprocess.STDOUT,
+        start_new_session=True,
+    )
+
+
+def peak_rss_mb(pid):
+    """Peak-RSS eines Prozesses (Linux: VmHWM, sonst psutil wenn installiert)"""
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    try:
+        import psutil
+    except ImportError:
+        return None
+    info = psutil.Process(pid).memory_info()
+    return getattr(info, "peak_wset", info.rss) / 1024 / 1024
+
+
+def replay_symbols(csv_folder, source):
+    """Symbole, für die der Replay-Server Daten hat"""
+    symbols = set()
+    for path in glob.glob(os.path.join(csv_folder, source, "*-1m-*.csv")):
+        symbols.add(os.path.basename(path).split("-1m-")[0])
+    return sorted(symbols)
+
+
+# ---------------------------
+# --- Last ---
+# ---------------------------
+
+def scenario_url(base, scenario, source, symbols, i):
+    """URL für den i-ten Request eines Szenarios (Symbole rotieren)"""
+    one = symbols[i % len(symbols)]
+    if scenario == "live":
+        return f"{base}/api/live?symbols={','.join(symbols)}&source={source}"
+    if scenario == "fetch_candle":
+        return f"{base}/api/fetch_candle?symbol={one}&source={source}"
+    if scenario == "train_mode":
+        return f"{base}/api/train_mode?symbols={','.join(symbols)}&source={source}"
+    return f"{base}/api/csv?symbol={one}&source={source}&period=7d"
+
+
+def run_scenario(base, scenario, source, symbols, concurrency, duration, max_requests=None):
+    """Geschlossene Schleife: concurrency Worker senden Requests bis duration/max_requests erreicht"""
+    latencies, errors = [], [0]
+    counter = [0]
+    lock = threading.Lock()
+    deadline = time.monotonic() + duration
+
+    def worker():
+        session = requests.Session()
+        while time.monotonic() < deadline:
+            with lock:
+                i = counter[0]
+                if max_requests is not None and i >= max_requests:
+                    return
+                counter[0] += 1
+            started = time.perf_counter()
+            try:
+                resp = session.get(scenario_url(base, scenario, source, symbols, i), timeout=120)
+                body = resp.content
+                failed = resp.status_code != 200 or b'"error"' in body
+            except requests.RequestException:
+                failed = True
+            elapsed = time.perf_counter() - started
+            with lock:
+                latencies.append(elapsed)
+                if failed:
+                    errors[0] += 1
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for _ in range(concurrency):
+            pool.submit(worker)
+    wall = time.perf_counter() - started
+
+    ms = np.asarray(latencies) * 1000
+    return {
+        "requests": len(latencies),
+        "errors": errors[0],
+        "rps": len(latencies) / wall if wall else 0.0,
+        "p50_ms": float(np.percentile(ms, 50)) if len(ms) else None,
+        "p95_ms": float(np.percentile(ms, 95)) if len(ms) else None,
+        "p99_ms": float(np.percentile(ms, 99)) if len(ms) else None,
+        "mean_ms": float(ms.mean()) if len(ms) else None,
+        "max_ms": float(ms.max()) if len(ms) else None,
+    }
+
+
+# ---------------------------
+# --- Ausgabe ---
+# ---------------------------
+
+def git_revision():
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=REPO_DIR, stderr=subprocess.DEVNULL, text=True
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_results(results, baseline=None):
+    print(f"{'Szenario':<14}{'Requests':>9}{'Fehler':>8}{'RPS':>9}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for name, r in results["scenarios"].items():
+        line = (f"{name:<14}{r['requests']:>9}{r['errors']:>8}{r['rps']:>9.1f}"
+                f"{r['p50_ms'] or 0:>10.1f}{r['p95_ms'] or 0:>10.1f}{r['p99_ms'] or 0:>10.1f}")
+        old = (baseline or {}).get("scenarios", {}).get(name)
+        if old and old.get("p95_ms") and r["p95_ms"] and old.get("rps"):
+            line += f"   (RPS {r['rps'] / old['rps'] - 1:+.0%}, p95 {r['p95_ms'] / old['p95_ms'] - 1:+.0%})"
+        print(line)
+    print(f"Peak-RSS API: {results['peak_rss_mb']:.1f} MB" if results["peak_rss_mb"] else "Peak-RSS API: n/a")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Lasttest der Candle-API gegen den Replay-Upstream")
+    parser.add_argument("--server", choices=sorted(SERVER_COMMANDS), default="flask")
+    parser.add_argument("--url", help="laufende API statt eigener Prozesse (kein Peak-RSS)")
+    parser.add_argument("--source", choices=["binance", "yahoo"], default="binance")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS))
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--symbols", type=int, default=0, help="Anzahl Symbole (0 = alle aus dem Replay)")
+    parser.add_argument("--duration", type=float, default=10, help="Sekunden pro Szenario")
+    parser.add_argument("--requests", type=int, default=None, help="max. Requests pro Szenario")
+    parser.add_argument("--csv-folder", default=os.path.join(REPO_DIR, "csv"), help="Daten des Replay-Servers")
+    parser.add_argument("--latency-ms", type=float, default=20, help="Replay-Latenz")
+    parser.add_argument("--jitter-ms", type=float, default=5)
+    parser.add_argument("--error-rate", type=float, default=0)
+    parser.add_argument("--cache", action="store_true", help="Candle-Cache der API aktivieren")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--out", default=None, help="JSON-Datei (Standard: benchmarks/<zeit>-<server>.json)")
+    parser.add_argument("--compare", default=None, help="früheres Ergebnis zum Vergleich")
+    args = parser.parse_args()
+
+    symbols = replay_symbols(args.csv_folder, args.source)
+    if not symbols:
+        parser.error(f"Keine CSVs in {args.csv_folder}/{args.source}")
+    if args.symbols:
+        symbols = (symbols * args.symbols)[:args.symbols]
+
+    processes = []
+    workdir = tempfile.mkdtemp(prefix="candle-bench-")  # csv/ + Cache der API landen hier
+    try:
+        if args.url:
+            base, api = args.url.rstrip("/"), None
+        else:
+            replay_port, api_port = free_port(), free_port()
+            env = dict(os.environ, PYTHONPATH=API_DIR, REPLAY_CSV_FOLDER=args.csv_folder, REPLAY_PORT=str(replay_port),
+                       REPLAY_LATENCY_MS=str(args.latency_ms), REPLAY_JITTER_MS=str(args.jitter_ms),
+                       REPLAY_ERROR_RATE=str(args.error_rate), REPLAY_SEED=str(args.seed))
+            processes.append(start_process(
+                f"import runpy; runpy.run_path({os.path.join(API_DIR, 'replay_upstream.py')!r}, run_name='__main__')",
+                env, workdir, os.path.join(workdir, "replay.log"),
+            ))
+            wait_for_port(replay_port)
+            env.update(REPLAY_URL=f"http://127.0.0.1:{replay_port}", CANDLE_CACHE="1" if args.cache else "0",
+                       LOG_FORMAT="plain", LIVE_STREAM="0")
+            api = start_process(SERVER_COMMANDS[args.server].format(port=api_port), env, workdir,
+                                os.path.join(workdir, "api.log"))
+            processes.append(api)
+            wait_for_port(api_port)
+            base = f"http://127.0.0.1:{api_port}"
+
+        results = {
+            "meta": {
+                "timestamp": datetime.datetime.now().isoformat(timespec="seconds"),
+                "git": git_revision(),
+                "server": "external" if args.url else args.server,
+                "source": args.source,
+                "symbols": symbols,
+                "concurrency": args.concurrency,
+                "duration": args.duration,
+                "max_requests": args.requests,
+                "cache": args.cache,
+                "replay": {"latency_ms": args.latency_ms, "jitter_ms": args.jitter_ms,
+                           "error_rate": args.error_rate, "seed": args.seed},
+            },
+            "scenarios": {},
+        }
+        for scenario in args.scenarios.split(","):
+            if scenario not in SCENARIOS:
+                parser.error(f"Unbekanntes Szenario: {scenario} (erlaubt: {', '.join(SCENARIOS)})")
+            requests.get(scenario_url(base, scenario, args.source, symbols, 0), timeout=120)  # Warmup
+            results["scenarios"][scenario] = run_scenario(
+                base, scenario, args.source, symbols, args.concurrency, args.duration, args.requests
+            )
+        results["peak_rss_mb"] = peak_rss_mb(api.pid) if api is not None else None
+    finally:
+        for process in processes:
+            process.terminate()
+        for process in processes:
+            try:
+                process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                process.kill()
+
+    out = args.out or os.path.join(
+        "benchmarks", f"{datetime.datetime.now().strftime('%Y-%m-%d_%H-%M-%S')}-{results['meta']['server']}.json"
+    )
+    os.makedirs(os.path.dirname(out) or ".", exist_ok=True)
+    with open(out, "w") as f:
+        json.dump(results, f, indent=2)
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+    print_results(results, baseline)
+    print(f"Ergebnis: {out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,256 @@
+# candle_cache.py
+import os
+import glob
+import json
+import threading
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+
+from chunk_planner import interval_ms
+from candles import OHLCV_COLUMNS
+from market_calendar import has_exchange_calendar, trading_sessions
+
+
+def to_ms(ts):
+    """Timestamp -> Epoch-Millisekunden (naive = UTC)"""
+    return int(pd.Timestamp(ts).timestamp() * 1000)
+
+
+def merge_ranges(ranges):
+    """Überlappende/angrenzende [start, end) Bereiche zusammenfassen"""
+    merged = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+    return merged
+
+
+def missing_ranges(covered, start, end):
+    """Lücken in [start, end), die von covered (sortiert, gemerged) nicht abgedeckt sind"""
+    gaps = []
+    current = start
+    for a, b in covered:
+        if b <= current:
+            continue
+        if a >= end:
+            break
+        if a > current:
+            gaps.append((current, a))
+        current = max(current, b)
+    if current < end:
+        gaps.append((current, end))
+    return gaps
+
+
+def covered_runs(index, interval, calendar=False):
+    """
+    [start_ms, end_ms) der lückenlosen Abschnitte eines sortierten DatetimeIndex.
+    Getrennt wird, wo zwischen zwei Zeilen mehr als ein Intervall fehlt (1,5x wegen Monaten variabler Länge);
+    calendar=True (Yahoo-Aktien): nur Lücken, die in offene Handelszeiten fallen.
+    """
+    if not len(index):
+        return []
+    ms = index.as_unit("ms").asi8
+    step = interval_ms(interval)
+    breaks = np.flatnonzero(np.diff(ms) > step * 1.5)
+    if calendar and len(breaks):
+        sessions = trading_sessions(index[0], index[-1])
+        opens = np.array([to_ms(o) for o, _ in sessions], dtype=np.int64)
+        closes = np.array([to_ms(c) for _, c in sessions], dtype=np.int64)
+        hole_start, hole_end = ms[breaks] + step, ms[breaks + 1]
+        # erste Session, die nach hole_start schließt, muss vor hole_end öffnen
+        i = closes.searchsorted(hole_start, side="right")
+        inside = i < len(opens)
+        inside[inside] = opens[i[inside]] < hole_end[inside]
+        breaks = breaks[inside]
+    starts = np.concatenate((ms[:1], ms[breaks + 1]))
+    ends = np.concatenate((ms[breaks], ms[-1:])) + step
+    return [[int(a), int(b)] for a, b in zip(starts, ends)]
+
+
+def yahoo_tz(symbol):
+    """Zeitzone für Yahoo-Symbole (Krypto UTC, sonst New York)"""
+    return "UTC" if "-" in symbol else "America/New_York"
+
+
+class CandleCache:
+    """
+    Lokaler OHLCV-Cache pro (source, symbol, interval).
+    Speichert Rohdaten (Pickle) + abgedeckte Zeitbereiche (JSON).
+    Die offene (letzte) Candle gilt nie als abgedeckt und wird immer neu geholt (ohne Schreiben auf die Platte).
+    Im Speicher bleiben max_series Reihen (LRU), ältere werden bei Bedarf neu von der Platte gelesen.
+    """
+
+    def __init__(self, folder, csv_folder=None, max_series=32):
+        self.folder = folder
+        self.csv_folder = csv_folder
+        self.max_series = max_series
+        self.frames = OrderedDict()  # key -> DataFrame (LRU)
+        self.ranges = {}             # key -> [[start_ms, end_ms], ...]
+        self.lru_lock = threading.Lock()
+        self.locks = {}
+        self.locks_lock = threading.Lock()
+
+    def _lock(self, key):
+        with self.locks_lock:
+            return self.locks.setdefault(key, threading.Lock())
+
+    def _paths(self, key):
+        source, symbol, interval = key
+        base = os.path.join(self.folder, source, f"{symbol}-{interval}")
+        return base + ".pkl", base + ".json"
+
+    # --- Laden / Speichern ---
+    def _load(self, key):
+        """(frame, ranges) einer Reihe; Aufrufer hält self._lock(key)"""
+        with self.lru_lock:
+            if key in self.frames:
+                self.frames.move_to_end(key)
+                return self.frames[key], self.ranges[key]
+        data_path, meta_path = self._paths(key)
+        if os.path.exists(data_path) and os.path.exists(meta_path):
+            frame = pd.read_pickle(data_path)
+            with open(meta_path) as f:
+                ranges = json.load(f)["ranges"]
+        else:
+            frame, ranges = self._seed_from_csv(key)
+        self._remember(key, frame, ranges)
+        return frame, ranges
+
+    def _remember(self, key, frame, ranges):
+        with self.lru_lock:
+            self.frames[key] = frame
+            self.ranges[key] = ranges
+            self.frames.move_to_end(key)
+            while len(self.frames) > self.max_series:
+                old, _ = self.frames.popitem(last=False)
+                self.ranges.pop(old, None)
+
+    def _save(self, key, frame, ranges):
+        data_path, meta_path = self._paths(key)
+        os.makedirs(os.path.dirname(data_path), exist_ok=True)
+        frame.to_pickle(data_path)
+        with open(meta_path, "w") as f:
+            json.dump({"ranges": ranges}, f)
+        self._remember(key, frame, ranges)
+
+    def _seed_from_csv(self, key):
+        """Vorhandene CSV-Exporte (save_to_csv) als Startbestand übernehmen"""
+        source, symbol, interval = key
+        frames, ranges = [], []
+        if self.csv_folder:
+            pattern = os.path.join(self.csv_folder, source, f"{symbol}-{interval}-*.csv")
+            for path in sorted(glob.glob(pattern)):
+                try:
+                    df = read_candle_csv(path, source, symbol)
+                except (ValueError, KeyError):
+                    continue
+                if df.empty:
+                    continue
+                frames.append(df)
+                # nur lückenlose Abschnitte gelten als abgedeckt (Löcher im Export werden nachgeladen)
+                ranges.extend(covered_runs(df.index, interval, source == "yahoo" and has_exchange_calendar(symbol)))
+        if not frames:
+            return pd.DataFrame(columns=OHLCV_COLUMNS, dtype=float), []
+        return combine_frames(frames), merge_ranges(ranges)
+
+    # --- Abfrage ---
+    def iter_range(self, source, symbol, interval, start, end, fetch_missing, batch_size=None):
+        """
+        OHLCV für [start, end) als Frames in Zeitreihenfolge (je max. batch_size Zeilen, None = unbegrenzt).
+        Gecachte Abschnitte gehen raus, bevor die nächste Lücke geholt wird; nur Lücken + offene Candle nachladen.
+        fetch_missing(gap_start, gap_end) -> Iterable von OHLCV-Frames (wird lazy durchlaufen)
+        """
+        key = (source, symbol, interval)
+        step = interval_ms(interval)
+        start_ms, end_ms = to_ms(start) // step * step, to_ms(end)
+        # Offene Candle beginnt hier, alles davor ist abgeschlossen
+        open_candle_ms = end_ms // step * step
+
+        # Lock nur für den Schnappschuss: Frames werden nie in-place geändert, Nachladen läuft ohne Lock
+        # (zwei gleichzeitige kalte Anfragen holen dieselbe Lücke ggf. doppelt, combine_frames ist idempotent)
+        with self._lock(key):
+            frame, ranges = self._load(key)
+        index_ms = frame.index.as_unit("ms").asi8 if len(frame) else np.empty(0, dtype=np.int64)
+        gaps = missing_ranges(ranges, start_ms, end_ms)
+
+        new_frames, new_ranges = [], []
+        cursor = start_ms
+        for gap_start, gap_end in gaps:
+            yield from frame_slices(frame, index_ms, cursor, gap_start, batch_size)
+            last_ms = gap_start - 1
+            for f in fetch_missing(ms_to_ts(gap_start, start), ms_to_ts(gap_end, start)):
+                if f is None or f.empty:
+                    continue
+                new_frames.append(f)
+                f = combine_frames([f])
+                f_ms = f.index.as_unit("ms").asi8
+                # nur der Teil in der Lücke, nach bereits gelieferten Zeilen
+                yield from frame_slices(f, f_ms, last_ms + 1, gap_end, batch_size)
+                last_ms = max(last_ms, int(f_ms[-1]))
+            if gap_start < min(gap_end, open_candle_ms):
+                new_ranges.append([gap_start, min(gap_end, open_candle_ms)])
+            cursor = gap_end
+        yield from frame_slices(frame, index_ms, cursor, end_ms, batch_size)
+
+        # Bereiche und Frames erst übernehmen, wenn alle Lücken geholt sind
+        # (schlägt eine fehl oder bricht der Client ab, bleibt der Cache unverändert: keine Abdeckung ohne Daten).
+        # Nur die offene Candle gefehlt -> nichts zusammenführen/speichern
+        if new_ranges:
+            with self._lock(key):
+                frame, ranges = self._load(key)
+                self._save(key, combine_frames([frame] + new_frames), merge_ranges(ranges + new_ranges))
+
+    def get_range(self, source, symbol, interval, start, end, fetch_missing):
+        """Wie iter_range, aber als ein Frame"""
+        frames = list(self.iter_range(source, symbol, interval, start, end, fetch_missing))
+        if not frames:
+            return pd.DataFrame(columns=OHLCV_COLUMNS, dtype=float)
+        return frames[0] if len(frames) == 1 else pd.concat(frames)
+
+
+def frame_slices(frame, index_ms, start_ms, end_ms, batch_size=None):
+    """Zeilen von frame in [start_ms, end_ms) in Stücken von max. batch_size Zeilen (Views, keine Kopien)"""
+    lo, hi = index_ms.searchsorted(start_ms), index_ms.searchsorted(end_ms)
+    step = batch_size or max(hi - lo, 1)
+    for i in range(lo, hi, step):
+        yield frame.iloc[i:min(i + step, hi)]
+
+
+def ms_to_ts(ms, like):
+    """Epoch-ms -> Timestamp mit derselben Zeitzone wie like"""
+    ts = pd.Timestamp(ms, unit="ms")
+    if pd.Timestamp(like).tzinfo is not None:
+        ts = ts.tz_localize("UTC").tz_convert(pd.Timestamp(like).tzinfo)
+    return ts
+
+
+def combine_frames(frames):
+    """Frames zusammenführen, neuere Zeilen gewinnen bei gleichem Zeitstempel"""
+    frames = [f for f in frames if not f.empty]
+    if not frames:
+        return pd.DataFrame(columns=OHLCV_COLUMNS, dtype=float)
+    df = pd.concat(frames)
+    df = df[~df.index.duplicated(keep="last")]
+    return df.sort_index(kind="stable")
+
+
+def read_candle_csv(path, source, symbol):
+    """CSV-Export (save_to_csv) als OHLCV-Frame mit DatetimeIndex lesen"""
+    df = pd.read_csv(path)
+    df.columns = [c.lower() for c in df.columns]
+    df = df.dropna(subset=["timestamp"])
+    if df["timestamp"].astype(str).str.contains(r"[+-]\d{2}:\d{2}$").any():
+        # Yahoo-Rohexport mit UTC-Offset
+        index = pd.to_datetime(df["timestamp"], utc=True).dt.tz_convert(yahoo_tz(symbol))
+    else:
+        index = pd.to_datetime(df["timestamp"])
+        if source == "yahoo":
+            index = index.dt.tz_localize(yahoo_tz(symbol), ambiguous="NaT", nonexistent="NaT")
+    df = df.set_index(pd.DatetimeIndex(index))[OHLCV_COLUMNS].astype(float)
+    df = df[df.index.notna()]
+    df = df[~df.index.duplicated(keep="last")]
+    return df.sort_index(kind="stable")
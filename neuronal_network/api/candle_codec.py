@@ -0,0 +1,175 @@
+# candle_codec.py
+# Kompaktes Spaltenformat für Candle-Reihen (angelehnt an Gorilla / Facebook TSDB):
+#   ts          Delta-of-Delta (regelmäßige Intervalle -> fast nur Nullen)
+#   Preise/Vol  Dezimal-Skalierung + Delta (Binance: 2-8 Nachkommastellen), Delta der float32-Bitmuster
+#               (Yahoo) oder XOR mit dem Vorgänger (wie Gorilla) - je Spalte der kleinste verlustfreie
+#   prev_close  XOR mit dem close der Vorzeile (meist identisch -> 0)
+# Statt Bit-Packing: kleinster passender Integer-Typ + Byte-Shuffle + zlib, damit das Dekodieren
+# komplett vektorisiert bleibt (cumsum / bitwise_xor.accumulate).
+import json
+import zlib
+import struct
+import numpy as np
+
+MAGIC = b"GCS1"
+MAX_DECIMALS = 8
+ZLIB_LEVEL = 6
+INT_TYPES = (np.int8, np.int16, np.int32, np.int64)
+
+
+# ---------------------------
+# --- Bytes ---
+# ---------------------------
+
+def _pack(values):
+    """Integer-Array -> Byte-Shuffle (Byte-Ebenen hintereinander) + zlib"""
+    width = values.dtype.itemsize
+    planes = values.view(np.uint8).reshape(-1, width).T
+    return zlib.compress(np.ascontiguousarray(planes).tobytes(), ZLIB_LEVEL)
+
+
+def _unpack(blob, dtype, rows):
+    dtype = np.dtype(dtype)
+    planes = np.frombuffer(zlib.decompress(blob), dtype=np.uint8).reshape(dtype.itemsize, rows)
+    return np.ascontiguousarray(planes.T).view(dtype).reshape(rows)
+
+
+def _narrow(values):
+    """Kleinster Integer-Typ, in den alle Werte passen"""
+    if not len(values):
+        return values.astype(np.int8)
+    lo, hi = int(values.min()), int(values.max())
+    for dtype in INT_TYPES:
+        info = np.iinfo(dtype)
+        if info.min <= lo and hi <= info.max:
+            return values.astype(dtype)
+    return values
+
+
+# ---------------------------
+# --- Spalten-Codecs ---
+# ---------------------------
+
+def _delta_of_delta(ts):
+    """ts -> (Delta-of-Delta, erster Wert); erste Zeile hat Delta 0"""
+    delta = np.diff(ts, prepend=ts[:1])
+    return np.diff(delta, prepend=0), int(ts[0]) if len(ts) else 0
+
+
+def _decimals(values):
+    """Nachkommastellen, mit denen values exakt als Integer darstellbar ist (None = keine)"""
+    if not np.isfinite(values).all():
+        return None
+    for decimals in range(MAX_DECIMALS + 1):
+        scale = 10.0 ** decimals
+        ints = np.round(values * scale)
+        if np.abs(ints).max(initial=0) >= 2**53:
+            return None
+        if np.array_equal(ints / scale, values):
+            return decimals
+    return None
+
+
+def encode_column(values, reference=None):
+    """float/int Spalte -> (Meta, Blob). reference: Spalte, gegen die per XOR kodiert wird (prev_close)"""
+    rows = len(values)
+    if values.dtype.kind in "iu":
+        dod, first = _delta_of_delta(values.astype(np.int64))
+        packed = _narrow(dod)
+        return {"codec": "dod", "dtype": packed.dtype.str, "first": first}, _pack(packed)
+
+    values = np.ascontiguousarray(values, dtype=np.float64)
+    if reference is not None:
+        ref = np.concatenate(([0.0], np.asarray(reference, dtype=np.float64)[:-1]))
+        bits = values.view(np.uint64) ^ ref.view(np.uint64)
+        return {"codec": "xor_ref", "dtype": "<u8"}, _pack(bits)
+
+    # Kandidaten kodieren, der kleinste gewinnt (Kodieren passiert nur beim Schreiben)
+    bits = values.view(np.uint64)
+    xor = bits ^ np.concatenate(([np.uint64(0)], bits[:-1]))
+    candidates = [({"codec": "xor", "dtype": "<u8"}, _pack(xor))]
+
+    decimals = _decimals(values) if rows else None
+    if decimals is not None:
+        ints = np.round(values * 10.0 ** decimals).astype(np.int64)
+        packed = _narrow(np.diff(ints, prepend=0))
+        candidates.append(({"codec": "delta", "dtype": packed.dtype.str, "decimals": decimals}, _pack(packed)))
+
+    single = values.astype(np.float32)
+    if np.array_equal(single.astype(np.float64), values, equal_nan=True):
+        # float32-Werte (Yahoo): Delta der Bitmuster = Abstand in ULPs, bei kleinen Kursänderungen klein
+        ints = single.view(np.int32).astype(np.int64)
+        packed = _narrow(np.diff(ints, prepend=0))
+        candidates.append(({"codec": "f32_delta", "dtype": packed.dtype.str}, _pack(packed)))
+
+    return min(candidates, key=lambda c: len(c[1]))
+
+
+def decode_column(meta, blob, rows, reference=None):
+    raw = _unpack(blob, meta["dtype"], rows)
+    codec = meta["codec"]
+    if codec == "dod":
+        return meta["first"] + np.cumsum(np.cumsum(raw, dtype=np.int64))
+    if codec == "delta":
+        return np.cumsum(raw, dtype=np.int64) / 10.0 ** meta["decimals"]
+    if codec == "f32_delta":
+        return np.cumsum(raw, dtype=np.int64).astype(np.int32).view(np.float32).astype(np.float64)
+    if codec == "xor":
+        return np.bitwise_xor.accumulate(raw).view(np.float64)
+    if codec == "xor_ref":
+        ref = np.concatenate(([0.0], np.asarray(reference, dtype=np.float64)[:-1]))
+        return (raw ^ ref.view(np.uint64)).view(np.float64)
+    raise ValueError(f"Unbekannter Codec: {codec}")
+
+
+# ---------------------------
+# --- Container ---
+# ---------------------------
+
+def encode_records(rows, references=None):
+    """
+    Strukturiertes Array (z.B. candle_store.STORE_DTYPE) -> Bytes.
+    references: {spalte: referenzspalte}, Standard prev_close -> close
+    """
+    references = {"prev_close": "close"} if references is None else references
+    columns, blobs = [], []
+    for i, name in enumerate(rows.dtype.names):
+        ref = references.get(name)
+        if ref not in rows.dtype.names[:i]:  # Referenz muss beim Dekodieren schon vorliegen
+            ref = None
+        meta, blob = encode_column(rows[name], rows[ref] if ref else None)
+        meta.update(name=name, type=rows.dtype[name].str, size=len(blob))
+        if ref:
+            meta["reference"] = ref
+        columns.append(meta)
+        blobs.append(blob)
+    header = json.dumps({"rows": len(rows), "columns": columns}).encode()
+    return b"".join([MAGIC, struct.pack("<I", len(header)), header, *blobs])
+
+
+def decode_records(data):
+    """Bytes -> strukturiertes Array (gleiche Spalten/Typen wie beim Kodieren)"""
+    if data[:4] != MAGIC:
+        raise ValueError("Kein Candle-Codec-Format")
+    (header_len,) = struct.unpack_from("<I", data, 4)
+    header = json.loads(data[8:8 + header_len])
+    rows = header["rows"]
+    dtype = np.dtype([(c["name"], c["type"]) for c in header["columns"]])
+    out = np.empty(rows, dtype=dtype)
+    offset = 8 + header_len
+    for meta in header["columns"]:
+        blob = data[offset:offset + meta["size"]]
+        offset += meta["size"]
+        ref = out[meta["reference"]] if "reference" in meta else None
+        out[meta["name"]] = decode_column(meta, blob, rows, ref)
+    return out
+
+
+def save_records(path, rows):
+    with open(path, "wb") as f:
+        f.write(encode_records(rows))
+
+
+def load_records(path):
+    with open(path, "rb") as f:
+        return decode_records(f.read())
@@ -0,0 +1,254 @@
+# candle_store.py
+import os
+import glob
+import datetime
+import tempfile
+import threading
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+
+from candles import CandleBatch, save_to_csv
+from candle_codec import load_records, encode_records
+
+# Eine Zeile pro Candle (wie CandleBatch.COLUMNS), 56 Byte
+STORE_DTYPE = np.dtype([
+    ("ts", "<i8"), ("open", "<f8"), ("high", "<f8"), ("low", "<f8"),
+    ("close", "<f8"), ("volume", "<f8"), ("prev_close", "<f8"),
+])
+DAY_SECONDS = 86_400
+# Dateiformate der Tagesdateien: npy = unkomprimiert (memmap-fähig), gcs = candle_codec (~8-12x kleiner als CSV)
+STORE_FORMATS = {"npy": ".npy", "gcs": ".gcs"}
+
+
+def to_records(batch):
+    """CandleBatch -> strukturiertes Array (STORE_DTYPE)"""
+    rows = np.empty(len(batch), dtype=STORE_DTYPE)
+    for col in CandleBatch.COLUMNS:
+        rows[col] = getattr(batch, col)
+    return rows
+
+
+def merge_records(old, new):
+    """Nach ts sortiert zusammenführen, bei gleichem ts gewinnt new"""
+    rows = np.concatenate([old, new])
+    rows = rows[np.argsort(rows["ts"], kind="stable")]
+    keep = np.ones(len(rows), dtype=bool)
+    keep[:-1] = rows["ts"][1:] != rows["ts"][:-1]
+    return rows[keep]
+
+
+def day_name(day):
+    return (datetime.date(1970, 1, 1) + datetime.timedelta(days=int(day))).isoformat()
+
+
+def load_day(path):
+    return load_records(path) if path.endswith(".gcs") else np.load(path)
+
+
+def save_day(path, rows):
+    """Tagesdatei atomar ersetzen (eindeutige tmp-Datei im selben Ordner + os.replace)"""
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), prefix=os.path.basename(path) + ".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            if path.endswith(".gcs"):
+                f.write(encode_records(rows))
+            else:
+                np.save(f, rows)
+        os.chmod(tmp, 0o644)  # mkstemp legt 0600 an
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+
+class TimestampIndex:
+    """
+    Sortierte Reihe eines (source, symbol, interval) im Speicher.
+    range() sucht die Grenzen per Binärsuche (O(log n)) und liefert Views ohne Kopie.
+    """
+
+    def __init__(self, batch):
+        self.batch = batch
+
+    def __len__(self):
+        return len(self.batch)
+
+    def bounds(self, start=None, end=None):
+        """Positionen (lo, hi) für start <= ts < end"""
+        ts = self.batch.ts
+        lo = 0 if start is None else int(ts.searchsorted(start))
+        hi = len(ts) if end is None else int(ts.searchsorted(end))
+        return lo, max(lo, hi)
+
+    def range(self, start=None, end=None, limit=None):
+        """CandleBatch-View für start <= ts < end (limit = höchstens die ersten limit Candles)"""
+        lo, hi = self.bounds(start, end)
+        if limit is not None:
+            hi = min(hi, lo + limit)
+        return self.batch[lo:hi]
+
+
+def parse_time(value, tz="UTC"):
+    """
+    Zeitgrenze für Range-Abfragen -> Sekunden Wanduhrzeit (wie im Store).
+    Epoch-Sekunden/-Millisekunden oder ISO-Datum; mit Zeitzone wird in tz umgerechnet.
+    """
+    if value is None or value == "":
+        return None
+    if value.lstrip("-").isdigit():
+        seconds = int(value)
+        seconds = seconds // 1000 if abs(seconds) >= 10**11 else seconds
+        ts = pd.Timestamp(seconds, unit="s", tz="UTC")
+    else:
+        ts = pd.Timestamp(value)
+    if ts.tzinfo is not None:
+        ts = ts.tz_convert(tz).tz_localize(None)
+    return int(ts.value // 10**9)
+
+
+class CandleStore:
+    """
+    Spaltenweiser Candle-Speicher statt CSV-Snapshots:
+    {folder}/{source}/{symbol}/{interval}/{YYYY-MM-DD}.npy|.gcs (ein Tag pro Datei, Wanduhrzeit wie im CSV).
+    append() führt pro Tag zusammen (neuere Werte gewinnen), read() lädt nur die Tage im Bereich.
+    fmt bestimmt das Format neuer Tagesdateien, gelesen werden beide.
+    """
+
+    def __init__(self, folder, max_indexes=32, fmt="npy"):
+        if fmt not in STORE_FORMATS:
+            raise ValueError(f"Unbekanntes Store-Format: {fmt} (erlaubt: {', '.join(STORE_FORMATS)})")
+        self.folder = folder
+        self.ext = STORE_FORMATS[fmt]
+        self.max_indexes = max_indexes
+        self.indexes = OrderedDict()  # (source, symbol, interval) -> (Ordner-mtime, TimestampIndex)
+        self.lock = threading.Lock()
+        self.series_locks = {}        # (source, symbol, interval) -> Lock für Laden/Zusammenführen/Ersetzen
+        self.series_locks_lock = threading.Lock()
+
+    def _lock(self, key):
+        with self.series_locks_lock:
+            return self.series_locks.setdefault(key, threading.Lock())
+
+    def series_dir(self, source, symbol, interval):
+        return os.path.join(self.folder, source, symbol, interval)
+
+    def day_files(self, source, symbol, interval):
+        """{Tag seit 1970: Pfad} (bei beiden Formaten für einen Tag gewinnt fmt)"""
+        files = {}
+        for path in glob.glob(os.path.join(self.series_dir(source, symbol, interval), "*.*")):
+            name, ext = os.path.splitext(os.path.basename(path))
+            if ext not in STORE_FORMATS.values():
+                continue
+            try:
+                day = (datetime.date.fromisoformat(name) - datetime.date(1970, 1, 1)).days
+            except ValueError:
+                continue
+            if day not in files or ext == self.ext:
+                files[day] = path
+        return files
+
+    def days(self, source, symbol, interval):
+        """Vorhandene Tage (Tage seit 1970, aufsteigend)"""
+        return sorted(self.day_files(source, symbol, interval))
+
+    # --- Schreiben ---
+    def append(self, source, symbol, interval, batch):
+        """CandleBatch (oder STORE_DTYPE-Array) anhängen, betroffene Tagesdateien atomar ersetzen"""
+        rows = batch if isinstance(batch, np.ndarray) else to_records(batch)
+        if not len(rows):
+            return 0
+        rows = rows[np.argsort(rows["ts"], kind="stable")]
+        folder = self.series_dir(source, symbol, interval)
+        os.makedirs(folder, exist_ok=True)
+
+        days = rows["ts"] // DAY_SECONDS
+        bounds = np.flatnonzero(np.diff(days)) + 1
+        # Gleichzeitige Appends derselben Reihe würden sonst gegenseitig ihre Merges überschreiben
+        with self._lock((source, symbol, interval)):
+            files = self.day_files(source, symbol, interval)
+            for part in np.split(rows, bounds):
+                day = int(part["ts"][0] // DAY_SECONDS)
+                path = os.path.join(folder, f"{day_name(day)}{self.ext}")
+                old = files.get(day)
+                part = merge_records(load_day(old) if old else part[:0], part)
+                save_day(path, part)
+                if old and old != path:  # Tag im anderen Format -> ersetzt
+                    os.remove(old)
+        return len(rows)
+
+    # --- Lesen ---
+    def read_records(self, source, symbol, interval, start=None, end=None):
+        """Zeilen mit start <= ts < end (Sekunden Wanduhrzeit, None = offen)"""
+        files = self.day_files(source, symbol, interval)
+        days = sorted(files)
+        if start is not None:
+            days = [d for d in days if d >= start // DAY_SECONDS]
+        if end is not None:
+            days = [d for d in days if d <= (end - 1) // DAY_SECONDS]
+        if not days:
+            return np.empty(0, dtype=STORE_DTYPE)
+
+        rows = np.concatenate([load_day(files[d]) for d in days])
+        lo = 0 if start is None else rows["ts"].searchsorted(start)
+        hi = len(rows) if end is None else rows["ts"].searchsorted(end)
+        return rows[lo:hi]
+
+    def read(self, source, symbol, interval, start=None, end=None):
+        """Wie read_records, als CandleBatch"""
+        rows = self.read_records(source, symbol, interval, start, end)
+        return CandleBatch(symbol, *(rows[col] for col in CandleBatch.COLUMNS))
+
+    def index(self, source, symbol, interval):
+        """
+        TimestampIndex der ganzen Reihe (LRU, max_indexes Reihen im Speicher).
+        Neu geladen, sobald sich der Ordner ändert (append/os.replace, auch aus anderen Prozessen).
+        """
+        key = (source, symbol, interval)
+        try:
+            mtime = os.stat(self.series_dir(*key)).st_mtime_ns
+        except FileNotFoundError:
+            return None
+        with self.lock:
+            cached = self.indexes.get(key)
+            if cached is not None and cached[0] == mtime:
+                self.indexes.move_to_end(key)
+                return cached[1]
+        index = TimestampIndex(self.read(source, symbol, interval))
+        with self.lock:
+            self.indexes[key] = (mtime, index)
+            self.indexes.move_to_end(key)
+            while len(self.indexes) > self.max_indexes:
+                self.indexes.popitem(last=False)
+        return index
+
+    def read_last(self, source, symbol, interval, days):
+        """Die letzten `days` Tage bis zur neuesten gespeicherten Candle"""
+        stored = self.days(source, symbol, interval)
+        if not stored:
+            return CandleBatch.empty(symbol)
+        last = self.read_records(source, symbol, interval, stored[-1] * DAY_SECONDS)["ts"][-1]
+        return self.read(source, symbol, interval, int(last) + 1 - days * DAY_SECONDS, int(last) + 1)
+
+
+def save_batches(batches, store, symbol, source, interval, period="7d", csv_folder="csv", snapshot=True):
+    """
+    CandleBatches in den Store schreiben (store=None: nur CSV),
+    snapshot=True: zusätzlich wie bisher als CSV-Export. Rückgabe (Datei/Ordner, Zeilen).
+    """
+    rows = [0]
+
+    def candles():
+        for batch in batches:
+            rows[0] += len(batch)
+            if store is not None:
+                store.append(source, symbol, interval, batch)
+            if snapshot:
+                yield from batch.to_dicts()
+
+    if snapshot or store is None:
+        return save_to_csv(candles(), symbol, source, interval, period, csv_folder), rows[0]
+    for _ in candles():
+        pass
+    return store.series_dir(source, symbol, interval), rows[0]
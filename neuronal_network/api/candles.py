@@ -0,0 +1,274 @@
+# candles.py
+import os
+import csv
+import datetime
+import calendar
+import numpy as np
+import pandas as pd
+
+CANDLE_FIELDS = ["symbol","prev_close","current_close","color","open","high","low","close","volume","timestamp"]
+OHLCV_COLUMNS = ["open","high","low","close","volume"]
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+_EPOCH = datetime.datetime(1970, 1, 1)
+
+
+# ---------------------------
+# --- Hilfsfunktionen ---
+# ---------------------------
+
+def cast_float(val):
+    """Sicherstellen, dass es ein float ist (keine np.float64 etc.)"""
+    try:
+        return float(val)
+    except:
+        return 0.0
+
+def cast_float_column(col):
+    """cast_float für ganze Spalten (Binance liefert Strings, Yahoo Floats)"""
+    if col.dtype == object and col.isna().any():
+        return col.map(cast_float)
+    try:
+        return col.astype(float)
+    except (TypeError, ValueError):
+        return col.map(cast_float)
+
+def to_ohlcv(df):
+    """Rohdaten -> OHLCV-Frame (float, fehlendes Volume = 0)"""
+    return pd.DataFrame({
+        col: cast_float_column(df[col]) if col in df else 0.0
+        for col in OHLCV_COLUMNS
+    }, index=df.index)
+
+def wallclock_seconds(index):
+    """DatetimeIndex -> int64 Sekunden der lokalen Wanduhrzeit (tz wird weggelassen)"""
+    if index.tz is not None:
+        index = index.tz_localize(None)
+    return index.to_numpy(dtype="datetime64[s]").astype(np.int64)
+
+def format_timestamps(seconds):
+    """Wie strftime("%Y-%m-%d %H:%M:%S"), aber vektorisiert"""
+    values = np.asarray(seconds, dtype=np.int64).astype("datetime64[s]")
+    return np.char.replace(np.datetime_as_string(values, unit="s"), "T", " ")
+
+def format_symbol(symbol, source):
+    """Symbol für Binance/Yahoo anpassen"""
+    if source == "binance":
+        if "USDT" not in symbol:
+            symbol = symbol.replace("-USD","")+"USDT"
+    elif source == "yahoo":
+        symbol = symbol.replace("USDT","-USD")
+    return symbol
+
+
+# ---------------------------
+# --- Candle ---
+# ---------------------------
+
+class Candle:
+    """
+    Kompakte Candle (__slots__). Zeitstempel als int Sekunden (Wanduhrzeit),
+    current_close/color/timestamp werden erst bei Bedarf abgeleitet.
+    to_dict() liefert die bisherige JSON-Form.
+    """
+    __slots__ = ("symbol", "ts", "open", "high", "low", "close", "volume", "prev_close")
+
+    def __init__(self, symbol, ts, open_, high, low, close, volume, prev_close):
+        self.symbol = symbol
+        self.ts = ts
+        self.open = open_
+        self.high = high
+        self.low = low
+        self.close = close
+        self.volume = volume
+        self.prev_close = prev_close
+
+    @property
+    def current_close(self):
+        return self.close
+
+    @property
+    def color(self):
+        return "green" if self.close > self.prev_close else "red"
+
+    @property
+    def timestamp(self):
+        return (_EPOCH + datetime.timedelta(seconds=self.ts)).strftime(TIMESTAMP_FORMAT)
+
+    def get(self, key, default=None):
+        """Dict-kompatibler Zugriff (print_candle, save_to_csv)"""
+        return getattr(self, key) if key in CANDLE_FIELDS else default
+
+    def __getitem__(self, key):
+        if key not in CANDLE_FIELDS:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def to_dict(self):
+        return {key: getattr(self, key) for key in CANDLE_FIELDS}
+
+    def __repr__(self):
+        return f"Candle({self.to_dict()})"
+
+
+def build_candle(open_, high, low, close, volume, symbol, timestamp=None, prev_close=None):
+    """Generische Candle-Erstellung mit Farblogik"""
+    close = cast_float(close)
+    open_ = cast_float(open_)
+    high = cast_float(high)
+    low = cast_float(low)
+    volume = cast_float(volume)
+
+    if prev_close is None:
+        prev_close = open_
+    else:
+        prev_close = cast_float(prev_close)
+
+    if not timestamp:
+        timestamp = datetime.datetime.now()
+    elif isinstance(timestamp, str):
+        timestamp = datetime.datetime.strptime(timestamp, TIMESTAMP_FORMAT)
+    ts = calendar.timegm(timestamp.timetuple())
+
+    return Candle(symbol, ts, open_, high, low, close, volume, prev_close)
+
+
+# ---------------------------
+# --- CandleBatch ---
+# ---------------------------
+
+class CandleBatch:
+    """
+    Spaltenweise Candles eines Symbols (NumPy Arrays, 7 x 8 Byte pro Candle).
+    Slices sind Views, Einzelzugriff liefert Candle, to_dicts() erst bei der Ausgabe.
+    """
+    __slots__ = ("symbol", "ts", "open", "high", "low", "close", "volume", "prev_close")
+    COLUMNS = ("ts", "open", "high", "low", "close", "volume", "prev_close")
+
+    def __init__(self, symbol, ts, open_, high, low, close, volume, prev_close):
+        self.symbol = symbol
+        self.ts = np.asarray(ts, dtype=np.int64)
+        self.open = np.asarray(open_, dtype=np.float64)
+        self.high = np.asarray(high, dtype=np.float64)
+        self.low = np.asarray(low, dtype=np.float64)
+        self.close = np.asarray(close, dtype=np.float64)
+        self.volume = np.asarray(volume, dtype=np.float64)
+        self.prev_close = np.asarray(prev_close, dtype=np.float64)
+
+    @classmethod
+    def empty(cls, symbol):
+        return cls(symbol, *([[]] * len(cls.COLUMNS)))
+
+    @classmethod
+    def from_ohlcv(cls, df, symbol):
+        """
+        Spaltenweise Candle-Erstellung (wie build_candle, aber für ganze Chunks).
+        df: OHLCV mit Kleinbuchstaben-Spalten und DatetimeIndex.
+        Erste Zeile fällt weg, da ihr prev_close fehlt.
+        """
+        ohlcv = to_ohlcv(df)
+        close = ohlcv["close"].to_numpy()
+        prev_close = np.concatenate(([np.nan], close[:-1])) if len(close) else close
+        keep = ~np.isnan(prev_close)
+        return cls(
+            symbol,
+            wallclock_seconds(ohlcv.index)[keep],
+            ohlcv["open"].to_numpy()[keep],
+            ohlcv["high"].to_numpy()[keep],
+            ohlcv["low"].to_numpy()[keep],
+            close[keep],
+            ohlcv["volume"].to_numpy()[keep],
+            prev_close[keep],
+        )
+
+    @classmethod
+    def concat(cls, batches, symbol):
+        batches = list(batches)
+        if not batches:
+            return cls.empty(symbol)
+        return cls(symbol, *(np.concatenate([getattr(b, col) for b in batches]) for col in cls.COLUMNS))
+
+    def sorted(self):
+        """Aufsteigend nach Zeitstempel (stabil, älteste zuerst)"""
+        order = np.argsort(self.ts, kind="stable")
+        return CandleBatch(self.symbol, *(getattr(self, col)[order] for col in self.COLUMNS))
+
+    def __len__(self):
+        return len(self.ts)
+
+    def __getitem__(self, item):
+        if isinstance(item, slice):
+            return CandleBatch(self.symbol, *(getattr(self, col)[item] for col in self.COLUMNS))
+        return Candle(
+            self.symbol, int(self.ts[item]), float(self.open[item]), float(self.high[item]),
+            float(self.low[item]), float(self.close[item]), float(self.volume[item]), float(self.prev_close[item])
+        )
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    @property
+    def current_close(self):
+        return self.close
+
+    @property
+    def color(self):
+        return np.where(self.close > self.prev_close, "green", "red")
+
+    @property
+    def timestamp(self):
+        return format_timestamps(self.ts)
+
+    @property
+    def nbytes(self):
+        return sum(getattr(self, col).nbytes for col in self.COLUMNS)
+
+    def to_dicts(self):
+        """Bisherige JSON-Form: Liste von Dicts"""
+        columns = [
+            [self.symbol] * len(self) if key == "symbol" else getattr(self, key).tolist()
+            for key in CANDLE_FIELDS
+        ]
+        return [dict(zip(CANDLE_FIELDS, row)) for row in zip(*columns)]
+
+    def to_frame(self):
+        """DataFrame mit den Spalten des Binance-CSV-Exports (timestamp als datetime64)"""
+        return pd.DataFrame({
+            "timestamp": self.ts.astype("datetime64[s]").astype("datetime64[ns]"),
+            "symbol": self.symbol,
+            "open": self.open,
+            "high": self.high,
+            "low": self.low,
+            "close": self.close,
+            "prev_close": self.prev_close,
+            "current_close": self.close,
+            "volume": self.volume,
+            "color": self.color,
+        })
+
+
+# ---------------------------
+# --- CSV Export ---
+# ---------------------------
+
+def save_to_csv(candles, symbol, source, interval, period="7d", csv_folder="csv"):
+    """Candles (beliebiges Iterable, auch Generator) nach csv/{source}/ schreiben"""
+    folder = os.path.join(csv_folder, f"{source}")
+    os.makedirs(folder, exist_ok=True)
+    timestamp_str = datetime.datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
+    file_name = f"{symbol}-{interval}-{period}-{source}-{timestamp_str}.csv"
+    file_path = os.path.join(folder, file_name)
+
+    if source == "binance":
+        header = ["timestamp","symbol","open","high","low","close","prev_close","current_close","volume","color"]
+    else:  # Yahoo
+        header = ["timestamp","symbol","open","high","low","close","volume","color"]
+
+    with open(file_path,"w",newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=header)
+        writer.writeheader()
+        for candle in candles:
+            row = {key: candle.get(key, "") for key in header}
+            writer.writerow(row)
+    return file_path
@@ -0,0 +1,152 @@
+# chunk_planner.py
+import re
+import pandas as pd
+
+from market_calendar import has_exchange_calendar, trading_sessions
+
+YAHOO_1M_CHUNK_DAYS = 7     # Yahoo 1m Limit pro Request
+# Yahoo Intraday: ältere Daten liefert Yahoo nicht (Tage Rückblick pro Intervall)
+YAHOO_LOOKBACK_DAYS = {"1m": 30, "2m": 60, "5m": 60, "15m": 60, "30m": 60, "90m": 60, "60m": 730, "1h": 730}
+YAHOO_LOOKBACK_MARGIN = pd.Timedelta(hours=1)
+BINANCE_PAGE_LIMIT = 1000   # max. Klines pro Binance-Request
+
+INTERVAL_UNITS_MS = {
+    "s": 1_000,
+    "m": 60_000,
+    "h": 3_600_000,
+    "d": 86_400_000,
+    "w": 604_800_000,
+    "wk": 604_800_000,      # Yahoo
+    "mo": 2_592_000_000,    # Yahoo, ca. 30 Tage
+    "M": 2_592_000_000,     # Binance, ca. 30 Tage
+}
+
+
+# Alle Binance Kline-Intervalle (ms); 1M = Kalendermonat (variable Länge)
+BINANCE_INTERVALS_MS = {
+    "1s": 1_000,
+    "1m": 60_000, "3m": 180_000, "5m": 300_000, "15m": 900_000, "30m": 1_800_000,
+    "1h": 3_600_000, "2h": 7_200_000, "4h": 14_400_000, "6h": 21_600_000, "8h": 28_800_000, "12h": 43_200_000,
+    "1d": 86_400_000, "3d": 259_200_000,
+    "1w": 604_800_000,
+    "1M": None,
+}
+# Binance-Wochen beginnen Montag 00:00 UTC, der 01.01.1970 war ein Donnerstag
+BINANCE_WEEK_OFFSET_MS = 4 * 86_400_000
+
+
+def parse_period(period):
+    """Periode ("7d", "6mo", "1y") in Tage umrechnen"""
+    if period.endswith("d"):
+        return int(period[:-1])
+    elif period.endswith("mo"):
+        return int(period[:-2]) * 30
+    elif period.endswith("y"):
+        return int(period[:-1]) * 365
+    return 7
+
+
+def interval_ms(interval):
+    """Intervall ("1m", "5m", "1h", "1d", "1wk") in Millisekunden"""
+    match = re.fullmatch(r"(\d+)(mo|wk|[smhdwM])", interval)
+    if not match:
+        raise ValueError(f"Unbekanntes Intervall: {interval}")
+    return int(match.group(1)) * INTERVAL_UNITS_MS[match.group(2)]
+
+
+def binance_align(interval, ts_ms):
+    """Auf den Beginn der Binance-Kline abrunden, in der ts_ms liegt"""
+    if interval not in BINANCE_INTERVALS_MS:
+        raise ValueError(f"Unbekanntes Binance-Intervall: {interval} (erlaubt: {', '.join(BINANCE_INTERVALS_MS)})")
+    if interval == "1M":
+        return int(pd.Timestamp(ts_ms, unit="ms").to_period("M").start_time.value // 1_000_000)
+    step = BINANCE_INTERVALS_MS[interval]
+    offset = BINANCE_WEEK_OFFSET_MS if interval == "1w" else 0
+    return (ts_ms - offset) // step * step + offset
+
+
+def binance_open_times(interval, start_ms, end_ms):
+    """Öffnungszeiten aller Klines in [start_ms, end_ms) – nur für 1M nötig (variable Länge)"""
+    months = pd.date_range(pd.Timestamp(binance_align(interval, start_ms), unit="ms"),
+                           pd.Timestamp(end_ms - 1, unit="ms"), freq="MS")
+    return [int(m.value // 1_000_000) for m in months]
+
+
+def binance_kline_count(interval, start_ms, end_ms):
+    """Exakte Anzahl Klines, die [start_ms, end_ms) berühren"""
+    if start_ms >= end_ms:
+        return 0
+    if interval == "1M":
+        return len(binance_open_times(interval, start_ms, end_ms))
+    step = BINANCE_INTERVALS_MS[interval]
+    first = binance_align(interval, start_ms)
+    return (end_ms - first + step - 1) // step
+
+
+def binance_page_count(interval, start_ms, end_ms):
+    """Anzahl nötiger Requests mit je 1000 Klines"""
+    return -(-binance_kline_count(interval, start_ms, end_ms) // BINANCE_PAGE_LIMIT)
+
+
+def plan_binance_pages(interval, start_ms, end_ms):
+    """
+    Seiten (start_ms, end_ms) mit je genau 1000 Klines (letzte ggf. weniger),
+    am Kline-Raster ausgerichtet -> keine Überlappung, keine Lücke.
+    """
+    if start_ms >= end_ms:
+        return []
+    if interval == "1M":
+        opens = binance_open_times(interval, start_ms, end_ms)
+        starts = opens[::BINANCE_PAGE_LIMIT]
+        return [(s, starts[i + 1] if i + 1 < len(starts) else end_ms) for i, s in enumerate(starts)]
+
+    first = binance_align(interval, start_ms)
+    page_ms = BINANCE_PAGE_LIMIT * BINANCE_INTERVALS_MS[interval]
+    return [
+        (first + i * page_ms, min(first + (i + 1) * page_ms, end_ms))
+        for i in range(binance_page_count(interval, start_ms, end_ms))
+    ]
+
+
+def plan_yahoo_windows(interval, start, end, symbol=None):
+    """
+    Yahoo-Fenster: nur innerhalb des Rückblick-Limits, max. 7 Tage pro Request bei 1m.
+    Aktien: nur offene Handelszeiten, Sessions so dicht wie möglich pro Request gepackt.
+    Krypto/Forex: durchgehende Fenster (24/7).
+    """
+    lookback = YAHOO_LOOKBACK_DAYS.get(interval)
+    if lookback:
+        earliest = pd.Timestamp.now(tz="UTC") - pd.Timedelta(days=lookback) + YAHOO_LOOKBACK_MARGIN
+        start = max(start, earliest if start.tzinfo is not None else earliest.tz_localize(None))
+    if start >= end:
+        return []
+    span = pd.Timedelta(days=YAHOO_1M_CHUNK_DAYS) if interval == "1m" else None
+
+    windows = []
+    if has_exchange_calendar(symbol):
+        for session_open, session_close in trading_sessions(start, end):
+            if windows and (span is None or session_close - windows[-1][0] <= span):
+                windows[-1] = (windows[-1][0], session_close)
+            else:
+                windows.append((session_open, session_close))
+        return windows
+
+    step = span or end - start
+    current_start = start
+    while current_start < end:
+        current_end = min(current_start + step, end)
+        windows.append((current_start, current_end))
+        current_start = current_end
+    return windows
+
+
+def plan_chunks(source, interval, start, end, symbol=None):
+    """
+    Alle (start, end) Fenster vorab berechnen (halboffen, aufsteigend).
+    Yahoo: siehe plan_yahoo_windows (symbol entscheidet über den Börsenkalender).
+    Binance: Seiten mit je 1000 Klines (intervallgenau, siehe plan_binance_pages).
+    """
+    if source == "yahoo":
+        return plan_yahoo_windows(interval, start, end, symbol)
+    pages = plan_binance_pages(interval, int(start.timestamp() * 1000), int(end.timestamp() * 1000))
+    return [(pd.Timestamp(a, unit="ms"), pd.Timestamp(b, unit="ms")) for a, b in pages]
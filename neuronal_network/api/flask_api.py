@@ -1,271 +1,211 @@
 # flask_api.py
-from flask import Flask, request, jsonify
+# Flask-Server (threaded). Konfiguration, Hintergrund-Dienste und Pipeline-Schritte: api_common.py
+from flask import Flask, Response, request, jsonify, stream_with_context, g
+from flask.json.provider import DefaultJSONProvider
 import os
-import csv
-import datetime
-import pandas as pd
-from dateutil.relativedelta import relativedelta
-from colorama import init, Fore, Style
+import time
+import contextvars
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait
 from binance.client import Client
-import yfinance as yf
-import requests
-from dotenv import load_dotenv
 
-load_dotenv()
+# Lokale Module: api_common lädt .env vor dem Lesen der Konfiguration
+from api_common import (
+    REPLAY_URL, CSV_FOLDER, CHUNK_WORKERS, STREAM_BATCH_SIZE, REQUEST_DEADLINE, CSV_SNAPSHOTS,
+    SINGLE_FLIGHT_WINDOW, LIVE_HUB_POLL_INTERVAL, LIVE_HUB_QUEUE, SSE_HEARTBEAT,
+    webhook_publisher, candle_cache, candle_store, yf_bar_cache, terminal_logger,
+    to_json, ndjson_line, print_candle, publish_to_webhook, set_request_labels,
+    stream_candle, kline_candle, binance_page_params, klines_frame, yf_ticker, bars_candle, fetch_yf_chunk,
+    history_window, gap_frames, cache_batch, chunk_batch, fan_out_results,
+)
+import rate_limit
+import metrics
+from metrics import span, timed_iter, upstream_call
+from chunk_planner import plan_chunks
+from candles import Candle, CandleBatch, format_symbol
+from candle_cache import yahoo_tz
+from candle_store import parse_time, save_batches
+from live_hub import LiveHub
+from replay_upstream import ReplayBinanceClient
+from single_flight import SingleFlight
 
 # --- Setup Binance & Flask ---
 API_KEY = os.getenv("BINANCE_API_KEY") or "DEIN_KEY"
 API_SECRET = os.getenv("BINANCE_API_SECRET") or "DEIN_SECRET"
-binance_client = Client(API_KEY, API_SECRET)
+binance_client = ReplayBinanceClient(REPLAY_URL) if REPLAY_URL else Client(API_KEY, API_SECRET)
 
-CSV_FOLDER = "csv"
-os.makedirs(CSV_FOLDER, exist_ok=True)
+# Worker-Pool für historische Chunks (begrenzt, gemeinsam für alle Requests)
+chunk_executor = ThreadPoolExecutor(max_workers=CHUNK_WORKERS, thread_name_prefix="chunk")
 
-WEBHOOK_URL = os.getenv("WEBHOOK_URL")  # optional
+# Worker-Pool für parallele Symbole in /api/live und /api/train_mode
+SYMBOL_WORKERS = int(os.getenv("SYMBOL_WORKERS", 16))
+symbol_executor = ThreadPoolExecutor(max_workers=SYMBOL_WORKERS, thread_name_prefix="symbol")
+
+# Single-Flight: identische gleichzeitige Upstream-Fetches teilen sich einen Call
+upstream_flight = SingleFlight(reuse_window=SINGLE_FLIGHT_WINDOW)
+
+# Pub/Sub für Live-Candles (/api/live_sse): ein Poller pro (source, symbol, interval), beliebig viele Clients
+live_hub = LiveHub(
+    lambda source, symbol, interval: fetch_live_candle(symbol, source, interval),
+    poll_interval=LIVE_HUB_POLL_INTERVAL,
+    max_queue=LIVE_HUB_QUEUE,
+)
+
+class CandleJSONProvider(DefaultJSONProvider):
+    """Candle/CandleBatch erst bei der Ausgabe in die bisherige JSON-Form bringen"""
+    @staticmethod
+    def default(o):
+        if isinstance(o, (Candle, CandleBatch)):
+            return to_json(o)
+        return DefaultJSONProvider.default(o)
 
 app = Flask(__name__)
-init(autoreset=True)  # colorama init
+app.json = CandleJSONProvider(app)
 
 # ---------------------------
 # --- Helper Functions ---
 # ---------------------------
 
-def format_symbol(symbol, source):
-    """Symbol für Binance/Yahoo anpassen"""
-    if source == "binance":
-        if "USDT" not in symbol:
-            symbol = symbol.replace("-USD","")+"USDT"
-    elif source == "yahoo":
-        symbol = symbol.replace("USDT","-USD")
-    return symbol
-
-def print_candle(candle, mode="LIVE", prefix=None):
-    label = prefix if prefix else mode
-    ts = candle.get("timestamp")
-    o = candle.get("open")
-    c = candle.get("close")
-    h = candle.get("high")
-    l = candle.get("low")
-    v = candle.get("volume", 0)
-
-    # Label-Farbe
-    if label in ["[LIVE]", "LIVE"]:
-        lbl_color = Fore.CYAN
-    elif label in ["[TRAIN]", "[TRAIN_MODE]"]:
-        lbl_color = Fore.MAGENTA
-    else:
-        lbl_color = Fore.WHITE
-
-    # Open/Close Farbe
-    if c > o:
-        oc_color = Fore.GREEN
-        arrow = "↑"
-    elif c < o:
-        oc_color = Fore.RED
-        arrow = "↓"
-    else:
-        oc_color = Fore.YELLOW
-        arrow = "→"
-
-    # High/Low Farben
-    high_color = Fore.GREEN if h > o else Fore.RED if h < o else Fore.YELLOW
-    low_color = Fore.GREEN if l > o else Fore.RED if l < o else Fore.YELLOW
-
-    print(f"{lbl_color}{label}{Style.RESET_ALL} {ts} | {arrow} "
-          f"Open:{oc_color}{o:.2f}{Style.RESET_ALL} "
-          f"Close:{oc_color}{c:.2f}{Style.RESET_ALL} "
-          f"High:{high_color}{h:.2f}{Style.RESET_ALL} "
-          f"Low:{low_color}{l:.2f}{Style.RESET_ALL} "
-          f"Vol:{v:.2f}")
-
-def publish_to_webhook(symbol, candle):
-    """Optional: Candle an Webhook senden"""
-    if WEBHOOK_URL:
-        try:
-            requests.post(WEBHOOK_URL, json={symbol:candle}, timeout=2)
-        except Exception as e:
-            print(f"[Webhook Error] {e}")
-
-def cast_float(val):
-    """Sicherstellen, dass es ein float ist (keine np.float64 etc.)"""
-    try:
-        return float(val)
-    except:
-        return 0.0
-
-def build_candle(open_, high, low, close, volume, symbol, timestamp=None, prev_close=None):
-    """Generische Candle-Erstellung mit Farblogik"""
-    close = cast_float(close)
-    open_ = cast_float(open_)
-    high = cast_float(high)
-    low = cast_float(low)
-    volume = cast_float(volume)
-    
-    if prev_close is None:
-        prev_close = open_
-    else:
-        prev_close = cast_float(prev_close)
-
-    color = "green" if close > prev_close else "red"
-    if not timestamp:
-        timestamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-
-    return {
-        "symbol": symbol,
-        "prev_close": prev_close,
-        "current_close": close,
-        "color": color,
-        "open": open_,
-        "high": high,
-        "low": low,
-        "close": close,
-        "volume": volume,
-        "timestamp": timestamp
-    }
+def respond(obj):
+    """jsonify mit Stage "serialize" """
+    with span("serialize"):
+        return jsonify(obj)
 
 # ---------------------------
 # --- Candle Fetch ---
 # ---------------------------
 
 # --- Binance ---
+@upstream_flight.wrap
 def fetch_binance_candle(symbol):
-    klines = binance_client.get_klines(symbol=symbol, interval=Client.KLINE_INTERVAL_1MINUTE, limit=2)
-    return build_candle(
-        open_=klines[1][1],
-        high=klines[1][2],
-        low=klines[1][3],
-        close=klines[1][4],
-        volume=klines[1][5],
-        symbol=symbol,
-        prev_close=klines[0][4]
-    )
+    # Streaming-Modus: aus dem Ring-Buffer bedienen (Fallback REST)
+    candle = stream_candle(symbol)
+    if candle is not None:
+        return candle
+    with upstream_call("binance", "live"):
+        klines = binance_client.get_klines(symbol=symbol, interval=Client.KLINE_INTERVAL_1MINUTE, limit=2)
+    return kline_candle(symbol, klines)
 
 # --- Yahoo Finance ---
+@upstream_flight.wrap
 def fetch_yf_candle(symbol, interval="1m", period="1d"):
-    ticker = yf.Ticker(symbol)
-    hist = ticker.history(period=period, interval=interval)
-    if hist.empty or len(hist)<2:
-        raise ValueError(f"Keine Daten für {symbol}")
-    return build_candle(
-        open_=hist["Open"].iloc[-1],
-        high=hist["High"].iloc[-1],
-        low=hist["Low"].iloc[-1],
-        close=hist["Close"].iloc[-1],
-        volume=hist["Volume"].iloc[-1] if "Volume" in hist else 0,
-        symbol=symbol,
-        prev_close=hist["Close"].iloc[-2]
-    )
+    if period == "1d":
+        hist = yf_bar_cache.get(symbol, interval)
+    else:
+        with upstream_call("yahoo", "live"):
+            hist = yf_ticker(symbol).history(period=period, interval=interval)
+    return bars_candle(symbol, hist)
+
+def fetch_live_candle(symbol, source, interval="1m"):
+    """Aktuelle Candle je nach Quelle"""
+    return fetch_binance_candle(symbol) if source=="binance" else fetch_yf_candle(symbol, interval)
 
 # --- Chunked Fetch ---
+def fetch_raw_chunk(symbol, source, interval, start, end):
+    """Ein geplantes Fenster holen -> OHLCV-Frame (oder None wenn leer)"""
+    with span("rate_limit"):
+        rate_limit.acquire(source)
+    if source == "yahoo":
+        return fetch_yf_chunk(symbol, interval, start, end)
+    with upstream_call("binance", "history"):
+        klines = binance_client.get_klines(**binance_page_params(symbol, interval, start, end))
+    return klines_frame(klines)
+
+def iter_ordered(executor, fn, items, max_in_flight):
+    """Wie executor.map, aber mit max. max_in_flight offenen Futures (konstanter Speicher)"""
+    pending = deque()
+    for item in items:
+        # Kontext mitgeben -> Metrik-Labels des Requests auch im Worker-Thread
+        pending.append(executor.submit(contextvars.copy_context().run, fn, item))
+        if len(pending) >= max_in_flight:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+def iter_raw_chunks(symbol, source, interval, start, end):
+    """Alle Fenster in [start, end) parallel holen, in Reihenfolge liefern"""
+    windows = plan_chunks(source, interval, start, end, symbol)
+    return iter_ordered(
+        chunk_executor, lambda w: fetch_raw_chunk(symbol, source, interval, *w), windows, CHUNK_WORKERS * 2
+    )
+
+def iter_candle_batches(symbol, source="yahoo", interval="1m", period="6mo", batch_size=None):
+    """
+    Generator-Pipeline: CandleBatches in Zeitreihenfolge.
+    batch_size: max. Zeilen pro Batch aus dem Cache (None = alles auf einmal)
+    """
+    if candle_cache is not None:
+        start, now = history_window(period, utc=True)
+        # Gecachte Abschnitte gehen sofort raus, Lücken werden erst beim Erreichen geholt
+        frames = candle_cache.iter_range(
+            source, symbol, interval, start, now,
+            lambda gap_start, gap_end: gap_frames(iter_raw_chunks(symbol, source, interval, gap_start, gap_end)),
+            batch_size,
+        )
+        prev = None
+        for f in timed_iter(frames, "cache"):  # inkl. Nachladen fehlender Lücken (upstream)
+            yield cache_batch(f, symbol, prev)
+            prev = f
+        return
+
+    start, now = history_window(period, utc=False)
+    prev = None
+    for f in iter_raw_chunks(symbol, source, interval, start, now):
+        if f is not None:
+            yield chunk_batch(f, symbol, prev)
+            prev = f
+
+def iter_candles_chunked(symbol, source="yahoo", interval="1m", period="6mo"):
+    """Wie fetch_candles_chunked, aber Candle für Candle als Dict (Streaming)"""
+    for batch in iter_candle_batches(symbol, source, interval, period, batch_size=STREAM_BATCH_SIZE):
+        yield from batch.to_dicts()
+
+@upstream_flight.wrap
 def fetch_candles_chunked(symbol, source="yahoo", interval="1m", period="6mo"):
-    candles = []
-
-    now = pd.Timestamp.now()
-    # Period Parsing
-    if period.endswith("d"):
-        total_days = int(period[:-1])
-    elif period.endswith("mo"):
-        total_days = int(period[:-2]) * 30
-    elif period.endswith("y"):
-        total_days = int(period[:-1]) * 365
-    else:
-        total_days = 7
-
-    start = now - pd.Timedelta(days=total_days)
-    current_start = start
-
-    while current_start < now:
-        if source == "yahoo" and interval == "1m":
-            chunk_days = 7  # Yahoo 1m Limit
-        else:
-            chunk_days = total_days  # Binance kann mehr
-
-        current_end = min(current_start + pd.Timedelta(days=chunk_days), now)
-
-        # --- Yahoo ---
-        if source == "yahoo":
-            ticker = yf.Ticker(symbol)
-            hist = ticker.history(start=current_start, end=current_end, interval=interval)
-            if hist.empty:
-                current_start = current_end
-                continue
-            hist["prev_close"] = hist["Close"].shift(1)
-            hist["color"] = (hist["Close"] > hist["prev_close"]).map({True:"green", False:"red"})
-            for ts, row in hist.iterrows():
-                if pd.isna(row["prev_close"]): continue
-                candles.append(build_candle(
-                    open_=row["Open"],
-                    high=row["High"],
-                    low=row["Low"],
-                    close=row["Close"],
-                    volume=row["Volume"] if "Volume" in row else 0,
-                    symbol=symbol,
-                    timestamp=ts.strftime("%Y-%m-%d %H:%M:%S"),
-                    prev_close=row["prev_close"]
-                ))
-
-        # --- Binance ---
-        else:
-            start_ts = int(current_start.timestamp() * 1000)
-            end_ts = int(current_end.timestamp() * 1000)
-            while start_ts < end_ts:
-                klines = binance_client.get_klines(
-                    symbol=symbol,
-                    interval=interval,
-                    startTime=start_ts,
-                    endTime=end_ts,
-                    limit=1000
-                )
-                if not klines:
-                    break
-                df = pd.DataFrame(klines, columns=[
-                    "open_time","open","high","low","close","volume","close_time",
-                    "quote_asset_volume","trades","taker_buy_base","taker_buy_quote","ignore"
-                ])
-                df[["open","high","low","close","volume"]] = df[["open","high","low","close","volume"]].astype(float)
-                df.index = pd.to_datetime(df["open_time"], unit='ms')
-                df["prev_close"] = df["close"].shift(1)
-                df["color"] = (df["close"] > df["prev_close"]).map({True:"green", False:"red"})
-                for ts, row in df.iterrows():
-                    if pd.isna(row["prev_close"]): continue
-                    candles.append(build_candle(
-                        open_=row["open"],
-                        high=row["high"],
-                        low=row["low"],
-                        close=row["close"],
-                        volume=row["volume"],
-                        symbol=symbol,
-                        timestamp=ts.strftime("%Y-%m-%d %H:%M:%S"),
-                        prev_close=row["prev_close"]
-                    ))
-                start_ts = int(df["open_time"].iloc[-1]) + 60_000  # nächste Minute
-
-        current_start = current_end
-
-    # Sortiere nach Zeitstempel aufsteigend (älteste zuerst)
-    candles.sort(key=lambda x: x["timestamp"])
-    return candles
-
-# --- Save CSV ---
-def save_to_csv(candles, symbol, source, interval, period="7d"):
-    folder = os.path.join(CSV_FOLDER, f"{source}")
-    os.makedirs(folder, exist_ok=True)
-    timestamp_str = datetime.datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
-    file_name = f"{symbol}-{interval}-{period}-{source}-{timestamp_str}.csv"
-    file_path = os.path.join(folder, file_name)
-
-    if source == "binance":
-        header = ["timestamp","symbol","open","high","low","close","prev_close","current_close","volume","color"]
-    else:  # Yahoo
-        header = ["timestamp","symbol","open","high","low","close","volume","color"]
-
-    with open(file_path,"w",newline="") as f:
-        writer = csv.DictWriter(f, fieldnames=header)
-        writer.writeheader()
-        for candle in candles:
-            row = {key: candle.get(key, "") for key in header}
-            writer.writerow(row)
-    return file_path
+    """Historische Candles als CandleBatch (aufsteigend, älteste zuerst)"""
+    batches = list(iter_candle_batches(symbol, source, interval, period))
+    with span("sort"):
+        return CandleBatch.concat(batches, symbol).sorted()
+
+# ---------------------------
+# --- Multi-Symbol Fan-out ---
+# ---------------------------
+
+def request_deadline():
+    """Deadline pro Request (Parameter deadline in Sekunden, sonst REQUEST_DEADLINE)"""
+    return request.args.get("deadline", REQUEST_DEADLINE, type=float)
+
+def fan_out(symbols, source, fetch_fn, deadline=None):
+    """
+    fetch_fn(symbol_fmt) für alle Symbole parallel ausführen.
+    Fehler/Timeouts bleiben pro Symbol isoliert: {"error": ...}
+    """
+    futures = {}
+    for symbol in symbols:
+        symbol_fmt = format_symbol(symbol, source)
+        futures[symbol_fmt] = symbol_executor.submit(contextvars.copy_context().run, fetch_fn, symbol_fmt)
+
+    done, _ = wait(futures.values(), timeout=deadline)
+    return fan_out_results(futures, done, deadline)
+
+# ---------------------------
+# --- Metriken ---
+# ---------------------------
+
+@app.before_request
+def start_request_metrics():
+    g.metrics_started = time.perf_counter()
+    set_request_labels(request.url_rule.rule if request.url_rule else "unknown", request.args)
+
+@app.after_request
+def record_request_metrics(response):
+    started = g.pop("metrics_started", None)
+    if started is not None:
+        metrics.REQUEST_SECONDS.observe(
+            time.perf_counter() - started,
+            endpoint=metrics.current_endpoint.get(), source=metrics.current_source.get(), status=response.status_code,
+        )
+    return response
 
 # ---------------------------
 # --- API Endpoints ---
@@ -280,17 +220,13 @@ def api_live():
         return jsonify({"error":"Bitte Parameter symbols angeben"}), 400
     symbols = symbols.split(",")
 
-    result = {}
-    for symbol in symbols:
-        symbol_fmt = format_symbol(symbol, source)
-        try:
-            candle = fetch_binance_candle(symbol_fmt) if source=="binance" else fetch_yf_candle(symbol_fmt, interval)
-            print_candle(candle, prefix="[LIVE]")
-            publish_to_webhook(symbol_fmt, candle)
-            result[symbol_fmt] = candle
-        except Exception as e:
-            result[symbol_fmt] = {"error": str(e)}
-    return jsonify(result)
+    def live_symbol(symbol_fmt):
+        candle = fetch_live_candle(symbol_fmt, source, interval)
+        print_candle(candle, prefix="[LIVE]")
+        publish_to_webhook(symbol_fmt, candle)
+        return candle
+
+    return respond(fan_out(symbols, source, live_symbol, request_deadline()))
 
 @app.route("/api/train_mode")
 def api_train_mode():
@@ -301,20 +237,65 @@ def api_train_mode():
         return jsonify({"error":"Bitte Parameter symbols angeben"}), 400
     symbols = symbols.split(",")
 
-    result = {}
+    if request.args.get("format") == "ndjson":
+        return Response(stream_with_context(stream_train_mode(symbols, source, interval)), mimetype="application/x-ndjson")
+
+    def train_symbol(symbol_fmt):
+        candles = fetch_candles_chunked(symbol_fmt, source, interval, period="7d")
+        live_candle = fetch_live_candle(symbol_fmt, source, interval)
+        for c in candles[-5:]:
+            print_candle(c, prefix="[HIST]")
+        print_candle(live_candle, prefix="[LIVE]")
+        publish_to_webhook(symbol_fmt, live_candle)
+        return {"history": candles, "live": live_candle}
+
+    return respond(fan_out(symbols, source, train_symbol, request_deadline()))
+
+def stream_train_mode(symbols, source, interval):
+    """
+    NDJSON: eine Zeile pro Candle, sobald sie erzeugt ist.
+    {"symbol":..., "history": candle} ... {"symbol":..., "live": candle} | {"symbol":..., "error": ...}
+    """
     for symbol in symbols:
         symbol_fmt = format_symbol(symbol, source)
         try:
-            candles = fetch_candles_chunked(symbol_fmt, source, interval, period="7d")
-            live_candle = fetch_binance_candle(symbol_fmt) if source=="binance" else fetch_yf_candle(symbol_fmt, interval)
-            for c in candles[-5:]:
+            last = deque(maxlen=5)
+            for candle in iter_candles_chunked(symbol_fmt, source, interval, period="7d"):
+                last.append(candle)
+                yield ndjson_line(symbol_fmt, history=candle)
+            live_candle = fetch_live_candle(symbol_fmt, source, interval)
+            for c in last:
                 print_candle(c, prefix="[HIST]")
             print_candle(live_candle, prefix="[LIVE]")
             publish_to_webhook(symbol_fmt, live_candle)
-            result[symbol_fmt] = {"history": candles, "live": live_candle}
+            yield ndjson_line(symbol_fmt, live=live_candle)
         except Exception as e:
-            result[symbol_fmt] = {"error": str(e)}
-    return jsonify(result)
+            yield ndjson_line(symbol_fmt, error=str(e))
+
+@app.route("/api/live_sse")
+def api_live_sse():
+    """Server-Sent Events: jede neue Candle als data: {symbol: candle}"""
+    symbols = request.args.get("symbols")
+    source = request.args.get("source","yahoo").lower()
+    interval = request.args.get("interval","1m")
+    if not symbols:
+        return jsonify({"error":"Bitte Parameter symbols angeben"}), 400
+    keys = [(source, format_symbol(symbol, source), interval) for symbol in symbols.split(",")]
+    sub = live_hub.subscribe(keys)
+
+    def event_stream():
+        try:
+            while True:
+                item = sub.get(timeout=SSE_HEARTBEAT)
+                if item is None:
+                    yield ": ping\n\n"  # hält die Verbindung offen, erkennt getrennte Clients
+                    continue
+                symbol, candle = item
+                yield f"data: {app.json.dumps({symbol: candle})}\n\n"
+        finally:
+            live_hub.unsubscribe(sub)
+
+    return Response(event_stream(), mimetype="text/event-stream", headers={"Cache-Control": "no-cache"})
 
 @app.route("/api/fetch_candle")
 def api_fetch_candle():
@@ -325,10 +306,10 @@ def api_fetch_candle():
         return jsonify({"error":"Bitte Parameter symbol angeben"}), 400
     symbol_fmt = format_symbol(symbol, source)
     try:
-        candle = fetch_binance_candle(symbol_fmt) if source=="binance" else fetch_yf_candle(symbol_fmt, interval)
+        candle = fetch_live_candle(symbol_fmt, source, interval)
         print_candle(candle)
         publish_to_webhook(symbol_fmt, candle)
-        return jsonify(candle)
+        return respond(candle)
     except Exception as e:
         return jsonify({"error":str(e)})
 
@@ -342,12 +323,53 @@ def api_csv():
         return jsonify({"error":"Bitte Parameter symbol angeben"}), 400
     symbol_fmt = format_symbol(symbol, source)
     try:
-        candles = fetch_candles_chunked(symbol_fmt, source, interval, period)
-        file_path = save_to_csv(candles, symbol_fmt, source, interval, period)
-        return jsonify({"status":"CSV erstellt","rows":len(candles),"file":file_path})
+        # Batches direkt in Store/Datei streamen (kein kompletter Verlauf im Speicher)
+        batches = iter_candle_batches(symbol_fmt, source, interval, period, batch_size=STREAM_BATCH_SIZE)
+        file_path, rows = save_batches(
+            batches, candle_store, symbol_fmt, source, interval, period, CSV_FOLDER, snapshot=CSV_SNAPSHOTS
+        )
+        return jsonify({"status":"CSV erstellt","rows":rows,"file":file_path})
     except Exception as e:
         return jsonify({"error":str(e)})
 
+@app.route("/api/range")
+def api_range():
+    """Candles mit start <= timestamp < end aus dem Candle-Store (Binärsuche, kein Upstream)"""
+    symbol = request.args.get("symbol")
+    source = request.args.get("source","yahoo").lower()
+    interval = request.args.get("interval","1m")
+    if not symbol:
+        return jsonify({"error":"Bitte Parameter symbol angeben"}), 400
+    if candle_store is None:
+        return jsonify({"error":"Candle-Store deaktiviert (CANDLE_STORE=0)"}), 404
+    symbol_fmt = format_symbol(symbol, source)
+    try:
+        tz = yahoo_tz(symbol_fmt) if source == "yahoo" else "UTC"
+        start = parse_time(request.args.get("start"), tz)
+        end = parse_time(request.args.get("end"), tz)
+        limit = request.args.get("limit", type=int)
+    except ValueError as e:
+        return jsonify({"error":f"Ungültige Zeitangabe: {e}"}), 400
+    with span("index"):
+        index = candle_store.index(source, symbol_fmt, interval)
+    if index is None:
+        return jsonify({"error":f"Keine gespeicherten Candles für {symbol_fmt} {interval} ({source})"}), 404
+    return respond(index.range(start, end, limit))
+
+@app.route("/api/stats")
+def api_stats():
+    return jsonify({
+        "single_flight": upstream_flight.stats(),
+        "webhook": webhook_publisher.stats() if webhook_publisher is not None else None,
+        "terminal_logger": terminal_logger.stats(),
+        "live_hub": live_hub.stats(),
+    })
+
+@app.route("/api/metrics")
+def api_metrics():
+    """Prometheus-Textformat (Histogramme pro Endpoint/Source/Stage, Upstream-Zähler)"""
+    return Response(metrics.render(), mimetype="text/plain; version=0.0.4")
+
 # ---------------------------
 # --- Start Flask ---
 # ---------------------------
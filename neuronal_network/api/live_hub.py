@@ -0,0 +1,162 @@
+# live_hub.py
+import time
+import threading
+from collections import deque
+
+
+class Subscription:
+    """
+    Begrenzte Queue eines Abonnenten (SSE/WebSocket-Client).
+    Volle Queue -> älteste Candle wird verworfen, der Poller wartet nie auf langsame Clients.
+    notify: optionaler Callback nach jedem put (z. B. loop.call_soon_threadsafe für asyncio)
+    """
+
+    def __init__(self, keys, max_queue=100, notify=None):
+        self.keys = list(keys)
+        self.max_queue = max_queue
+        self.notify = notify
+        self.items = deque()
+        self.cond = threading.Condition()
+        self.dropped = 0
+        self.closed = False
+
+    def put(self, item):
+        with self.cond:
+            if len(self.items) >= self.max_queue:
+                self.items.popleft()
+                self.dropped += 1
+            self.items.append(item)
+            self.cond.notify()
+        if self.notify is not None:
+            self.notify()
+
+    def get(self, timeout=None):
+        """Nächstes Item (symbol, candle) oder None bei Timeout/geschlossen"""
+        with self.cond:
+            if not self.items and not self.closed:
+                self.cond.wait(timeout)
+            return self.items.popleft() if self.items else None
+
+    def drain(self):
+        """Alle wartenden Items auf einmal (nicht blockierend)"""
+        with self.cond:
+            items = list(self.items)
+            self.items.clear()
+            return items
+
+    def close(self):
+        with self.cond:
+            self.closed = True
+            self.cond.notify_all()
+        if self.notify is not None:
+            self.notify()
+
+
+# Felder, die eine Änderung ausmachen (ts setzt build_candle auf now(), ändert sich also bei jedem Poll)
+CHANGE_FIELDS = ("open", "high", "low", "close", "volume", "prev_close")
+
+
+def candle_values(candle):
+    return tuple(getattr(candle, key) for key in CHANGE_FIELDS)
+
+
+class _Topic:
+    def __init__(self, key):
+        self.key = key
+        self.subscribers = set()
+        self.last = None        # letzte veröffentlichte Candle (für neue Abonnenten)
+        self.thread = None
+        self.polls = 0
+        self.published = 0
+        self.errors = 0
+
+
+class LiveHub:
+    """
+    Pub/Sub für Live-Candles: genau ein Poller-Thread pro (source, symbol, interval),
+    beliebig viele Abonnenten. Upstream-Last bleibt gleich, egal wie viele Clients zuhören.
+
+    fetch_fn(source, symbol, interval) -> Candle
+    Veröffentlicht wird nur, wenn sich OHLCV/prev_close geändert haben.
+    Ohne Abonnenten wird das Topic entfernt und der Poller endet.
+    """
+
+    def __init__(self, fetch_fn, poll_interval=1.0, max_queue=100, max_backoff=30.0):
+        self.fetch_fn = fetch_fn
+        self.poll_interval = poll_interval
+        self.max_queue = max_queue
+        self.max_backoff = max_backoff
+        self.topics = {}
+        self.lock = threading.Lock()
+
+    def subscribe(self, keys, max_queue=None, notify=None):
+        """Eine Queue für mehrere Topics (source, symbol, interval)"""
+        sub = Subscription(keys, max_queue or self.max_queue, notify)
+        with self.lock:
+            for key in sub.keys:
+                topic = self.topics.get(key)
+                if topic is None:
+                    topic = self.topics[key] = _Topic(key)
+                topic.subscribers.add(sub)
+                if topic.last is not None:
+                    sub.put((key[1], topic.last))
+                if topic.thread is None:
+                    topic.thread = threading.Thread(
+                        target=self._poll, args=(topic,), daemon=True, name=f"hub-{'-'.join(key)}"
+                    )
+                    topic.thread.start()
+        return sub
+
+    def unsubscribe(self, sub):
+        with self.lock:
+            for key in sub.keys:
+                topic = self.topics.get(key)
+                if topic is not None:
+                    topic.subscribers.discard(sub)
+                    if not topic.subscribers:
+                        # neuer subscribe() legt ein frisches Topic + Poller an, der alte endet von selbst
+                        del self.topics[key]
+        sub.close()
+
+    def _publish(self, topic, item):
+        with self.lock:
+            subscribers = list(topic.subscribers)
+        for sub in subscribers:
+            sub.put(item)
+        topic.published += 1
+
+    def _poll(self, topic):
+        source, symbol, interval = topic.key
+        backoff = self.poll_interval
+        while True:
+            with self.lock:
+                if not topic.subscribers:
+                    # Letzter Abonnent weg -> Poller beenden (Topic ist schon aus self.topics entfernt)
+                    topic.thread = None
+                    return
+            topic.polls += 1
+            try:
+                candle = self.fetch_fn(source, symbol, interval)
+                backoff = self.poll_interval
+                if topic.last is None or candle_values(candle) != candle_values(topic.last):
+                    topic.last = candle
+                    self._publish(topic, (symbol, candle))
+            except Exception as e:
+                topic.errors += 1
+                backoff = min(backoff * 2, self.max_backoff)
+                self._publish(topic, (symbol, {"error": str(e)}))
+            time.sleep(backoff)
+
+    def stats(self):
+        with self.lock:
+            return {
+                "/".join(key): {
+                    "subscribers": len(topic.subscribers),
+                    "polling": topic.thread is not None,
+                    "polls": topic.polls,
+                    "published": topic.published,
+                    "errors": topic.errors,
+                    "dropped": sum(sub.dropped for sub in topic.subscribers),
+                }
+                for key, topic in self.topics.items()
+            }
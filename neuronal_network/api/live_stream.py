@@ -0,0 +1,164 @@
+# live_stream.py
+import os
+import glob
+import json
+import time
+import asyncio
+import threading
+import numpy as np
+import pandas as pd
+
+BINANCE_WS_URL = "wss://stream.binance.com:9443"
+
+KLINE_DTYPE = np.dtype([
+    ("open_time", "i8"),
+    ("open", "f8"),
+    ("high", "f8"),
+    ("low", "f8"),
+    ("close", "f8"),
+    ("volume", "f8"),
+])
+
+
+class CandleRing:
+    """
+    Feste Anzahl der letzten Klines pro Symbol (NumPy Ring-Buffer).
+    Updates der offenen Kline überschreiben den letzten Slot.
+    """
+
+    def __init__(self, size=500):
+        self.size = size
+        self.data = np.zeros(size, dtype=KLINE_DTYPE)
+        self.count = 0      # Anzahl geschriebener Klines (monoton)
+        self.updated = 0.0  # time.monotonic() des letzten Updates
+
+    def update(self, open_time, open_, high, low, close, volume):
+        last = (self.count - 1) % self.size
+        if self.count == 0 or self.data["open_time"][last] != open_time:
+            last = self.count % self.size
+            self.count += 1
+        self.data[last] = (open_time, open_, high, low, close, volume)
+        self.updated = time.monotonic()
+
+    def last(self, n):
+        """Die letzten n Klines (älteste zuerst) als Kopie"""
+        n = min(n, self.count, self.size)
+        idx = np.arange(self.count - n, self.count) % self.size
+        return self.data[idx]
+
+
+class BinanceKlineStream:
+    """
+    Abonniert die Kline-Streams der Symbole einmal (Combined Stream) und
+    hält die letzten Klines pro Symbol im Speicher.
+    """
+
+    def __init__(self, symbols, interval="1m", size=500, url=BINANCE_WS_URL, max_age=10):
+        self.symbols = [s.upper() for s in symbols]
+        self.interval = interval
+        self.url = url.rstrip("/")
+        self.max_age = max_age  # Sekunden ohne Update -> Daten gelten als veraltet
+        self.rings = {s: CandleRing(size) for s in self.symbols}
+        self.lock = threading.Lock()
+        self.thread = None
+
+    def stream_url(self):
+        streams = "/".join(f"{s.lower()}@kline_{self.interval}" for s in self.symbols)
+        return f"{self.url}/stream?streams={streams}"
+
+    def start(self):
+        self.thread = threading.Thread(target=lambda: asyncio.run(self._run()), daemon=True, name="kline-stream")
+        self.thread.start()
+        return self
+
+    async def _run(self):
+        import websockets  # optional, nur im Streaming-Modus nötig
+
+        backoff = 1
+        while True:
+            try:
+                async with websockets.connect(self.stream_url(), ping_interval=20) as ws:
+                    backoff = 1
+                    async for message in ws:
+                        self.handle_message(message)
+            except Exception as e:
+                print(f"[Stream Error] {e} (Reconnect in {backoff}s)")
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, 60)
+
+    def handle_message(self, message):
+        """Combined-Stream Nachricht ({"stream":..., "data": {"k": {...}}}) verarbeiten"""
+        data = json.loads(message)
+        data = data.get("data", data)
+        k = data.get("k")
+        if not k:
+            return
+        ring = self.rings.get(k["s"])
+        if ring is None:
+            return
+        with self.lock:
+            ring.update(int(k["t"]), float(k["o"]), float(k["h"]), float(k["l"]), float(k["c"]), float(k["v"]))
+
+    def last(self, symbol, n=2):
+        """Letzte n Klines oder None (unbekanntes Symbol, zu wenig/veraltete Daten)"""
+        ring = self.rings.get(symbol)
+        if ring is None:
+            return None
+        with self.lock:
+            if ring.count < n or time.monotonic() - ring.updated > self.max_age:
+                return None
+            return ring.last(n)
+
+
+# ---------------------------
+# --- Lokaler Replay-Server ---
+# ---------------------------
+
+def load_replay_klines(csv_folder, symbol, interval="1m"):
+    """Neueste CSV (save_to_csv) eines Symbols als Kline-Liste laden"""
+    files = sorted(glob.glob(os.path.join(csv_folder, f"{symbol}-{interval}-*.csv")))
+    if not files:
+        return []
+    df = pd.read_csv(files[-1])
+    open_times = pd.to_datetime(df["timestamp"]).to_numpy(dtype="datetime64[ms]").astype("i8")
+    return [
+        {"t": int(t), "s": symbol, "i": interval, "o": str(o), "h": str(h), "l": str(l), "c": str(c), "v": str(v), "x": True}
+        for t, o, h, l, c, v in zip(open_times, df["open"], df["high"], df["low"], df["close"], df["volume"])
+    ]
+
+
+def run_replay_server(csv_folder="csv/binance", host="127.0.0.1", port=8765, rate=10):
+    """
+    WebSocket-Ersatz für Binance: spielt die CSVs als Kline-Combined-Stream ab.
+    rate: Klines pro Sekunde und Symbol.
+    """
+    import websockets
+
+    async def handler(ws, path=None):
+        path = path or ws.request.path
+        streams = path.split("streams=", 1)[-1].split("/")
+        klines = {}
+        for stream in streams:
+            symbol, _, interval = stream.partition("@kline_")
+            klines[stream] = load_replay_klines(csv_folder, symbol.upper(), interval)
+        i = 0
+        while True:
+            for stream, rows in klines.items():
+                if rows:
+                    await ws.send(json.dumps({"stream": stream, "data": {"e": "kline", "s": rows[0]["s"], "k": rows[i % len(rows)]}}))
+            i += 1
+            await asyncio.sleep(1 / rate)
+
+    async def serve():
+        async with websockets.serve(handler, host, port):
+            print(f"[Replay] ws://{host}:{port} ({csv_folder})")
+            await asyncio.Future()
+
+    asyncio.run(serve())
+
+
+if __name__ == "__main__":
+    run_replay_server(
+        csv_folder=os.getenv("REPLAY_CSV_FOLDER", "csv/binance"),
+        port=int(os.getenv("REPLAY_WS_PORT", 8765)),
+    )
@@ -0,0 +1,66 @@
+# market_calendar.py
+import re
+import pandas as pd
+from pandas.tseries.holiday import (
+    AbstractHolidayCalendar, Holiday, nearest_workday, sunday_to_monday,
+    USMartinLutherKingJr, USPresidentsDay, GoodFriday, USMemorialDay, USLaborDay, USThanksgivingDay,
+)
+from pandas.tseries.offsets import CustomBusinessDay
+
+NYSE_TZ = "America/New_York"
+NYSE_OPEN = pd.Timedelta(hours=9, minutes=30)
+NYSE_CLOSE = pd.Timedelta(hours=16)
+
+# US-Aktien/Indizes (AAPL, NVDA, ^GSPC); Krypto (BTC-USD), Forex (EURUSD=X) und
+# Börsen-Suffixe (SAP.DE) laufen weiter über 24/7-Fenster
+EQUITY_SYMBOL = re.compile(r"^\^?[A-Z]{1,5}$")
+
+
+class NYSEHolidayCalendar(AbstractHolidayCalendar):
+    """NYSE-Feiertage (ohne verkürzte Handelstage und Sonderschließungen)"""
+    rules = [
+        Holiday("NewYearsDay", month=1, day=1, observance=sunday_to_monday),  # Samstag -> kein Ersatztag
+        USMartinLutherKingJr,
+        USPresidentsDay,
+        GoodFriday,
+        USMemorialDay,
+        Holiday("Juneteenth", month=6, day=19, start_date="2022-06-19", observance=nearest_workday),
+        Holiday("IndependenceDay", month=7, day=4, observance=nearest_workday),
+        USLaborDay,
+        USThanksgivingDay,
+        Holiday("Christmas", month=12, day=25, observance=nearest_workday),
+    ]
+
+
+NYSE_DAY = CustomBusinessDay(calendar=NYSEHolidayCalendar())
+
+
+def has_exchange_calendar(symbol):
+    """True für Symbole mit NYSE-Handelszeiten"""
+    return bool(symbol) and bool(EQUITY_SYMBOL.match(symbol))
+
+
+def trading_sessions(start, end):
+    """
+    Offene Handelszeiten (open, close) in [start, end), auf start/end gekürzt.
+    Zeiten tz-aware in America/New_York, naive start/end gelten als UTC.
+    """
+    start = _to_ny(start)
+    end = _to_ny(end)
+    if start >= end:
+        return []
+    days = pd.date_range(start.normalize().tz_localize(None), end.normalize().tz_localize(None), freq=NYSE_DAY)
+    opens = (days + NYSE_OPEN).tz_localize(NYSE_TZ)
+    closes = (days + NYSE_CLOSE).tz_localize(NYSE_TZ)
+    return [
+        (max(o, start), min(c, end))
+        for o, c in zip(opens, closes)
+        if c > start and o < end
+    ]
+
+
+def _to_ny(ts):
+    ts = pd.Timestamp(ts)
+    if ts.tzinfo is None:
+        ts = ts.tz_localize("UTC")
+    return ts.tz_convert(NYSE_TZ)
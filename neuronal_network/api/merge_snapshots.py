@@ -0,0 +1,245 @@
+# merge_snapshots.py
+# Führt alle CSV-Snapshots eines (source, symbol, interval) zu einer deduplizierten Reihe zusammen:
+# ein Streaming-Durchlauf über alle Dateien (heapq.merge), neuere Snapshots gewinnen bei gleichem
+# Zeitstempel, Lücken werden gemeldet. Ziel: Candle-Store (csv/store) und/oder eine kanonische CSV.
+#
+#   python neuronal_network/api/merge_snapshots.py --source yahoo --symbol BTC-USD --interval 1m
+#   python neuronal_network/api/merge_snapshots.py --all --out-folder csv/merged
+import os
+import re
+import csv
+import glob
+import heapq
+import argparse
+import datetime
+import numpy as np
+import pandas as pd
+
+from candles import CandleBatch, format_timestamps
+from candle_store import CandleStore
+from chunk_planner import interval_ms
+from candle_cache import yahoo_tz
+from market_calendar import has_exchange_calendar, trading_sessions
+
+SNAPSHOT_NAME = re.compile(r"^(?P<symbol>.+?)-(?P<interval>\d+(?:mo|wk|[smhd]))-")
+SNAPSHOT_TIME = re.compile(r"(\d{4}-\d{2}-\d{2}_\d{2}-\d{2}-\d{2})\.csv$")
+VALUE_COLUMNS = ("open", "high", "low", "close", "volume")
+BATCH_ROWS = 50_000
+EPOCH = datetime.datetime(1970, 1, 1)
+ONE_SECOND = datetime.timedelta(seconds=1)
+EXPORT_HEADER = ["timestamp","symbol","open","high","low","close","prev_close","current_close","volume","color"]
+
+
+# ---------------------------
+# --- Snapshots ---
+# ---------------------------
+
+def find_snapshots(csv_folder, source, symbol=None, interval=None):
+    """{(symbol, interval): [Pfade]} aus csv/{source}/*.csv"""
+    groups = {}
+    for path in glob.glob(os.path.join(csv_folder, source, "*.csv")):
+        match = SNAPSHOT_NAME.match(os.path.basename(path))
+        if not match:
+            continue
+        key = (match["symbol"], match["interval"])
+        if (symbol and key[0] != symbol) or (interval and key[1] != interval):
+            continue
+        groups.setdefault(key, []).append(path)
+    return groups
+
+
+def snapshot_time(path):
+    """Erstellzeit eines Snapshots (aus dem Dateinamen, sonst mtime)"""
+    match = SNAPSHOT_TIME.search(os.path.basename(path))
+    if match:
+        return datetime.datetime.strptime(match[1], "%Y-%m-%d_%H-%M-%S").timestamp()
+    return os.path.getmtime(path)
+
+
+def parse_wallclock(value):
+    """ "2025-09-12 15:59:00" oder mit UTC-Offset (Yahoo-Rohexport) -> Sekunden Wanduhrzeit"""
+    value = value.strip()
+    if len(value) < 19:
+        return None
+    try:
+        dt = datetime.datetime.fromisoformat(value[:19])  # C-Parser, deutlich schneller als strptime
+    except ValueError:
+        return None
+    return (dt - EPOCH) // ONE_SECOND
+
+
+def iter_snapshot(path, rank):
+    """
+    Zeilen einer CSV als (ts, -rank, open, high, low, close, volume, prev_close), ohne die Datei
+    komplett zu laden. Erwartet aufsteigende Zeitstempel (wie save_to_csv sie schreibt).
+    """
+    with open(path, newline="") as f:
+        reader = csv.reader(f)
+        header = [c.strip().lower() for c in next(reader, [])]
+        if "timestamp" not in header or any(c not in header for c in VALUE_COLUMNS):
+            return
+        ts_i = header.index("timestamp")
+        value_i = [header.index(c) for c in VALUE_COLUMNS]
+        prev_i = header.index("prev_close") if "prev_close" in header else None
+        last = None
+        for row in reader:
+            ts = parse_wallclock(row[ts_i]) if len(row) > ts_i else None
+            if ts is None:
+                continue
+            if last is not None and ts < last:
+                raise ValueError(f"{path}: Zeitstempel nicht aufsteigend ({row[ts_i]})")
+            last = ts
+            try:
+                values = [float(row[i]) if row[i] else 0.0 for i in value_i]
+                prev = float(row[prev_i]) if prev_i is not None and row[prev_i] else np.nan
+            except ValueError:
+                continue
+            yield (ts, -rank, *values, prev)
+
+
+def merge_rows(paths, stats):
+    """
+    Ein Durchlauf über alle Snapshots (neueste zuerst bei gleichem ts), je Zeitstempel eine Zeile.
+    stats zählt rows (gelesen), duplicates (gleiche Werte) und conflicts (neuere Werte übernommen).
+    """
+    ordered = sorted(paths, key=lambda p: (snapshot_time(p), p))
+    streams = [iter_snapshot(path, rank) for rank, path in enumerate(ordered)]
+    current = None
+    for row in heapq.merge(*streams):
+        stats["rows"] += 1
+        if current is not None and row[0] == current[0]:
+            if row[2:7] == current[2:7]:
+                stats["duplicates"] += 1
+            else:
+                stats["conflicts"] += 1
+            continue
+        if current is not None:
+            yield current
+        current = row
+    if current is not None:
+        yield current
+
+
+# ---------------------------
+# --- Lücken ---
+# ---------------------------
+
+class GapTracker:
+    """Fehlende Candles zwischen aufeinanderfolgenden Zeitstempeln (Aktien: nur innerhalb Handelszeiten)"""
+
+    def __init__(self, symbol, source, interval):
+        self.step = interval_ms(interval) // 1000
+        self.tz = yahoo_tz(symbol) if source == "yahoo" and has_exchange_calendar(symbol) else None
+        self.gaps = []   # (von, bis, fehlende Candles)
+        self.last = None
+
+    def add(self, ts):
+        if self.last is not None and ts - self.last > self.step:
+            missing = self.missing(self.last + self.step, ts)
+            if missing:
+                self.gaps.append((self.last, ts, missing))
+        self.last = ts
+
+    def missing(self, start, end):
+        if self.tz is None:
+            return (end - start) // self.step
+        start = pd.Timestamp(start, unit="s").tz_localize(self.tz)
+        end = pd.Timestamp(end, unit="s").tz_localize(self.tz)
+        return int(sum((close - open_).total_seconds() for open_, close in trading_sessions(start, end)) // self.step)
+
+
+# ---------------------------
+# --- Zusammenführen ---
+# ---------------------------
+
+def merge_series(paths, symbol, source, interval, store=None, out_path=None):
+    """Snapshots -> Store und/oder CSV (batchweise, konstanter Speicher). Rückgabe: Bericht als Dict"""
+    stats = {"files": len(paths), "rows": 0, "duplicates": 0, "conflicts": 0, "merged": 0}
+    gaps = GapTracker(symbol, source, interval)
+    writer = None
+    out_file = None
+    if out_path:
+        os.makedirs(os.path.dirname(out_path) or ".", exist_ok=True)
+        out_file = open(out_path, "w", newline="")
+        writer = csv.writer(out_file)
+        writer.writerow(EXPORT_HEADER)
+
+    def flush(rows, prev_close):
+        columns = np.array(rows, dtype=np.float64).T
+        ts = columns[0].astype(np.int64)
+        close = columns[5]
+        prev = np.concatenate(([prev_close], close[:-1]))
+        if np.isnan(prev[0]):  # Reihenanfang: prev_close aus dem Snapshot, sonst open
+            prev[0] = columns[7][0] if not np.isnan(columns[7][0]) else columns[2][0]
+        batch = CandleBatch(symbol, ts, columns[2], columns[3], columns[4], close, columns[6], prev)
+        if store is not None:
+            store.append(source, symbol, interval, batch)
+        if writer is not None:
+            writer.writerows(zip(
+                format_timestamps(ts), [symbol] * len(ts), batch.open, batch.high, batch.low, batch.close,
+                batch.prev_close, batch.close, batch.volume, batch.color,
+            ))
+        return float(close[-1])
+
+    try:
+        rows, prev_close = [], np.nan
+        for row in merge_rows(paths, stats):
+            gaps.add(row[0])
+            rows.append(row)
+            if len(rows) >= BATCH_ROWS:
+                prev_close = flush(rows, prev_close)
+                stats["merged"] += len(rows)
+                rows = []
+        if rows:
+            flush(rows, prev_close)
+            stats["merged"] += len(rows)
+    finally:
+        if out_file is not None:
+            out_file.close()
+
+    stats["gaps"] = len(gaps.gaps)
+    stats["missing"] = sum(g[2] for g in gaps.gaps)
+    stats["largest_gaps"] = [
+        {"from": str(format_timestamps([a])[0]), "to": str(format_timestamps([b])[0]), "missing": int(n)}
+        for a, b, n in sorted(gaps.gaps, key=lambda g: -g[2])[:10]
+    ]
+    return stats
+
+
+def print_report(source, symbol, interval, stats):
+    print(f"{source}/{symbol} {interval}: {stats['files']} Dateien, {stats['rows']} Zeilen gelesen -> "
+          f"{stats['merged']} Candles ({stats['duplicates']} Duplikate, {stats['conflicts']} Konflikte, neuere gewinnen)")
+    print(f"  Lücken: {stats['gaps']} ({stats['missing']} fehlende Candles)")
+    for gap in stats["largest_gaps"]:
+        print(f"    {gap['from']} -> {gap['to']}  ({gap['missing']} fehlend)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="CSV-Snapshots zu einer deduplizierten Candle-Reihe zusammenführen")
+    parser.add_argument("--source", choices=["binance", "yahoo"], action="append",
+                        help="Quelle (mehrfach möglich, Standard: beide)")
+    parser.add_argument("--symbol", help="nur dieses Symbol (Standard: alle)")
+    parser.add_argument("--interval", help="nur dieses Intervall (Standard: alle)")
+    parser.add_argument("--all", action="store_true", help="alle gefundenen Reihen zusammenführen")
+    parser.add_argument("--csv-folder", default="csv", help="Ordner mit binance/ und yahoo/")
+    parser.add_argument("--store", default=os.path.join("csv", "store"), help="Candle-Store als Ziel")
+    parser.add_argument("--no-store", action="store_true", help="nicht in den Candle-Store schreiben")
+    parser.add_argument("--format", choices=["npy", "gcs"], default="npy", help="Format der Tagesdateien im Store")
+    parser.add_argument("--out-folder", default=None, help="zusätzlich kanonische CSVs hierhin schreiben")
+    args = parser.parse_args()
+    if not args.symbol and not args.all:
+        parser.error("--symbol oder --all angeben")
+
+    store = None if args.no_store else CandleStore(args.store, fmt=args.format)
+    for source in args.source or ["binance", "yahoo"]:
+        groups = find_snapshots(args.csv_folder, source, args.symbol, args.interval)
+        for (symbol, interval), paths in sorted(groups.items()):
+            out_path = None
+            if args.out_folder:
+                out_path = os.path.join(args.out_folder, source, f"{symbol}-{interval}-merged.csv")
+            stats = merge_series(paths, symbol, source, interval, store, out_path)
+            print_report(source, symbol, interval, stats)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+# metrics.py
+import time
+import threading
+import contextvars
+from contextlib import contextmanager
+
+# Sekunden (Prometheus-Standard + längere Buckets für historische Downloads)
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# Labels des laufenden Requests (werden in Worker-Threads per copy_context mitgegeben)
+current_endpoint = contextvars.ContextVar("endpoint", default="-")
+current_source = contextvars.ContextVar("source", default="-")
+
+
+INF_LABEL = 'le="+Inf"'
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names, values, extra=None):
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Counter:
+    """Prometheus-Counter mit Labels (thread-safe)"""
+
+    def __init__(self, name, help_text, labelnames=()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self.values = {}
+        self.lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = tuple(labels.get(n, "-") for n in self.labelnames)
+        with self.lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self.lock:
+            for key, value in sorted(self.values.items()):
+                lines.append(f"{self.name}{_labels(self.labelnames, key)} {value}")
+        return lines
+
+
+class Histogram:
+    """Prometheus-Histogramm mit festen Buckets und Labels (thread-safe)"""
+
+    def __init__(self, name, help_text, labelnames=(), buckets=BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self.series = {}    # labels -> [bucket_counts, sum, count]
+        self.lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(labels.get(n, "-") for n in self.labelnames)
+        with self.lock:
+            series = self.series.get(key)
+            if series is None:
+                series = self.series[key] = [[0] * len(self.buckets), 0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[0][i] += 1
+                    break
+            series[1] += value
+            series[2] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self.lock:
+            for key, (counts, total, count) in sorted(self.series.items()):
+                cumulative = 0
+                for bound, n in zip(self.buckets, counts):
+                    cumulative += n
+                    le = 'le="%s"' % bound
+                    lines.append(f"{self.name}_bucket{_labels(self.labelnames, key, le)} {cumulative}")
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames, key, INF_LABEL)} {count}")
+                lines.append(f"{self.name}_sum{_labels(self.labelnames, key)} {total}")
+                lines.append(f"{self.name}_count{_labels(self.labelnames, key)} {count}")
+        return lines
+
+
+# --- Metriken der Candle-API ---
+REQUEST_SECONDS = Histogram(
+    "candle_api_request_seconds", "Dauer pro Request (bis die Antwort bereitsteht)", ("endpoint", "source", "status")
+)
+STAGE_SECONDS = Histogram(
+    "candle_api_stage_seconds", "Dauer pro Stage (upstream, rate_limit, cache, index, build, sort, print, webhook, serialize)",
+    ("endpoint", "source", "stage")
+)
+UPSTREAM_CALLS = Counter("candle_api_upstream_calls_total", "Upstream-Requests", ("source", "kind"))
+UPSTREAM_ERRORS = Counter("candle_api_upstream_errors_total", "Fehlgeschlagene Upstream-Requests", ("source", "kind"))
+
+REGISTRY = [REQUEST_SECONDS, STAGE_SECONDS, UPSTREAM_CALLS, UPSTREAM_ERRORS]
+
+
+def observe_stage(stage, seconds):
+    STAGE_SECONDS.observe(seconds, endpoint=current_endpoint.get(), source=current_source.get(), stage=stage)
+
+
+@contextmanager
+def span(stage):
+    """Zeit eines Abschnitts messen (Labels endpoint/source aus dem laufenden Request)"""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe_stage(stage, time.perf_counter() - started)
+
+
+def timed_iter(iterable, stage):
+    """Iterable durchlaufen, Zeit in next() summiert als eine Stage-Messung (z. B. Cache-Stream)"""
+    iterator = iter(iterable)
+    total = 0.0
+    try:
+        while True:
+            started = time.perf_counter()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+            finally:
+                total += time.perf_counter() - started
+            yield item
+    finally:
+        observe_stage(stage, total)
+
+
+@contextmanager
+def upstream_call(source, kind):
+    """Upstream-Request zählen (Fehler separat) und als Stage "upstream" messen"""
+    UPSTREAM_CALLS.inc(source=source, kind=kind)
+    try:
+        with span("upstream"):
+            yield
+    except Exception:
+        UPSTREAM_ERRORS.inc(source=source, kind=kind)
+        raise
+
+
+def render():
+    """Alle Metriken im Prometheus-Textformat"""
+    return "\n".join(line for metric in REGISTRY for line in metric.render()) + "\n"
@@ -0,0 +1,58 @@
+# quote_cache.py
+import time
+import threading
+import pandas as pd
+
+from chunk_planner import interval_ms
+
+
+class BarCache:
+    """
+    Read-through Cache der letzten Bars pro (symbol, interval).
+    TTL = Candle-Intervall (oder fest über ttl). Nach Ablauf werden nur Bars ab
+    dem gecachten Ende nachgeladen. Gleichzeitige Abfragen desselben Keys
+    warten auf denselben Upstream-Call.
+
+    fetch_fn(symbol, interval, start=None) -> DataFrame mit DatetimeIndex
+    (start=None = Erstabruf).
+    """
+
+    def __init__(self, fetch_fn, keep=100, ttl=None):
+        self.fetch_fn = fetch_fn
+        self.keep = keep
+        self.ttl = ttl
+        self.entries = {}   # key -> (fetched_at, DataFrame)
+        self.locks = {}
+        self.locks_lock = threading.Lock()
+
+    def _lock(self, key):
+        with self.locks_lock:
+            return self.locks.setdefault(key, threading.Lock())
+
+    def ttl_for(self, interval):
+        if self.ttl is not None:
+            return self.ttl
+        try:
+            return interval_ms(interval) / 1000
+        except ValueError:
+            return 60
+
+    def get(self, symbol, interval):
+        key = (symbol, interval)
+        with self._lock(key):
+            entry = self.entries.get(key)
+            if entry and time.monotonic() - entry[0] < self.ttl_for(interval):
+                return entry[1]
+
+            if entry is None or entry[1].empty:
+                bars = self.fetch_fn(symbol, interval)
+            else:
+                # Nur ab der letzten (evtl. noch offenen) Bar nachladen
+                cached = entry[1]
+                new = self.fetch_fn(symbol, interval, start=cached.index[-1])
+                bars = pd.concat([cached, new]) if not new.empty else cached
+                bars = bars[~bars.index.duplicated(keep="last")].sort_index()
+
+            bars = bars.iloc[-self.keep:]
+            self.entries[key] = (time.monotonic(), bars)
+            return bars
@@ -0,0 +1,91 @@
+# rate_limit.py
+import os
+import asyncio
+import threading
+import time
+
+
+class TokenBucket:
+    """
+    Einfacher Token-Bucket (thread-safe).
+    rate: Tokens pro Sekunde, capacity: maximaler Burst.
+    """
+
+    def __init__(self, rate, capacity):
+        self.rate = float(rate)
+        self.capacity = float(capacity)
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def try_acquire(self, tokens=1):
+        """Nicht blockierend: True wenn Tokens vorhanden waren"""
+        with self.lock:
+            self._refill()
+            if self.tokens >= tokens:
+                self.tokens -= tokens
+                return True
+            return False
+
+    def acquire(self, tokens=1):
+        """Blockiert, bis genug Tokens vorhanden sind"""
+        tokens = min(float(tokens), self.capacity)
+        while True:
+            wait = self._reserve(tokens)
+            if not wait:
+                return
+            time.sleep(wait)
+
+    def _reserve(self, tokens):
+        """Tokens abziehen wenn möglich, sonst Wartezeit in Sekunden zurückgeben"""
+        with self.lock:
+            self._refill()
+            if self.tokens >= tokens:
+                self.tokens -= tokens
+                return 0.0
+            return (tokens - self.tokens) / self.rate
+
+    async def acquire_async(self, tokens=1):
+        """Wie acquire, aber wartet mit asyncio.sleep (blockiert keinen Event-Loop)"""
+        tokens = min(float(tokens), self.capacity)
+        while True:
+            wait = self._reserve(tokens)
+            if not wait:
+                return
+            await asyncio.sleep(wait)
+
+
+# --- Limits pro Quelle ---
+# Binance: Request-Weight pro Minute (Standard 6000), Yahoo: Requests pro Sekunde (inoffizielles Throttling)
+BINANCE_WEIGHT_PER_MIN = float(os.getenv("BINANCE_WEIGHT_PER_MIN", 6000))
+YAHOO_REQUESTS_PER_SEC = float(os.getenv("YAHOO_REQUESTS_PER_SEC", 2))
+
+RATE_LIMITS = {
+    "binance": TokenBucket(rate=BINANCE_WEIGHT_PER_MIN / 60, capacity=BINANCE_WEIGHT_PER_MIN / 10),
+    "yahoo": TokenBucket(rate=YAHOO_REQUESTS_PER_SEC, capacity=max(1.0, YAHOO_REQUESTS_PER_SEC)),
+}
+
+# Gewicht eines Requests pro Quelle (Binance klines = 2)
+REQUEST_WEIGHT = {
+    "binance": 2,
+    "yahoo": 1,
+}
+
+
+def acquire(source, weight=None):
+    """Token für einen Upstream-Request der Quelle holen"""
+    bucket = RATE_LIMITS.get(source)
+    if bucket is not None:
+        bucket.acquire(REQUEST_WEIGHT.get(source, 1) if weight is None else weight)
+
+
+async def acquire_async(source, weight=None):
+    """acquire() für Coroutinen (async_api)"""
+    bucket = RATE_LIMITS.get(source)
+    if bucket is not None:
+        await bucket.acquire_async(REQUEST_WEIGHT.get(source, 1) if weight is None else weight)
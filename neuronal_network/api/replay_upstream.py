@@ -0,0 +1,286 @@
+# replay_upstream.py
+# Lokaler Upstream-Ersatz für Last-/Performance-Tests: beantwortet Binance-Klines (REST)
+# und Yahoo-Chart-Anfragen aus den CSVs in csv/binance und csv/yahoo.
+#   Server:  python neuronal_network/api/replay_upstream.py
+#   API:     REPLAY_URL=http://127.0.0.1:8766 (flask_api / async_api nutzen dann die Replay-Clients)
+import os
+import glob
+import json
+import time
+import random
+import threading
+import numpy as np
+import pandas as pd
+import requests
+
+from chunk_planner import interval_ms, parse_period
+from candle_cache import combine_frames, read_candle_csv, yahoo_tz
+from rate_limit import TokenBucket
+
+WEEK_MS = 7 * 86_400_000
+
+
+# ---------------------------
+# --- Daten ---
+# ---------------------------
+
+class ReplaySeries:
+    """Candles eines (source, symbol, interval) als Arrays (ts in Epoch-ms, OHLCV float)"""
+
+    def __init__(self, frame, shift_ms=0):
+        self.ts = frame.index.as_unit("ms").asi8 + shift_ms
+        self.ohlcv = frame[["open", "high", "low", "close", "volume"]].to_numpy(dtype=float)
+
+    def select(self, start_ms=None, end_ms=None, limit=None, newest=False):
+        """Zeilen mit start_ms <= ts <= end_ms (newest = die letzten limit statt der ersten)"""
+        lo = 0 if start_ms is None else self.ts.searchsorted(start_ms)
+        hi = len(self.ts) if end_ms is None else self.ts.searchsorted(end_ms, side="right")
+        if limit is not None:
+            if newest:
+                lo = max(lo, hi - limit)
+            else:
+                hi = min(hi, lo + limit)
+        return self.ts[lo:hi], self.ohlcv[lo:hi]
+
+
+class ReplayData:
+    """
+    Lädt alle CSV-Exporte pro (source, symbol, interval) bei Bedarf.
+    shift: Daten so verschieben, dass die letzte Candle in der Gegenwart liegt
+    (Binance um ganze Intervalle, Yahoo um ganze Wochen -> Wochentage/Handelszeiten bleiben).
+    """
+
+    def __init__(self, csv_folder="csv", shift=True):
+        self.csv_folder = csv_folder
+        self.shift = shift
+        self.series = {}
+        self.lock = threading.Lock()
+
+    def get(self, source, symbol, interval):
+        key = (source, symbol, interval)
+        with self.lock:
+            if key not in self.series:
+                self.series[key] = self._load(*key)
+            return self.series[key]
+
+    def _load(self, source, symbol, interval):
+        pattern = os.path.join(self.csv_folder, source, f"{symbol}-{interval}-*.csv")
+        frames = []
+        for path in sorted(glob.glob(pattern)):
+            try:
+                frames.append(read_candle_csv(path, source, symbol))
+            except (ValueError, KeyError):
+                continue
+        frames = [f for f in frames if not f.empty]
+        if not frames:
+            return None
+        frame = combine_frames(frames)
+
+        shift_ms = 0
+        if self.shift:
+            now_ms = int(time.time() * 1000)
+            last_ms = int(frame.index[-1:].as_unit("ms").asi8[0])
+            if source == "binance":
+                step = interval_ms(interval)
+                shift_ms = now_ms // step * step - last_ms
+            else:
+                shift_ms = (now_ms - last_ms) // WEEK_MS * WEEK_MS
+        return ReplaySeries(frame, shift_ms)
+
+
+# ---------------------------
+# --- Server ---
+# ---------------------------
+
+def binance_klines(ts, ohlcv, step_ms):
+    """Arrays -> Binance-Kline-Zeilen (Strings wie die echte API)"""
+    return [
+        [int(t), repr(o), repr(h), repr(l), repr(c), repr(v), int(t) + step_ms - 1, "0", 0, "0", "0", "0"]
+        for t, (o, h, l, c, v) in zip(ts.tolist(), ohlcv.tolist())
+    ]
+
+
+def yahoo_chart(symbol, interval, ts, ohlcv):
+    """Arrays -> Yahoo /v8/finance/chart Antwort"""
+    return {"chart": {"result": [{
+        "meta": {
+            "symbol": symbol,
+            "exchangeTimezoneName": yahoo_tz(symbol),
+            "dataGranularity": interval,
+        },
+        "timestamp": (ts // 1000).tolist(),
+        "indicators": {"quote": [{
+            "open": ohlcv[:, 0].tolist(),
+            "high": ohlcv[:, 1].tolist(),
+            "low": ohlcv[:, 2].tolist(),
+            "close": ohlcv[:, 3].tolist(),
+            "volume": ohlcv[:, 4].tolist(),
+        }]},
+    }], "error": None}}
+
+
+def create_replay_app(data, latency_ms=0, jitter_ms=0, error_rate=0.0, throttle_rate=0.0, max_rps=0, seed=None):
+    """
+    aiohttp-App mit Binance- und Yahoo-Routen.
+    latency_ms/jitter_ms: Antwortverzögerung (gleichverteilt latency ± jitter)
+    error_rate:    Anteil Antworten mit HTTP 500
+    throttle_rate: Anteil Antworten mit HTTP 429 (zufällig)
+    max_rps:       Requests pro Sekunde, darüber HTTP 429 (0 = unbegrenzt)
+    seed:          Zufallsfolge reproduzierbar machen
+    """
+    import asyncio
+    from aiohttp import web
+
+    rng = random.Random(seed)
+    bucket = TokenBucket(max_rps, max_rps) if max_rps else None
+    counters = {"requests": 0, "errors": 0, "throttled": 0}
+
+    def error_response(request, status):
+        if request.path.startswith("/api/"):
+            msg = "Too many requests; current limit is exceeded." if status == 429 else "Internal error; unable to process your request."
+            body = {"code": -1003 if status == 429 else -1000, "msg": msg}
+        else:
+            body = {"chart": {"result": None, "error": {"code": str(status), "description": "Too Many Requests" if status == 429 else "Internal Server Error"}}}
+        headers = {"Retry-After": "1"} if status == 429 else None
+        return web.json_response(body, status=status, headers=headers)
+
+    @web.middleware
+    async def faults(request, handler):
+        counters["requests"] += 1
+        delay = latency_ms + rng.uniform(-jitter_ms, jitter_ms)
+        if delay > 0:
+            await asyncio.sleep(delay / 1000)
+        if (bucket is not None and not bucket.try_acquire()) or rng.random() < throttle_rate:
+            counters["throttled"] += 1
+            return error_response(request, 429)
+        if rng.random() < error_rate:
+            counters["errors"] += 1
+            return error_response(request, 500)
+        return await handler(request)
+
+    routes = web.RouteTableDef()
+
+    @routes.get("/api/v3/ping")
+    async def ping(request):
+        return web.json_response({})
+
+    @routes.get("/api/v3/klines")
+    async def klines(request):
+        q = request.query
+        symbol, interval = q.get("symbol", ""), q.get("interval", "1m")
+        series = data.get("binance", symbol, interval)
+        if series is None:
+            return web.json_response({"code": -1121, "msg": "Invalid symbol."}, status=400)
+        limit = min(int(q.get("limit", 500)), 1000)
+        start = int(q["startTime"]) if "startTime" in q else None
+        end = int(q["endTime"]) if "endTime" in q else int(time.time() * 1000)
+        ts, ohlcv = series.select(start, end, limit, newest=start is None)
+        return web.json_response(binance_klines(ts, ohlcv, interval_ms(interval)))
+
+    @routes.get("/v8/finance/chart/{symbol}")
+    async def chart(request):
+        q = request.query
+        symbol, interval = request.match_info["symbol"], q.get("interval", "1d")
+        series = data.get("yahoo", symbol, interval)
+        if series is None:
+            return web.json_response(
+                {"chart": {"result": None, "error": {"code": "Not Found", "description": "No data found, symbol may be delisted"}}},
+                status=404,
+            )
+        end = int(q["period2"]) * 1000 if "period2" in q else int(time.time() * 1000)
+        if "period1" in q:
+            start = int(q["period1"]) * 1000
+        else:
+            # range ("1d", "5d", "1mo", "max") relativ zur letzten verfügbaren Candle
+            last = series.select(None, end, 1, newest=True)[0]
+            anchor = int(last[0]) if len(last) else end
+            period = q.get("range", "1mo")
+            start = None if period == "max" else anchor - parse_period(period) * 86_400_000
+        ts, ohlcv = series.select(start, end - 1)
+        return web.json_response(yahoo_chart(symbol, interval, ts, ohlcv))
+
+    @routes.get("/replay/stats")
+    async def stats(request):
+        return web.json_response(counters)
+
+    app = web.Application(middlewares=[faults])
+    app.add_routes(routes)
+    return app
+
+
+# ---------------------------
+# --- Clients ---
+# ---------------------------
+
+class ReplayBinanceClient:
+    """Ersatz für binance.client.Client (nur get_klines), ohne Netzwerk-Ping beim Start"""
+    KLINE_INTERVAL_1MINUTE = "1m"
+
+    def __init__(self, url, timeout=10):
+        self.url = url.rstrip("/")
+        self.timeout = timeout
+        self.session = requests.Session()
+
+    def get_klines(self, **params):
+        resp = self.session.get(f"{self.url}/api/v3/klines", params=params, timeout=self.timeout)
+        if resp.status_code != 200:
+            try:
+                msg = resp.json().get("msg")
+            except ValueError:
+                msg = resp.text
+            raise ValueError(f"Binance API Fehler {resp.status_code}: {msg}")
+        return resp.json()
+
+
+class ReplayTicker:
+    """Ersatz für yfinance.Ticker (nur history) gegen den Replay-Server"""
+    _session = requests.Session()
+
+    def __init__(self, symbol, url, timeout=10):
+        self.ticker = symbol
+        self.url = url.rstrip("/")
+        self.timeout = timeout
+
+    def history(self, period="1mo", interval="1d", start=None, end=None, **kwargs):
+        params = {"interval": interval}
+        if start is not None:
+            params["period1"] = int(_utc(start).timestamp())
+            params["period2"] = int(_utc(end).timestamp()) if end is not None else int(time.time())
+        else:
+            params["range"] = period
+        resp = self._session.get(f"{self.url}/v8/finance/chart/{self.ticker}", params=params, timeout=self.timeout)
+        if resp.status_code == 404:
+            return pd.DataFrame(columns=["Open", "High", "Low", "Close", "Volume"])
+        if resp.status_code != 200:
+            raise ValueError(f"Yahoo Fehler {resp.status_code} für {self.ticker}")
+
+        result = resp.json()["chart"]["result"][0]
+        quote = result["indicators"]["quote"][0]
+        index = pd.to_datetime(np.asarray(result.get("timestamp", []), dtype="int64"), unit="s", utc=True)
+        return pd.DataFrame({
+            "Open": quote["open"],
+            "High": quote["high"],
+            "Low": quote["low"],
+            "Close": quote["close"],
+            "Volume": quote["volume"],
+        }, index=index.tz_convert(result["meta"]["exchangeTimezoneName"]).rename("Datetime"), dtype=float)
+
+
+def _utc(ts):
+    ts = pd.Timestamp(ts)
+    return ts.tz_localize("UTC") if ts.tzinfo is None else ts
+
+
+if __name__ == "__main__":
+    from aiohttp import web
+
+    app = create_replay_app(
+        ReplayData(os.getenv("REPLAY_CSV_FOLDER", "csv"), shift=os.getenv("REPLAY_SHIFT", "1") != "0"),
+        latency_ms=float(os.getenv("REPLAY_LATENCY_MS", 0)),
+        jitter_ms=float(os.getenv("REPLAY_JITTER_MS", 0)),
+        error_rate=float(os.getenv("REPLAY_ERROR_RATE", 0)),
+        throttle_rate=float(os.getenv("REPLAY_429_RATE", 0)),
+        max_rps=float(os.getenv("REPLAY_MAX_RPS", 0)),
+        seed=int(os.environ["REPLAY_SEED"]) if os.getenv("REPLAY_SEED") else None,
+    )
+    web.run_app(app, host="127.0.0.1", port=int(os.getenv("REPLAY_PORT", 8766)))
@@ -0,0 +1,135 @@
+# single_flight.py
+import time
+import asyncio
+import inspect
+import threading
+import functools
+
+
+def call_key(fn, signature, args, kwargs):
+    """Key = Funktionsname + gebundene Argumente (inkl. Defaults)"""
+    bound = signature.bind(*args, **kwargs)
+    bound.apply_defaults()
+    return (fn.__name__,) + tuple(bound.arguments.items())
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.finished_at = 0.0
+
+
+class SingleFlight:
+    """
+    Gleichzeitige identische Aufrufe teilen sich einen laufenden Upstream-Fetch.
+    reuse_window: Sekunden, in denen ein gerade fertiges Ergebnis noch wiederverwendet wird (0 = aus).
+
+    Zähler:
+      miss      -> Aufruf hat selbst geholt
+      coalesced -> Aufruf hat auf einen laufenden Fetch gewartet
+      hit       -> Ergebnis aus dem reuse_window
+    Das geteilte Ergebnis darf vom Aufrufer nicht verändert werden.
+    """
+
+    def __init__(self, reuse_window=0.0):
+        self.reuse_window = reuse_window
+        self.calls = {}     # key -> _Call (laufend oder kürzlich fertig)
+        self.lock = threading.Lock()
+        self.counters = {"hit": 0, "miss": 0, "coalesced": 0}
+
+    def do(self, key, fn, *args, **kwargs):
+        with self.lock:
+            call = self.calls.get(key)
+            if call is not None and not call.done.is_set():
+                self.counters["coalesced"] += 1
+                leader = False
+            elif call is not None and time.monotonic() - call.finished_at < self.reuse_window and call.error is None:
+                self.counters["hit"] += 1
+                return call.result
+            else:
+                call = _Call()
+                self.calls[key] = call
+                self.counters["miss"] += 1
+                leader = True
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn(*args, **kwargs)
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            call.finished_at = time.monotonic()
+            with self.lock:
+                if not self.reuse_window or call.error is not None:
+                    self.calls.pop(key, None)
+            call.done.set()
+        return call.result
+
+    def wrap(self, fn):
+        """Decorator: Key = Funktionsname + gebundene Argumente (inkl. Defaults)"""
+        signature = inspect.signature(fn)
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            return self.do(call_key(fn, signature, args, kwargs), fn, *args, **kwargs)
+        return wrapper
+
+    def stats(self):
+        with self.lock:
+            return dict(self.counters, in_flight=sum(not c.done.is_set() for c in self.calls.values()))
+
+
+class AsyncSingleFlight:
+    """
+    SingleFlight für Coroutinen (ein Event-Loop): Wartende teilen sich einen Task.
+    Läuft ein Wartender in ein Timeout, wird der geteilte Task nicht abgebrochen.
+    """
+
+    def __init__(self, reuse_window=0.0):
+        self.reuse_window = reuse_window
+        self.calls = {}     # key -> (Task, finished_at)
+        self.counters = {"hit": 0, "miss": 0, "coalesced": 0}
+
+    def _finished(self, key, task):
+        if self.calls.get(key, (None,))[0] is not task:
+            return
+        if not self.reuse_window or task.cancelled() or task.exception() is not None:
+            self.calls.pop(key, None)
+        else:
+            self.calls[key] = (task, time.monotonic())
+
+    async def do(self, key, fn, *args, **kwargs):
+        entry = self.calls.get(key)
+        if entry is not None and not entry[0].done():
+            self.counters["coalesced"] += 1
+            return await asyncio.shield(entry[0])
+        # finished_at fehlt noch, solange der done-Callback nicht gelaufen ist -> neu holen
+        if entry is not None and entry[1] is not None and time.monotonic() - entry[1] < self.reuse_window:
+            self.counters["hit"] += 1
+            return entry[0].result()
+
+        self.counters["miss"] += 1
+        task = asyncio.ensure_future(fn(*args, **kwargs))
+        self.calls[key] = (task, None)
+        task.add_done_callback(lambda t: self._finished(key, t))
+        return await asyncio.shield(task)
+
+    def wrap(self, fn):
+        """Decorator für async def (Key wie bei SingleFlight.wrap)"""
+        signature = inspect.signature(fn)
+
+        @functools.wraps(fn)
+        async def wrapper(*args, **kwargs):
+            return await self.do(call_key(fn, signature, args, kwargs), fn, *args, **kwargs)
+        return wrapper
+
+    def stats(self):
+        return dict(self.counters, in_flight=sum(not task.done() for task, _ in self.calls.values()))
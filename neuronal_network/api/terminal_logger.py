@@ -0,0 +1,141 @@
+# terminal_logger.py
+import sys
+import json
+import queue
+import threading
+from colorama import Fore, Style
+
+from rate_limit import TokenBucket
+
+FORMATS = ("tty", "plain", "jsonl")
+
+
+def format_candle(candle, label, fmt="tty"):
+    """Candle als Terminalzeile (tty = farbig, plain = ohne Farben, jsonl = JSON)"""
+    ts = candle.get("timestamp")
+    o = candle.get("open")
+    c = candle.get("close")
+    h = candle.get("high")
+    l = candle.get("low")
+    v = candle.get("volume", 0)
+
+    if fmt == "jsonl":
+        return json.dumps({"label": label.strip("[]"), "symbol": candle.get("symbol"), "timestamp": ts,
+                           "open": o, "high": h, "low": l, "close": c, "volume": v})
+
+    # Open/Close Pfeil
+    if c > o:
+        oc_color = Fore.GREEN
+        arrow = "↑"
+    elif c < o:
+        oc_color = Fore.RED
+        arrow = "↓"
+    else:
+        oc_color = Fore.YELLOW
+        arrow = "→"
+
+    if fmt == "plain":
+        return (f"{label} {ts} | {arrow} Open:{o:.2f} Close:{c:.2f} "
+                f"High:{h:.2f} Low:{l:.2f} Vol:{v:.2f}")
+
+    # Label-Farbe
+    if label in ["[LIVE]", "LIVE"]:
+        lbl_color = Fore.CYAN
+    elif label in ["[TRAIN]", "[TRAIN_MODE]"]:
+        lbl_color = Fore.MAGENTA
+    else:
+        lbl_color = Fore.WHITE
+
+    # High/Low Farben
+    high_color = Fore.GREEN if h > o else Fore.RED if h < o else Fore.YELLOW
+    low_color = Fore.GREEN if l > o else Fore.RED if l < o else Fore.YELLOW
+
+    return (f"{lbl_color}{label}{Style.RESET_ALL} {ts} | {arrow} "
+            f"Open:{oc_color}{o:.2f}{Style.RESET_ALL} "
+            f"Close:{oc_color}{c:.2f}{Style.RESET_ALL} "
+            f"High:{high_color}{h:.2f}{Style.RESET_ALL} "
+            f"Low:{low_color}{l:.2f}{Style.RESET_ALL} "
+            f"Vol:{v:.2f}")
+
+
+class TerminalLogger:
+    """
+    Terminal-Ausgabe in eigenem Thread: Request-Handler reihen nur ein.
+    Volle Queue oder zu viele Zeilen pro Symbol -> Zeile wird verworfen (gezählt).
+    Nicht formatierbare Candles und Schreibfehler zählen als errors, der Thread läuft weiter.
+    rate_per_symbol: Zeilen pro Sekunde und Symbol (None = unbegrenzt)
+    """
+
+    def __init__(self, fmt=None, max_queue=10000, rate_per_symbol=None, burst=10, stream=None):
+        self.stream = stream or sys.stdout
+        if fmt is None:
+            fmt = "tty" if self.stream.isatty() else "plain"
+        if fmt not in FORMATS:
+            raise ValueError(f"Unbekanntes Format: {fmt} (erlaubt: {FORMATS})")
+        self.fmt = fmt
+        self.queue = queue.Queue(maxsize=max_queue)
+        self.rate_per_symbol = rate_per_symbol
+        self.burst = burst
+        self.buckets = {}
+        self.lock = threading.Lock()
+        self.counters = {"logged": 0, "dropped": 0, "rate_limited": 0, "errors": 0}
+        self.thread = None
+
+    def start(self):
+        self.thread = threading.Thread(target=self._run, daemon=True, name="terminal-logger")
+        self.thread.start()
+        return self
+
+    def _allowed(self, symbol):
+        if not self.rate_per_symbol:
+            return True
+        with self.lock:
+            bucket = self.buckets.get(symbol)
+            if bucket is None:
+                bucket = self.buckets[symbol] = TokenBucket(self.rate_per_symbol, self.burst)
+        return bucket.try_acquire()
+
+    def _count(self, name, n=1):
+        # log_candle läuft in vielen Request-Threads gleichzeitig
+        with self.lock:
+            self.counters[name] += n
+
+    def log_candle(self, candle, label):
+        """Nur einreihen, Formatierung + Schreiben im Logger-Thread"""
+        if not self._allowed(candle.get("symbol")):
+            self._count("rate_limited")
+            return
+        try:
+            self.queue.put_nowait((candle, label))
+        except queue.Full:
+            self._count("dropped")
+
+    def _run(self):
+        while True:
+            lines = [self.queue.get()]
+            # Alles, was schon wartet, in einem write() ausgeben
+            while len(lines) < 1000:
+                try:
+                    lines.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            text = []
+            for candle, label in lines:
+                try:
+                    text.append(format_candle(candle, label, self.fmt))
+                except Exception:
+                    self._count("errors")  # z.B. fehlende/ungültige Werte
+            if not text:
+                continue
+            try:
+                self.stream.write("\n".join(text) + "\n")
+                self.stream.flush()
+            except Exception:
+                self._count("errors", len(text))
+                continue
+            self._count("logged", len(text))
+
+    def stats(self):
+        with self.lock:
+            counters = dict(self.counters)
+        return dict(counters, queue_depth=self.queue.qsize(), format=self.fmt)
@@ -0,0 +1,6 @@
+# conftest.py
+# Die API-Module importieren sich gegenseitig flach (from candles import ...) -> API-Ordner in den Pfad
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,116 @@
+# test_candle_cache.py
+# CandleCache.get_range/iter_range: Abdeckung nur zusammen mit den Daten übernehmen, CSV-Seed, offene Candle, LRU, Streaming
+import os
+import pandas as pd
+import pytest
+
+from candle_cache import CandleCache
+
+END = pd.Timestamp("2025-01-10", tz="UTC")
+KEY = ("binance", "TESTUSDT", "1m")
+
+
+def frame(start, end):
+    index = pd.date_range(start, end, freq="min", inclusive="left")
+    return pd.DataFrame({col: 1.0 for col in ("open", "high", "low", "close", "volume")}, index=index)
+
+
+def test_failed_gap_leaves_cache_unchanged(tmp_path):
+    cache = CandleCache(str(tmp_path))
+    # mittlere Stunde abdecken -> danach zwei Lücken
+    cache.get_range(*KEY, END - pd.Timedelta(hours=2), END - pd.Timedelta(hours=1), lambda a, b: [frame(a, b)])
+    ranges, rows = [list(r) for r in cache.ranges[KEY]], len(cache.frames[KEY])
+
+    calls = []
+
+    def fetch_missing(gap_start, gap_end):
+        calls.append(gap_start)
+        if len(calls) == 2:
+            raise ValueError("Upstream-Fehler")
+        return [frame(gap_start, gap_end)]
+
+    with pytest.raises(ValueError):
+        cache.get_range(*KEY, END - pd.Timedelta(hours=3), END, fetch_missing)
+    assert len(calls) == 2
+    assert cache.ranges[KEY] == ranges
+    assert len(cache.frames[KEY]) == rows
+
+    # nächster Versuch holt beide Lücken erneut, Bereiche sortiert und zusammengefasst
+    result = cache.get_range(*KEY, END - pd.Timedelta(hours=3), END, lambda a, b: [frame(a, b)])
+    assert len(result) == 180
+    assert cache.ranges[KEY] == [[int((END - pd.Timedelta(hours=3)).timestamp() * 1000), int(END.timestamp() * 1000)]]
+
+
+def write_csv(folder, df, name):
+    os.makedirs(os.path.join(folder, "binance"), exist_ok=True)
+    out = df.reset_index(names="timestamp")
+    out["timestamp"] = out["timestamp"].dt.strftime("%Y-%m-%d %H:%M:%S")
+    out.to_csv(os.path.join(folder, "binance", f"TESTUSDT-1m-{name}.csv"), index=False)
+
+
+def test_seed_from_csv_fetches_holes(tmp_path):
+    # Binance-Exporte sind naive UTC
+    start, end = (END - pd.Timedelta(hours=2)).tz_localize(None), (END - pd.Timedelta(hours=1)).tz_localize(None)
+    hole = (start + pd.Timedelta(minutes=30), start + pd.Timedelta(minutes=33))
+    df = frame(start, end)
+    write_csv(str(tmp_path / "csv"), df.drop(df.index[30:33]), "1h")
+
+    cache = CandleCache(str(tmp_path / "cache"), csv_folder=str(tmp_path / "csv"))
+    calls = []
+
+    def fetch_missing(gap_start, gap_end):
+        calls.append((gap_start, gap_end))
+        return [frame(gap_start, gap_end)]
+
+    result = cache.get_range(*KEY, start, end, fetch_missing)
+    assert calls == [hole]
+    assert len(result) == 60
+
+
+def test_open_candle_only_not_saved(tmp_path):
+    cache = CandleCache(str(tmp_path))
+    now = END + pd.Timedelta(seconds=30)
+    cache.get_range(*KEY, END - pd.Timedelta(hours=1), now, lambda a, b: [frame(a, b + pd.Timedelta(minutes=1))])
+    pkl = cache._paths(KEY)[0]
+    mtime, rows = os.stat(pkl).st_mtime_ns, len(cache.frames[KEY])
+
+    calls = []
+
+    def fetch_missing(gap_start, gap_end):
+        calls.append(gap_start)
+        latest = frame(END, END + pd.Timedelta(minutes=1))
+        latest["close"] = 2.0
+        return [latest]
+
+    result = cache.get_range(*KEY, END - pd.Timedelta(hours=1), now, fetch_missing)
+    assert calls == [END]
+    assert len(result) == 61 and result["close"].iloc[-1] == 2.0
+    assert os.stat(pkl).st_mtime_ns == mtime
+    assert len(cache.frames[KEY]) == rows
+
+
+def test_frames_lru_evicts_oldest(tmp_path):
+    cache = CandleCache(str(tmp_path), max_series=2)
+    for symbol in ("AUSDT", "BUSDT", "CUSDT"):
+        cache.get_range("binance", symbol, "1m", END - pd.Timedelta(hours=1), END, lambda a, b: [frame(a, b)])
+    assert list(cache.frames) == [("binance", "BUSDT", "1m"), ("binance", "CUSDT", "1m")]
+    assert list(cache.ranges) == list(cache.frames)
+    # verdrängte Reihe kommt ohne Nachladen von der Platte zurück
+    result = cache.get_range("binance", "AUSDT", "1m", END - pd.Timedelta(hours=1), END, lambda a, b: 1 / 0)
+    assert len(result) == 60
+
+
+def test_iter_range_streams_cached_slices_before_gap(tmp_path):
+    cache = CandleCache(str(tmp_path))
+    cache.get_range(*KEY, END - pd.Timedelta(hours=2), END - pd.Timedelta(hours=1), lambda a, b: [frame(a, b)])
+    events = []
+
+    def fetch_missing(gap_start, gap_end):
+        events.append("fetch")
+        return [frame(gap_start, gap_end)]
+
+    for f in cache.iter_range(*KEY, END - pd.Timedelta(hours=2), END, fetch_missing, batch_size=25):
+        events.append(len(f))
+    # 60 gecachte Zeilen in 25er-Stücken, erst dann die Lücke
+    assert events == [25, 25, 10, "fetch", 25, 25, 10]
+    assert cache.ranges[KEY] == [[int((END - pd.Timedelta(hours=2)).timestamp() * 1000), int(END.timestamp() * 1000)]]
@@ -0,0 +1,46 @@
+# test_candle_store.py
+# CandleStore.append aus mehreren Threads auf dieselbe Reihe
+import os
+import threading
+import numpy as np
+import pytest
+
+from candle_store import STORE_DTYPE, STORE_FORMATS, CandleStore
+
+THREADS = 4
+APPENDS = 20
+ROWS = 50
+
+
+def rows_for(thread, n):
+    """Eigene, überlappungsfreie Minuten pro (Thread, Append) am selben Tag"""
+    rows = np.zeros(ROWS, dtype=STORE_DTYPE)
+    rows["ts"] = 1_700_000_000 // 86_400 * 86_400 + ((thread * APPENDS + n) * ROWS + np.arange(ROWS)) * 60
+    rows["close"] = rows["ts"]
+    return rows
+
+
+@pytest.mark.parametrize("fmt", list(STORE_FORMATS))
+def test_concurrent_appends_keep_all_rows(tmp_path, fmt):
+    store = CandleStore(str(tmp_path), fmt=fmt)
+    errors = []
+
+    def worker(thread):
+        try:
+            for n in range(APPENDS):
+                store.append("binance", "TESTUSDT", "1m", rows_for(thread, n))
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(THREADS)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert errors == []
+    rows = store.read_records("binance", "TESTUSDT", "1m")
+    assert len(rows) == THREADS * APPENDS * ROWS
+    assert np.all(np.diff(rows["ts"]) == 60)
+    folder = store.series_dir("binance", "TESTUSDT", "1m")
+    assert not [f for f in os.listdir(folder) if f.endswith(".tmp")]
@@ -0,0 +1,37 @@
+# test_live_hub.py
+# LiveHub: nur echte Änderungen veröffentlichen, Topics ohne Abonnenten entfernen
+import time
+
+from candles import build_candle
+from live_hub import LiveHub
+
+KEY = ("binance", "TESTUSDT", "1m")
+
+
+def wait_for(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+
+def test_publishes_only_changed_candles_and_drops_idle_topics():
+    closes = iter([1.0, 1.0, 1.0, 2.0])
+    polls = []
+
+    def fetch(source, symbol, interval):
+        polls.append(time.monotonic())
+        # Zeitstempel = now() wie bei den echten Live-Quellen
+        return build_candle(1.0, 2.0, 0.5, next(closes, 2.0), 10.0, symbol)
+
+    hub = LiveHub(fetch, poll_interval=0.01)
+    sub = hub.subscribe([KEY])
+    assert wait_for(lambda: len(polls) >= 5)
+    items = sub.drain()
+    assert [candle.close for _, candle in items] == [1.0, 2.0]
+
+    hub.unsubscribe(sub)
+    assert hub.stats() == {}
+    count = len(polls)
+    time.sleep(0.1)
+    assert len(polls) <= count + 1  # höchstens ein laufender Poll, danach Poller beendet
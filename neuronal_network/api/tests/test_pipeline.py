@@ -0,0 +1,201 @@
+# test_pipeline.py
+# Chunk-Planung, Rate-Limit und Reihenfolge der zusammengeführten Chunks gegen replay_upstream.py
+#   python -m pytest -q
+import os
+import time
+import socket
+import asyncio
+import threading
+import importlib
+import numpy as np
+import pandas as pd
+import pytest
+
+from chunk_planner import BINANCE_INTERVALS_MS, BINANCE_PAGE_LIMIT, binance_kline_count, plan_chunks
+from rate_limit import TokenBucket
+from replay_upstream import ReplayData, create_replay_app
+
+REPLAY_DAYS = 10
+REPLAY_LATENCY_MS = 20
+REPLAY_JITTER_MS = 20
+
+
+# ---------------------------
+# --- plan_chunks ---
+# ---------------------------
+
+@pytest.mark.parametrize("interval", ["1m", "5m", "1h", "1d", "1w", "1M"])
+def test_binance_pages_aligned_and_complete(interval):
+    start = pd.Timestamp("2021-03-07 13:37:21")
+    end = pd.Timestamp("2025-09-12 23:11:47") if interval not in ("1m", "5m") else start + pd.Timedelta(days=12)
+    start_ms, end_ms = int(start.timestamp() * 1000), int(end.timestamp() * 1000)
+    pages = plan_chunks("binance", interval, start, end)
+
+    klines = binance_kline_count(interval, start_ms, end_ms)
+    assert len(pages) == -(-klines // BINANCE_PAGE_LIMIT)
+
+    page_ms = [(int(a.timestamp() * 1000), int(b.timestamp() * 1000)) for a, b in pages]
+    assert page_ms[0][0] <= start_ms
+    assert page_ms[-1][1] == end_ms
+    for (a, b), (next_a, _) in zip(page_ms, page_ms[1:]):
+        assert b == next_a  # keine Lücke, keine Überlappung
+    for a, b in page_ms:
+        assert 0 < binance_kline_count(interval, a, b) <= BINANCE_PAGE_LIMIT
+        if interval == "1M":
+            assert pd.Timestamp(a, unit="ms") == pd.Timestamp(a, unit="ms").to_period("M").start_time
+        elif interval == "1w":
+            assert pd.Timestamp(a, unit="ms").dayofweek == 0 and a % 86_400_000 == 0  # Montag 00:00 UTC
+        else:
+            assert a % BINANCE_INTERVALS_MS[interval] == 0
+
+
+def test_binance_pages_full_except_last():
+    start = pd.Timestamp("2025-01-01 00:00:30")
+    pages = plan_chunks("binance", "1m", start, start + pd.Timedelta(minutes=2500))
+    counts = [binance_kline_count("1m", int(a.timestamp() * 1000), int(b.timestamp() * 1000)) for a, b in pages]
+    assert counts == [1000, 1000, 501]  # angebrochene erste Minute zählt mit
+
+
+def test_plan_chunks_empty_range():
+    now = pd.Timestamp("2025-01-01")
+    assert plan_chunks("binance", "1m", now, now) == []
+
+
+# ---------------------------
+# --- TokenBucket ---
+# ---------------------------
+
+def max_in_window(times, window):
+    """Maximale Anzahl Zeitpunkte in einem beliebigen Fenster der Länge window"""
+    times = np.sort(times)
+    return int((np.searchsorted(times, times + window, side="right") - np.arange(len(times))).max())
+
+
+def test_token_bucket_rate_ceiling_threads():
+    rate, capacity, n = 200, 5, 100
+    bucket = TokenBucket(rate, capacity)
+    times = []
+    lock = threading.Lock()
+
+    def worker():
+        for _ in range(n // 4):
+            bucket.acquire()
+            with lock:
+                times.append(time.monotonic())
+
+    started = time.monotonic()
+    threads = [threading.Thread(target=worker) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len(times) == n
+    assert time.monotonic() - started >= (n - capacity) / rate * 0.95
+    assert max_in_window(times, 0.1) <= capacity + rate * 0.1 + 1
+
+
+def test_token_bucket_rate_ceiling_async():
+    rate, capacity, n = 200, 5, 100
+    bucket = TokenBucket(rate, capacity)
+    times = []
+
+    async def worker():
+        for _ in range(n // 4):
+            await bucket.acquire_async()
+            times.append(time.monotonic())
+
+    async def main():
+        await asyncio.gather(*(worker() for _ in range(4)))
+
+    started = time.monotonic()
+    asyncio.run(main())
+    assert len(times) == n
+    assert time.monotonic() - started >= (n - capacity) / rate * 0.95
+    assert max_in_window(times, 0.1) <= capacity + rate * 0.1 + 1
+
+
+def test_token_bucket_weight_capped_at_capacity():
+    bucket = TokenBucket(rate=1000, capacity=3)
+    bucket.acquire(10)  # größer als der Burst -> darf nicht ewig warten
+    assert not bucket.try_acquire(1)
+
+
+# ---------------------------
+# --- fetch_candles_chunked gegen Replay-Upstream ---
+# ---------------------------
+
+def write_replay_csv(folder, symbol):
+    """REPLAY_DAYS Tage lückenlose 1m-Candles als CSV-Export"""
+    os.makedirs(os.path.join(folder, "binance"), exist_ok=True)
+    index = pd.date_range(end=pd.Timestamp.now().floor("min"), periods=REPLAY_DAYS * 1440, freq="min")
+    close = 100 + np.arange(len(index)) * 0.01
+    pd.DataFrame({
+        "timestamp": index.strftime("%Y-%m-%d %H:%M:%S"),
+        "open": close, "high": close + 1, "low": close - 1, "close": close, "volume": 1.0,
+    }).to_csv(os.path.join(folder, "binance", f"{symbol}-1m-{REPLAY_DAYS}d.csv"), index=False)
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+@pytest.fixture(scope="module")
+def replay_url(tmp_path_factory):
+    """Replay-Server mit Latenz ± Jitter in eigenem Thread/Event-Loop"""
+    from aiohttp import web
+
+    folder = str(tmp_path_factory.mktemp("replay_csv"))
+    write_replay_csv(folder, "TESTUSDT")
+    app = create_replay_app(
+        ReplayData(folder), latency_ms=REPLAY_LATENCY_MS, jitter_ms=REPLAY_JITTER_MS, seed=1
+    )
+    port = free_port()
+    loop = asyncio.new_event_loop()
+    runner = web.AppRunner(app)
+    loop.run_until_complete(runner.setup())
+    loop.run_until_complete(web.TCPSite(runner, "127.0.0.1", port).start())
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{port}"
+    asyncio.run_coroutine_threadsafe(runner.cleanup(), loop).result()
+    loop.call_soon_threadsafe(loop.stop)
+    thread.join()
+
+
+@pytest.fixture(scope="module")
+def servers(replay_url, tmp_path_factory):
+    """flask_api/async_api gegen den Replay-Server, ohne Cache/Store, csv/ im Temp-Ordner"""
+    with pytest.MonkeyPatch.context() as mp:
+        mp.chdir(tmp_path_factory.mktemp("api"))
+        mp.setenv("REPLAY_URL", replay_url)
+        mp.setenv("CANDLE_CACHE", "0")
+        mp.setenv("CANDLE_STORE", "0")
+        mp.setenv("LOG_FORMAT", "plain")
+        mp.setenv("CHUNK_WORKERS", "4")
+        yield importlib.import_module("flask_api"), importlib.import_module("async_api")
+
+
+def assert_merged_in_order(batch):
+    ts = batch.ts
+    assert len(ts) >= (REPLAY_DAYS - 3) * 1440 - 2  # period 7d
+    assert np.all(np.diff(ts) == 60)  # aufsteigend, ohne Duplikate und Lücken zwischen den Seiten
+    assert np.array_equal(batch.prev_close[1:], batch.close[:-1])  # prev_close auch über Seitengrenzen
+
+
+def test_fetch_candles_chunked_order_flask(servers):
+    flask_api, _ = servers
+    assert_merged_in_order(flask_api.fetch_candles_chunked("TESTUSDT", "binance", "1m", period="7d"))
+
+
+def test_fetch_candles_chunked_order_async(servers):
+    import aiohttp
+    _, async_api = servers
+
+    async def main():
+        async with aiohttp.ClientSession() as session:
+            return await async_api.fetch_candles_chunked(session, "TESTUSDT", "binance", "1m", period="7d")
+
+    assert_merged_in_order(asyncio.run(main()))
@@ -0,0 +1,129 @@
+# webhook_publisher.py
+import time
+import atexit
+import threading
+from collections import deque
+import requests
+from requests.adapters import HTTPAdapter
+
+POLICIES = ("drop_oldest", "block")
+
+
+class WebhookPublisher:
+    """
+    Hintergrund-Publisher: Candles landen in einer begrenzten Queue und werden
+    pro Flush-Intervall als ein POST (Liste von {symbol: candle}) gesendet.
+
+    policy bei voller Queue:
+      drop_oldest -> älteste Candle verwerfen
+      block       -> Aufrufer wartet max. block_timeout (Backpressure), danach verwerfen
+    """
+
+    def __init__(self, url, max_queue=1000, flush_interval=1.0, max_batch=500,
+                 policy="drop_oldest", block_timeout=0.5, timeout=2):
+        if policy not in POLICIES:
+            raise ValueError(f"Unbekannte Policy: {policy} (erlaubt: {POLICIES})")
+        self.url = url
+        self.max_queue = max_queue
+        self.flush_interval = flush_interval
+        self.max_batch = max_batch
+        self.policy = policy
+        self.block_timeout = block_timeout
+        self.timeout = timeout
+
+        self.queue = deque()
+        self.cond = threading.Condition()
+        self.closed = False
+        self.thread = None
+
+        # Gepoolte Verbindungen (Keep-Alive)
+        self.session = requests.Session()
+        self.session.mount("http://", HTTPAdapter(pool_connections=1, pool_maxsize=2))
+        self.session.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=2))
+
+        self.counters = {"enqueued": 0, "delivered": 0, "dropped": 0, "failed": 0, "batches": 0}
+        self.latencies = deque(maxlen=1000)  # Sekunden von publish bis Zustellung
+
+    def start(self):
+        self.thread = threading.Thread(target=self._run, daemon=True, name="webhook")
+        self.thread.start()
+        atexit.register(self.close)
+        return self
+
+    def publish(self, symbol, candle):
+        """Candle einreihen (nicht blockierend bei drop_oldest). False = verworfen"""
+        item = (time.monotonic(), {symbol: candle})
+        with self.cond:
+            if len(self.queue) >= self.max_queue:
+                if self.policy == "drop_oldest":
+                    self.queue.popleft()
+                    self.counters["dropped"] += 1
+                else:
+                    deadline = time.monotonic() + self.block_timeout
+                    while len(self.queue) >= self.max_queue and not self.closed:
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            self.counters["dropped"] += 1
+                            return False
+                        self.cond.wait(remaining)
+            self.queue.append(item)
+            self.counters["enqueued"] += 1
+            if len(self.queue) >= self.max_batch:
+                self.cond.notify_all()
+        return True
+
+    def _send(self, batch):
+        try:
+            payload = [
+                {symbol: candle.to_dict() if hasattr(candle, "to_dict") else candle for symbol, candle in item.items()}
+                for _, item in batch
+            ]
+            resp = self.session.post(self.url, json=payload, timeout=self.timeout)
+            resp.raise_for_status()
+        except Exception as e:
+            self.counters["failed"] += len(batch)
+            print(f"[Webhook Error] {e}")
+            return
+        now = time.monotonic()
+        self.latencies.extend(now - queued_at for queued_at, _ in batch)
+        self.counters["delivered"] += len(batch)
+        self.counters["batches"] += 1
+
+    def _run(self):
+        while True:
+            with self.cond:
+                # Bis Flush-Intervall vorbei oder ein voller Batch bereit ist
+                deadline = time.monotonic() + self.flush_interval
+                while len(self.queue) < self.max_batch and not self.closed:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self.cond.wait(remaining)
+                batch = [self.queue.popleft() for _ in range(min(self.max_batch, len(self.queue)))]
+                self.cond.notify_all()  # Platz für blockierte publish()-Aufrufe
+                finished = self.closed and not self.queue
+            if batch:
+                self._send(batch)
+            if finished:
+                return
+
+    def close(self, timeout=5):
+        """Restliche Candles senden und Thread beenden"""
+        with self.cond:
+            self.closed = True
+            self.cond.notify_all()
+        if self.thread is not None:
+            self.thread.join(timeout)
+
+    def stats(self):
+        with self.cond:
+            depth = len(self.queue)
+        latencies = sorted(self.latencies)
+        latency = {}
+        if latencies:
+            latency = {
+                "avg": sum(latencies) / len(latencies),
+                "p95": latencies[int(0.95 * (len(latencies) - 1))],
+                "max": latencies[-1],
+            }
+        return dict(self.counters, queue_depth=depth, policy=self.policy, delivery_latency=latency)
@@ -1,11 +1,202 @@
+import os
+import re
+import sys
+import json
+import time
+import tempfile
+import importlib
+from contextlib import contextmanager
+import numpy as np
 import pandas as pd
 
-def load_csv(symbol: str, interval: str, period: str):
+# Candle-Store der API (csv/store, siehe neuronal_network/api/candle_store.py)
+API_DIR = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "api"))
+REPO_DIR = os.path.abspath(os.path.join(API_DIR, "..", ".."))
+STORE_FOLDER = os.getenv("CANDLE_STORE_FOLDER", os.path.join(REPO_DIR, "csv", "store"))
+ARRAY_FOLDER = os.getenv("CANDLE_ARRAY_FOLDER", os.path.join(REPO_DIR, "csv", "arrays"))
+LOCK_STALE_SECONDS = 600  # Lock-Datei älter -> Umwandlung gilt als abgebrochen
+
+# Spalten der typisierten Arrays (eine .npy pro Spalte, ts = Epoch-Sekunden Wanduhrzeit)
+ARRAY_DTYPES = {
+    "ts": np.int64,
+    "open": np.float32,
+    "high": np.float32,
+    "low": np.float32,
+    "close": np.float32,
+    "prev_close": np.float32,
+    "volume": np.float32,
+    "label": np.int8,  # 1 = grün
+}
+FEATURES = ['open','high','low','close','prev_close','current_close','volume']
+
+
+def api_module(name: str):
+    """Modul der API (flache Imports wie from candles import ...) erst bei Bedarf laden"""
+    if API_DIR not in sys.path:
+        sys.path.append(API_DIR)
+    return importlib.import_module(name)
+
+
+def format_timestamps(seconds):
+    """candles.format_timestamps: Epoch-Sekunden -> "YYYY-MM-DD HH:MM:SS" (vektorisiert)"""
+    return api_module("candles").format_timestamps(seconds)
+
+
+def csv_symbol(csv_name: str):
+    """BTCUSDT-1m-1mo-binance-....csv -> BTCUSDT, BTC-USD-1m-7d-....csv -> BTC-USD"""
+    match = re.match(r"(.+?)-\d+(?:mo|wk|[smhd])-", os.path.basename(csv_name))
+    return match.group(1) if match else os.path.basename(csv_name).split("-")[0]
+
+
+def guess_source(symbol: str):
+    """BTCUSDT -> binance, BTC-USD/AAPL -> yahoo"""
+    return "binance" if symbol.endswith("USDT") else "yahoo"
+
+
+def load_csv(symbol: str, interval: str, period: str, source: str = None, store_folder: str = STORE_FOLDER):
     """
-    Lädt Candles aus CSV
+    Lädt Candles: zuerst die letzten `period` aus dem Candle-Store,
+    sonst aus der CSV (data/{symbol}-{interval}-{period}.csv)
     """
+    store = api_module("candle_store").CandleStore(store_folder)
+    days = api_module("chunk_planner").parse_period(period)
+    batch = store.read_last(source or guess_source(symbol), symbol, interval, days)
+    if len(batch):
+        return batch.to_frame()
+
     file_path = f"data/{symbol}-{interval}-{period}.csv"
     df = pd.read_csv(file_path, parse_dates=["timestamp"])
     return df
 
-df = load_csv("BTC-USD", "1m", "7d")
+
+# ---------------------------
+# --- Typisierte Arrays (memmap) ---
+# ---------------------------
+
+def array_dir(csv_path: str, array_folder: str = ARRAY_FOLDER):
+    """csv/binance/X.csv -> {array_folder}/binance/X/"""
+    folder, name = os.path.split(os.path.abspath(csv_path))
+    return os.path.join(array_folder, os.path.basename(folder), os.path.splitext(name)[0])
+
+
+def write_atomic(path: str, write):
+    """write(f) in eine eindeutige tmp-Datei im selben Ordner, dann os.replace (kein fremdes tmp überschreiben)"""
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), prefix=os.path.basename(path) + ".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            write(f)
+        os.chmod(tmp, 0o644)  # mkstemp legt 0600 an
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+
+@contextmanager
+def convert_lock(out_dir: str, poll: float = 0.1, stale: float = LOCK_STALE_SECONDS):
+    """
+    Lock-Datei {out_dir}.lock (O_EXCL, funktioniert auch unter Windows):
+    nur ein Prozess wandelt eine CSV gleichzeitig um, die anderen warten.
+    """
+    path = out_dir.rstrip(os.sep) + ".lock"
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    while True:
+        try:
+            fd = os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            break
+        except FileExistsError:
+            try:
+                if time.time() - os.path.getmtime(path) > stale:
+                    os.remove(path)  # Prozess ist abgestürzt
+                    continue
+            except FileNotFoundError:
+                continue
+            time.sleep(poll)
+    try:
+        os.write(fd, str(os.getpid()).encode())
+        os.close(fd)
+        yield
+    finally:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+def convert_csv(csv_path: str, out_dir: str):
+    """
+    CSV einmalig in Spalten-Dateien umwandeln (ts int64, OHLCV float32, label int8).
+    meta.json wird zuletzt geschrieben und markiert die Umwandlung als vollständig.
+    Parallel aufrufende Prozesse: load_arrays hält dabei convert_lock.
+    """
+    df = pd.read_csv(csv_path)
+    df.columns = [c.lower() for c in df.columns]
+    df = df.dropna(subset=["timestamp"])
+    # Wanduhrzeit wie im Export (Yahoo-Rohexporte: UTC-Offset abschneiden)
+    ts = pd.to_datetime(df["timestamp"].astype(str).str[:19]).to_numpy(dtype="datetime64[s]").astype(np.int64)
+    close = df["close"].to_numpy(dtype=np.float64)
+    if "prev_close" in df:
+        prev_close = df["prev_close"].to_numpy(dtype=np.float64)
+    else:
+        prev_close = np.concatenate((df["open"].to_numpy(dtype=np.float64)[:1], close[:-1]))
+    label = (df["color"] == "green").to_numpy() if "color" in df else close > prev_close
+
+    columns = {
+        "ts": ts,
+        "open": df["open"].to_numpy(),
+        "high": df["high"].to_numpy(),
+        "low": df["low"].to_numpy(),
+        "close": close,
+        "prev_close": prev_close,
+        "volume": df["volume"].fillna(0).to_numpy(),
+        "label": label,
+    }
+    os.makedirs(out_dir, exist_ok=True)
+    meta_path = os.path.join(out_dir, "meta.json")
+    if os.path.exists(meta_path):
+        os.remove(meta_path)  # bricht die Umwandlung ab, wird sie beim nächsten Laden wiederholt
+    for name, dtype in ARRAY_DTYPES.items():
+        column = np.ascontiguousarray(columns[name], dtype=dtype)
+        write_atomic(os.path.join(out_dir, f"{name}.npy"), lambda f: np.save(f, column))
+
+    stat = os.stat(csv_path)
+    meta = {"csv": os.path.abspath(csv_path), "mtime": stat.st_mtime, "size": stat.st_size, "rows": len(ts)}
+    write_atomic(meta_path, lambda f: f.write(json.dumps(meta).encode()))
+
+
+def arrays_fresh(csv_path: str, out_dir: str):
+    """True, wenn meta.json zur aktuellen CSV (mtime, Größe) passt"""
+    stat = os.stat(csv_path)
+    try:
+        with open(os.path.join(out_dir, "meta.json")) as f:
+            meta = json.load(f)
+        return meta["mtime"] == stat.st_mtime and meta["size"] == stat.st_size
+    except (OSError, ValueError, KeyError):
+        return False
+
+
+def load_arrays(csv_path: str, array_folder: str = ARRAY_FOLDER):
+    """
+    Spalten einer CSV als read-only memmap (dict name -> Array).
+    Beim ersten Aufruf bzw. wenn sich die CSV geändert hat wird umgewandelt, danach teilen sich
+    alle Prozesse dieselben Seiten im Page-Cache und lesen nur die Zeilen, die sie anfassen.
+    """
+    out_dir = array_dir(csv_path, array_folder)
+    if not arrays_fresh(csv_path, out_dir):
+        with convert_lock(out_dir):
+            if not arrays_fresh(csv_path, out_dir):  # sonst hat ein anderer Prozess gerade umgewandelt
+                convert_csv(csv_path, out_dir)
+    return {name: np.load(os.path.join(out_dir, f"{name}.npy"), mmap_mode="r") for name in ARRAY_DTYPES}
+
+
+def feature_matrix(arrays, start: int = 0, end: int = None, features=FEATURES):
+    """X (float32, Spalten wie features) und y (1 = grün) für die Zeilen start:end"""
+    X = np.column_stack([arrays["close" if f == "current_close" else f][start:end] for f in features])
+    y = np.asarray(arrays["label"][start:end], dtype=int)
+    return X, y
+
+
+if __name__ == "__main__":
+    df = load_csv("BTC-USD", "1m", "7d")
+    print(df.tail())
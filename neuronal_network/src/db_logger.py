@@ -0,0 +1,207 @@
+# db_logger.py
+# Trade-Ledger in SQLite (Schema aus code_sample/sql/sql_create, erweitert um Modell & Vorhersage).
+# WAL-Modus + gepufferte executemany-Inserts, damit die Simulationen pro Candle loggen können;
+# Auswertungen wie PnL pro Modell/Tag lesen die mitgeführten Tagessummen statt kompletter JSON-Logs.
+#
+#   python neuronal_network/src/db_logger.py --import neuronal_network/notebooks/models/*.json
+#   python neuronal_network/src/db_logger.py --model Heusc_v0.1_20250913_012713
+import os
+import json
+import sqlite3
+import argparse
+import pandas as pd
+
+REPO_DIR = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".."))
+TRADE_DB = os.getenv("TRADE_DB", os.path.join(REPO_DIR, "neuronal_network", "notebooks", "models", "trades.db"))
+BATCH_SIZE = 1000
+
+# Reihenfolge der Werte in log() / executemany
+COLUMNS = (
+    "model", "timestamp", "symbol", "action", "price", "quantity", "capital_before", "capital_after",
+    "predicted", "actual", "profit", "confidence",
+)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS trades (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    timestamp TEXT,
+    symbol TEXT,
+    action TEXT,
+    price REAL,
+    quantity REAL,
+    capital_before REAL,
+    capital_after REAL,
+    model TEXT,
+    predicted TEXT,
+    actual TEXT,
+    profit REAL,
+    confidence REAL
+);
+CREATE INDEX IF NOT EXISTS idx_trades_model_symbol_ts ON trades (model, symbol, timestamp);
+
+-- Tagessummen, bei jedem flush mitgeführt: PnL pro Modell/Tag liest nur ein paar Zeilen
+CREATE TABLE IF NOT EXISTS pnl_daily (
+    model TEXT,
+    symbol TEXT,
+    day TEXT,
+    trades INTEGER,
+    pnl REAL,
+    PRIMARY KEY (model, symbol, day)
+);
+"""
+
+
+def model_key(name: str):
+    """Heusc_v0.1_20250913_012713.keras/.json -> Heusc_v0.1_20250913_012713"""
+    base = os.path.basename(name)
+    for ext in (".keras", ".json"):
+        if base.endswith(ext):
+            return base[:-len(ext)]
+    return base
+
+
+class TradeLedger:
+    """
+    Gepufferter Writer für die trades-Tabelle.
+    log() sammelt Zeilen, alle batch_size Zeilen (und bei flush/close) geht ein executemany
+    in einer Transaktion raus. Timestamps als Text "YYYY-MM-DD HH:MM:SS" (Tag = erste 10 Zeichen).
+    """
+
+    def __init__(self, path: str = TRADE_DB, batch_size: int = BATCH_SIZE):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.path = path
+        self.batch_size = batch_size
+        self.pending = []
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")  # mit WAL sicher, fsync nur beim Checkpoint
+        self.conn.executescript(SCHEMA)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # --- Schreiben ---
+    def log(self, model, timestamp, symbol, action, price, quantity=None, capital_before=None,
+            capital_after=None, predicted=None, actual=None, profit=0.0, confidence=None):
+        self.pending.append((
+            model_key(model), str(timestamp), symbol, action,
+            None if price is None else float(price),
+            None if quantity is None else float(quantity),
+            None if capital_before is None else float(capital_before),
+            None if capital_after is None else float(capital_after),
+            predicted, actual, float(profit),
+            None if confidence is None else float(confidence),
+        ))
+        if len(self.pending) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if not self.pending:
+            return
+        daily = {}
+        for row in self.pending:
+            key = (row[0], row[2] or "", row[1][:10])
+            trades, pnl = daily.get(key, (0, 0.0))
+            daily[key] = (trades + (row[10] != 0), pnl + row[10])
+        with self.conn:
+            self.conn.executemany(
+                f"INSERT INTO trades ({', '.join(COLUMNS)}) VALUES ({', '.join('?' * len(COLUMNS))})",
+                self.pending,
+            )
+            self.conn.executemany(
+                "INSERT INTO pnl_daily (model, symbol, day, trades, pnl) VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT (model, symbol, day) DO UPDATE SET "
+                "trades = trades + excluded.trades, pnl = pnl + excluded.pnl",
+                [(*key, trades, pnl) for key, (trades, pnl) in daily.items()],
+            )
+        self.pending = []
+
+    def close(self):
+        if self.conn is None:
+            return
+        self.flush()
+        self.conn.close()
+        self.conn = None
+
+    # --- Abfragen ---
+    def pnl_per_day(self, model: str = None, symbol: str = None):
+        """DataFrame model, day, trades (Zeilen mit profit != 0), pnl - aus pnl_daily"""
+        self.flush()
+        where, params = self._filter(model, symbol)
+        sql = (
+            "SELECT model, day, SUM(trades) AS trades, SUM(pnl) AS pnl "
+            f"FROM pnl_daily {where} GROUP BY model, day ORDER BY model, day"
+        )
+        return pd.read_sql_query(sql, self.conn, params=params)
+
+    def trades(self, model: str, symbol: str = None, start: str = None, end: str = None):
+        """Zeilen eines Modells, optional nur symbol und Zeitraum [start, end)"""
+        self.flush()
+        where, params = self._filter(model, symbol)
+        if start:
+            where += " AND timestamp >= ?"
+            params.append(str(start))
+        if end:
+            where += " AND timestamp < ?"
+            params.append(str(end))
+        return pd.read_sql_query(f"SELECT * FROM trades {where} ORDER BY timestamp, id", self.conn, params=params)
+
+    def models(self):
+        return [row[0] for row in self.conn.execute("SELECT DISTINCT model FROM trades ORDER BY model")]
+
+    @staticmethod
+    def _filter(model, symbol):
+        clauses, params = [], []
+        if model:
+            clauses.append("model = ?")
+            params.append(model_key(model))
+        if symbol:
+            clauses.append("symbol = ?")
+            params.append(symbol)
+        return ("WHERE " + " AND ".join(clauses)) if clauses else "WHERE 1", params
+
+    # --- Alte JSON-Logs ---
+    def import_model_log(self, path: str, symbol: str = None):
+        """models/*.json (Simulation: transactions, Live: trades) übernehmen. Rückgabe: Anzahl Zeilen"""
+        with open(path) as f:
+            data = json.load(f)
+        model = data.get("model") or model_key(path)
+        with self.conn:  # erneuter Import ersetzt
+            self.conn.execute("DELETE FROM trades WHERE model = ?", (model_key(model),))
+            self.conn.execute("DELETE FROM pnl_daily WHERE model = ?", (model_key(model),))
+        rows = data.get("transactions") or data.get("trades") or []
+        for t in rows:
+            confidence = t.get("confidence")
+            if isinstance(confidence, dict):
+                confidence = confidence.get("Grün", confidence.get("green"))
+            self.log(
+                model, t.get("timestamp", ""), t.get("symbol", symbol), t.get("action"), t.get("price", t.get("current_close")),
+                predicted=t.get("predicted"), actual=t.get("actual"),
+                profit=t.get("profit", t.get("profit_cash", 0.0)) or 0.0,
+                confidence=confidence if confidence is not None else t.get("pred_conf"),
+                capital_after=t.get("balance"),
+            )
+        self.flush()
+        return len(rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Trade-Ledger (SQLite): JSON-Logs importieren, PnL pro Tag anzeigen")
+    parser.add_argument("--db", default=TRADE_DB, help="Pfad zur SQLite-Datei")
+    parser.add_argument("--import", dest="imports", nargs="+", default=[], help="models/*.json übernehmen")
+    parser.add_argument("--symbol", help="Symbol für Logs ohne Symbol-Spalte bzw. Filter")
+    parser.add_argument("--model", help="nur dieses Modell")
+    args = parser.parse_args()
+
+    with TradeLedger(args.db) as ledger:
+        for path in args.imports:
+            if path.endswith(".json"):
+                print(f"{path}: {ledger.import_model_log(path, args.symbol)} Zeilen")
+        print(ledger.pnl_per_day(args.model, args.symbol).to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,290 @@
+# transaction_log.py
+# Append-only Transaktions-Log pro Modell (JSONL) statt json.dump der kompletten Liste bei jedem Retrain.
+#   models/{modell}.jsonl        erstes Segment
+#   models/{modell}.{n}.jsonl    folgende Segmente, sobald das aktuelle max_bytes erreicht (das höchste n ist aktiv)
+# Rotation legt nur eine neue Datei an (kein Umbenennen, Leser mit offener Datei stören nicht).
+# Erste Zeile jeder Datei ist ein Header fester Länge ({"summary": {...}} mit Leerzeichen aufgefüllt),
+# der an Ort und Stelle überschrieben wird (balance, status, Anzahl) - Anhängen bleibt O(1).
+# Ein Retrain schreibt nur seine neuen Transaktionen und verweist über summary["parent"] auf das alte Modell.
+#
+#   python neuronal_network/src/transaction_log.py Heusc_v0.4_20250913_033123 --tail 20
+#   python neuronal_network/src/transaction_log.py Heusc_v0.4_20250913_033123 --follow
+import os
+import re
+import json
+import time
+import argparse
+from datetime import datetime
+
+LOG_FOLDER = os.getenv("TRANSACTION_LOG_FOLDER", os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "..", "notebooks", "models"))
+HEADER_SIZE = 1024          # Bytes inkl. Zeilenumbruch
+MAX_BYTES = 16 * 1024 ** 2  # Rotation ab 16 MB
+TAIL_BLOCK = 64 * 1024
+
+
+def log_name(model: str):
+    """Heusc_v0.1_20250913_012713.keras/.json/.jsonl -> Heusc_v0.1_20250913_012713"""
+    base = os.path.basename(model)
+    for ext in (".keras", ".jsonl", ".json"):
+        if base.endswith(ext):
+            return base[:-len(ext)]
+    return base
+
+
+def segment_path(folder: str, model: str, index: int = 0):
+    name = log_name(model)
+    return os.path.join(folder, f"{name}.jsonl" if index == 0 else f"{name}.{index}.jsonl")
+
+
+def segment_paths(folder: str, model: str):
+    """Alle Dateien eines Logs, älteste zuerst (die letzte ist die aktive)"""
+    name = log_name(model)
+    pattern = re.compile(rf"^{re.escape(name)}(?:\.(\d+))?\.jsonl$")
+    segments = []
+    if os.path.isdir(folder):
+        for f in os.listdir(folder):
+            match = pattern.match(f)
+            if match:
+                segments.append((int(match.group(1) or 0), os.path.join(folder, f)))
+    return [p for _, p in sorted(segments)]
+
+
+def _plain(value):
+    """numpy-Skalare (float32-Balance, int64 ...) für json.dumps"""
+    if hasattr(value, "item"):
+        return value.item()
+    raise TypeError(f"{type(value).__name__} ist nicht JSON-serialisierbar")
+
+
+def _header(summary):
+    line = json.dumps({"summary": summary}, ensure_ascii=False, default=_plain).encode()
+    if len(line) >= HEADER_SIZE:
+        raise ValueError(f"Header zu groß ({len(line)} Bytes, max {HEADER_SIZE - 1})")
+    return line + b" " * (HEADER_SIZE - 1 - len(line)) + b"\n"
+
+
+def _read_header(f):
+    return json.loads(f.readline())["summary"]
+
+
+# ---------------------------
+# --- Schreiben ---
+# ---------------------------
+
+class TransactionLog:
+    """
+    Writer für ein Modell. append() hängt eine JSON-Zeile an (gepuffert), flush() schreibt Puffer
+    und Header raus. Existiert das Log schon, wird weitergeschrieben.
+    """
+
+    def __init__(self, model: str, folder: str = LOG_FOLDER, max_bytes: int = MAX_BYTES, keep: int = None, **summary):
+        os.makedirs(folder, exist_ok=True)
+        self.folder = folder
+        self.model = log_name(model)
+        self.max_bytes = max_bytes
+        self.keep = keep  # max. Anzahl älterer Segmente (None = alle behalten)
+        paths = segment_paths(folder, model)
+        if paths:
+            self.file = open(paths[-1], "r+b")
+            self.summary = _read_header(self.file)
+            self.summary.update(summary)
+        else:
+            self.file = open(segment_path(folder, model), "w+b")
+            self.summary = {
+                "model": model, "created": str(datetime.now()), "status": "running", "balance": None,
+                "parent": None, "transactions": 0, "profit": 0.0, "total_profit": 0.0, "segments": 0,
+            }
+            self.summary.update(summary)
+            self.file.write(_header(self.summary))
+        self.size = self.file.seek(0, os.SEEK_END)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def append(self, transaction: dict, profit: float = None):
+        """Eine Transaktion anhängen; profit (Standard: transaction["profit"/"profit_cash"]) läuft in die Summen"""
+        line = json.dumps(transaction, ensure_ascii=False, default=_plain).encode() + b"\n"
+        if self.size + len(line) > self.max_bytes and self.size > HEADER_SIZE:
+            self.rotate()
+        self.file.write(line)
+        self.size += len(line)
+        if profit is None:
+            profit = transaction.get("profit", transaction.get("profit_cash", 0.0))
+        self.summary["transactions"] += 1
+        self.summary["profit"] += float(profit or 0.0)
+        self.summary["total_profit"] += float(profit or 0.0)
+
+    def update(self, **fields):
+        """Summary-Felder setzen (z.B. balance, status) und Header schreiben"""
+        self.summary.update(fields)
+        self.flush()
+
+    def flush(self):
+        self.file.seek(0)
+        self.file.write(_header(self.summary))
+        self.file.seek(0, os.SEEK_END)
+        self.file.flush()
+
+    def rotate(self):
+        """Neues Segment anlegen (Header = aktueller Stand), ältere ggf. löschen"""
+        self.summary["segments"] += 1
+        self.flush()
+        self.file.close()
+        self.file = open(segment_path(self.folder, self.model, self.summary["segments"]), "w+b")
+        self.file.write(_header(self.summary))
+        self.size = HEADER_SIZE
+        if self.keep is not None:
+            for old in segment_paths(self.folder, self.model)[:-(self.keep + 1)]:
+                os.remove(old)
+
+    def close(self):
+        if self.file.closed:
+            return
+        self.flush()
+        self.file.close()
+
+
+# ---------------------------
+# --- Lesen ---
+# ---------------------------
+
+def read_summary(model: str, folder: str = LOG_FOLDER):
+    """Header des aktiven Segments (nur die erste Zeile wird gelesen), None wenn es kein Log gibt"""
+    paths = segment_paths(folder, model)
+    if not paths:
+        return None
+    with open(paths[-1], "rb") as f:
+        return _read_header(f)
+
+
+def iter_transactions(model: str, folder: str = LOG_FOLDER, parents: bool = False):
+    """Alle Transaktionen streamen (älteste zuerst); parents=True läuft vorher die Kette der Vorgänger ab"""
+    if parents:
+        summary = read_summary(model, folder)
+        if summary and summary.get("parent"):
+            yield from iter_transactions(summary["parent"], folder, parents=True)
+    for path in segment_paths(folder, model):
+        with open(path, "rb") as f:
+            f.readline()
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+
+def _tail_file(path, n):
+    """Letzte n Zeilen einer Datei (ohne Header), liest blockweise von hinten"""
+    with open(path, "rb") as f:
+        pos = f.seek(0, os.SEEK_END)
+        data = b""
+        while pos > HEADER_SIZE and data.count(b"\n") <= n:
+            step = min(TAIL_BLOCK, pos - HEADER_SIZE)
+            pos -= step
+            f.seek(pos)
+            data = f.read(step) + data
+    lines = data.split(b"\n")
+    if pos > HEADER_SIZE:
+        lines = lines[1:]  # erste Zeile evtl. abgeschnitten
+    return [json.loads(line) for line in lines if line.strip()][-n:]
+
+
+def tail_transactions(model: str, n: int = 10, folder: str = LOG_FOLDER):
+    """Letzte n Transaktionen, ohne das Log komplett zu lesen"""
+    out = []
+    if n <= 0:
+        return out
+    for path in reversed(segment_paths(folder, model)):
+        out = _tail_file(path, n - len(out)) + out
+        if len(out) >= n:
+            break
+    return out
+
+
+def follow_transactions(model: str, folder: str = LOG_FOLDER, poll: float = 1.0):
+    """Wie tail -f: neue Transaktionen liefern, bei Rotation geht es im nächsten Segment weiter"""
+    paths = segment_paths(folder, model)
+    waited = not paths
+    while not paths:  # Log gibt es noch nicht: dann ab dem ersten Eintrag liefern
+        time.sleep(poll)
+        paths = segment_paths(folder, model)
+    path = paths[-1]
+    f = open(path, "rb")
+    if waited:
+        f.readline()
+    else:
+        f.seek(0, os.SEEK_END)
+    buffer = b""
+    try:
+        while True:
+            chunk = f.read()
+            if chunk:
+                buffer += chunk
+                *lines, buffer = buffer.split(b"\n")
+                for line in lines:
+                    if line.strip():
+                        yield json.loads(line)
+                continue
+            paths = segment_paths(folder, model)
+            newer = paths[paths.index(path) + 1:] if path in paths else paths[-1:]
+            if newer and newer[0] != path:
+                # Segment ist abgeschlossen (Rest wurde oben gelesen) -> nächstes ab Header
+                f.close()
+                path = newer[0]
+                f = open(path, "rb")
+                f.readline()
+                buffer = b""
+            else:
+                time.sleep(poll)
+    finally:
+        f.close()
+
+
+# ---------------------------
+# --- Alte JSON-Logs ---
+# ---------------------------
+
+def convert_json(json_path: str, folder: str = None, max_bytes: int = MAX_BYTES):
+    """models/{modell}.json ({model, created, status, balance, transactions/trades}) einmalig in ein Log umwandeln"""
+    folder = folder or os.path.dirname(os.path.abspath(json_path))
+    with open(json_path) as f:
+        data = json.load(f)
+    model = log_name(json_path)
+    for old in segment_paths(folder, model):
+        os.remove(old)
+    summary = {k: data[k] for k in ("created", "status", "balance") if k in data}
+    with TransactionLog(model, folder, max_bytes, **summary) as log:
+        for t in data.get("transactions") or data.get("trades") or []:
+            log.append(t)
+    return read_summary(model, folder)
+
+
+def load_summary(model: str, folder: str = LOG_FOLDER):
+    """Summary eines Modells; alte JSON-Logs werden dabei einmalig umgewandelt"""
+    summary = read_summary(model, folder)
+    json_path = os.path.join(folder, f"{log_name(model)}.json")
+    if summary is None and os.path.exists(json_path):
+        summary = convert_json(json_path, folder)
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Transaktions-Log eines Modells anzeigen")
+    parser.add_argument("model", help="Modellname (mit oder ohne .keras)")
+    parser.add_argument("--folder", default=LOG_FOLDER, help="Ordner mit den Logs")
+    parser.add_argument("--tail", type=int, default=10, help="letzte n Transaktionen")
+    parser.add_argument("--follow", action="store_true", help="neue Transaktionen laufend ausgeben")
+    args = parser.parse_args()
+
+    print(json.dumps(load_summary(args.model, args.folder), ensure_ascii=False))
+    for t in tail_transactions(args.model, args.tail, args.folder):
+        print(json.dumps(t, ensure_ascii=False))
+    if args.follow:
+        for t in follow_transactions(args.model, args.folder):
+            print(json.dumps(t, ensure_ascii=False), flush=True)
+
+
+if __name__ == "__main__":
+    main()